@@ -27,6 +27,7 @@
 # stdlib imports
 import argparse
 import concurrent.futures
+import json
 import logging
 import logging.handlers
 import multiprocessing
@@ -37,13 +38,20 @@ import time
 import azure.batch.models as batchmodels
 import azure.batch.batch_service_client as batch
 import msrest.authentication
+import requests
+# local imports
+import stats
 
 # create logger
 logger = logging.getLogger(__name__)
 # global defines
 _AAD_TOKEN_TYPE = 'Bearer'
 _TASKMAP_PICKLE_FILE = 'taskmap.pickle'
+_TASK_STATS_JSON_FILE = 'taskstats.json'
 _MAX_EXECUTOR_WORKERS = min((multiprocessing.cpu_count() * 4, 32))
+_RETRY_MAX_ATTEMPTS = 20
+_RETRY_BACKOFF_FACTOR = 0.8
+_RETRY_MAX_BACKOFF = 8
 
 
 def _setup_logger() -> None:
@@ -82,20 +90,40 @@ class TokenAuthentication(msrest.authentication.Authentication):
         """
         self._token = value
 
-    def signed_session(self):
+    def signed_session(self, session=None):
         """Get a signed session for requests.
         Usually called by the Azure SDKs for you to authenticate queries.
         :param TokenAuthentication self: this
+        :param requests.Session session: session to sign
         :rtype: requests.Session
         :return: request session with signed header
         """
-        session = super(TokenAuthentication, self).signed_session()
+        session = super(TokenAuthentication, self).signed_session(session)
         # set session authorization header
         session.headers['Authorization'] = '{} {}'.format(
             _AAD_TOKEN_TYPE, self._token)
         return session
 
 
+def _configure_client_connection(batch_client):
+    # type: (batch.BatchServiceClient) -> None
+    """Keep client connections alive in a pool sized to the executor width
+    and apply the unified retry policy
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    """
+    batch_client.config.retry_policy.retries = _RETRY_MAX_ATTEMPTS
+    batch_client.config.retry_policy.backoff_factor = _RETRY_BACKOFF_FACTOR
+    batch_client.config.retry_policy.max_backoff = _RETRY_MAX_BACKOFF
+    batch_client.config.keep_alive = True
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1, pool_maxsize=_MAX_EXECUTOR_WORKERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    batch_client._client._session = session
+
+
 def _create_credentials():
     # type: (None) -> azure.batch.batch_service_client.BatchServiceClient
     """Create authenticated client
@@ -111,6 +139,7 @@ def _create_credentials():
     batch_client = batch.BatchServiceClient(
         credentials, base_url=account_service_url)
     batch_client.config.add_user_agent('batch-shipyard/rjm')
+    _configure_client_connection(batch_client)
     return batch_client
 
 
@@ -243,6 +272,47 @@ def _monitor_tasks(batch_client, job_id, numtasks):
         time.sleep(2)
 
 
+def _task_statistics(batch_client, job_id):
+    # type: (batch.BatchServiceClient, str) -> None
+    """Log and write task timing statistics of a job
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param str job_id: job id
+    """
+    task_times = stats.StreamingStatistics()
+    task_wall_times = stats.StreamingStatistics()
+    tasks = batch_client.task.list(
+        job_id=job_id,
+        task_list_options=batchmodels.TaskListOptions(
+            filter='state eq \'completed\'',
+            select='id,stats,executionInfo',
+        ))
+    for task in tasks:
+        if task.stats is not None:
+            task_wall_times.add(task.stats.wall_clock_time.total_seconds())
+        if (task.execution_info is not None and
+                task.execution_info.end_time is not None):
+            task_times.add(
+                (task.execution_info.end_time -
+                 task.execution_info.start_time).total_seconds())
+    log = []
+    if task_times.count > 0:
+        log.extend(stats.format_timings(
+            'Task end-to-end time', task_times))
+    if task_wall_times.count > 0:
+        log.extend(stats.format_timings(
+            'Task command walltime', task_wall_times))
+    if len(log) > 0:
+        logger.info('task statistics for job {}{}{}'.format(
+            job_id, os.linesep, os.linesep.join(log)))
+    with open(_TASK_STATS_JSON_FILE, 'w') as f:
+        json.dump({
+            'job_id': job_id,
+            'task_times': task_times.to_dict(),
+            'task_wall_times': task_wall_times.to_dict(),
+        }, f, indent=2, sort_keys=True)
+
+
 def main():
     """Main function"""
     # get command-line args
@@ -263,6 +333,10 @@ def main():
     else:
         logger.info('monitoring tasks for completion')
         _monitor_tasks(batch_client, job_id, len(task_map))
+        try:
+            _task_statistics(batch_client, job_id)
+        except batchmodels.batch_error.BatchErrorException as ex:
+            logger.exception(ex)
 
 
 def parseargs():
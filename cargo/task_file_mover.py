@@ -36,10 +36,17 @@ import pathlib
 # non-stdlib imports
 import azure.batch.batch_auth as batchauth
 import azure.batch.batch_service_client as batch
+import azure.batch.models as batchmodels
+import requests
+# local imports
+import download
 
 # create logger
 logger = logging.getLogger(__name__)
 _MAX_EXECUTOR_WORKERS = min((multiprocessing.cpu_count() * 4, 32))
+_RETRY_MAX_ATTEMPTS = 20
+_RETRY_BACKOFF_FACTOR = 0.8
+_RETRY_MAX_BACKOFF = 8
 
 
 def _setup_logger() -> None:
@@ -54,6 +61,40 @@ def _setup_logger() -> None:
     logger.addHandler(handler)
 
 
+class SharedKeyCredentials(batchauth.SharedKeyCredentials):
+    """Batch shared key credentials which sign a provided session"""
+    def signed_session(self, session=None):
+        """Get a signed session for requests.
+        :param SharedKeyCredentials self: this
+        :param requests.Session session: session to sign
+        :rtype: requests.Session
+        :return: request session with shared key auth
+        """
+        session = super(
+            batchauth.SharedKeyCredentials, self).signed_session(session)
+        session.auth = self.auth
+        return session
+
+
+def _configure_client_connection(batch_client):
+    # type: (batch.BatchServiceClient) -> None
+    """Keep client connections alive in a pool sized to the executor width
+    and apply the unified retry policy
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    """
+    batch_client.config.retry_policy.retries = _RETRY_MAX_ATTEMPTS
+    batch_client.config.retry_policy.backoff_factor = _RETRY_BACKOFF_FACTOR
+    batch_client.config.retry_policy.max_backoff = _RETRY_MAX_BACKOFF
+    batch_client.config.keep_alive = True
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1, pool_maxsize=_MAX_EXECUTOR_WORKERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    batch_client._client._session = session
+
+
 def _create_credentials():
     # type: (None) -> azure.batch.batch_service_client.BatchServiceClient
     """Create authenticated client
@@ -62,26 +103,34 @@ def _create_credentials():
     """
     ba, url, bakey = os.environ['SHIPYARD_BATCH_ENV'].split(';')
     batch_client = batch.BatchServiceClient(
-        batchauth.SharedKeyCredentials(ba, bakey), base_url=url)
+        SharedKeyCredentials(ba, bakey), base_url=url)
     batch_client.config.add_user_agent('batch-shipyard/tfm')
+    _configure_client_connection(batch_client)
     return batch_client
 
 
-def _get_task_file(batch_client, job_id, task_id, filename, fp):
+def _get_task_file(
+        batch_client, job_id, task_id, filename, fp, size, last_modified):
     # type: (batch.BatchServiceClient, str, str, str,
-    #        pathlib.Path) -> None
-    """Get a files from a task
+    #        pathlib.Path, int, str) -> None
+    """Get a files from a task. Large files are downloaded in concurrent
+    ranges which can be resumed.
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param str job_id: job id
     :param str task_id: task id
     :param str filename: file name
     :param pathlib.Path fp: file path
+    :param int size: file size
+    :param str last_modified: last modified time
     """
-    stream = batch_client.file.get_from_task(job_id, task_id, filename)
-    with fp.open('wb') as f:
-        for fdata in stream:
-            f.write(fdata)
+    def _get_range(ocp_range):
+        return batch_client.file.get_from_task(
+            job_id, task_id, filename,
+            batchmodels.FileGetFromTaskOptions(ocp_range=ocp_range))
+
+    download.download_file(
+        _get_range, fp, size, last_modified=last_modified)
 
 
 def get_all_files_via_task(batch_client, job_id, task_id, incl, excl, dst):
@@ -125,7 +174,8 @@ def get_all_files_via_task(batch_client, job_id, task_id, incl, excl, dst):
                     dirs_created.add(str(fp.parent))
                 executor.submit(
                     _get_task_file, batch_client, job_id, task_id,
-                    file.name, fp)
+                    file.name, fp, file.properties.content_length,
+                    str(file.properties.last_modified))
                 i += 1
     if i == 0:
         logger.error(
@@ -49,6 +49,8 @@ from typing import Tuple
 import azure.common
 import azure.cosmosdb.table as azuretable
 import azure.storage.blob as azureblob
+# local imports
+import perf
 try:
     import libtorrent
     _LIBTORRENT_IMPORTED = True
@@ -95,6 +97,7 @@ _CBHANDLES = {}
 _BLOB_LEASES = {}
 _DHT_ROUTERS = []
 _PREFIX = None
+_PERF_TABLE_CLIENT = None
 _STORAGE_CONTAINERS = {
     'blob_globalresources': None,
     'blob_torrents': None,
@@ -178,19 +181,28 @@ def _setup_storage_names(sep: str) -> None:
 
 
 def _create_credentials() -> tuple:
-    """Create storage credentials
+    """Create storage credentials. All clients share a keep-alive
+    connection pool sized to the number of concurrent downloads.
     :rtype: tuple
     :return: (blob_client, table_client)
     """
+    global _PERF_TABLE_CLIENT
     sa, ep, sakey = os.environ['SHIPYARD_STORAGE_ENV'].split(':')
+    request_session = perf.create_request_session(
+        max((_CONCURRENT_DOWNLOADS_ALLOWED, 1)))
     blob_client = azureblob.BlockBlobService(
         account_name=sa,
         account_key=sakey,
-        endpoint_suffix=ep)
+        endpoint_suffix=ep,
+        request_session=request_session)
+    blob_client.retry = perf.storage_retry
     table_client = azuretable.TableService(
         account_name=sa,
         account_key=sakey,
-        endpoint_suffix=ep)
+        endpoint_suffix=ep,
+        request_session=request_session)
+    table_client.retry = perf.storage_retry
+    _PERF_TABLE_CLIENT = table_client
     return blob_client, table_client
 
 
@@ -203,25 +215,24 @@ async def _record_perf_async(
     """
     if not _RECORD_PERF:
         return
-    proc = await asyncio.subprocess.create_subprocess_shell(
-        './perf.py cascade {ev} --prefix {pr} --message "{msg}"'.format(
-            ev=event, pr=_PREFIX, msg=message), loop=loop)
-    await proc.wait()
-    if proc.returncode != 0:
+    try:
+        await loop.run_in_executor(None, _record_perf, event, message)
+    except Exception as exc:
         logger.error(
-            'could not record perf to storage for event: {}'.format(event))
+            'could not record perf to storage for event {}: {}'.format(
+                event, exc))
 
 
 def _record_perf(event: str, message: str) -> None:
-    """Record timing metric
+    """Record timing metric using the shared table client
     :param str event: event
     :param str message: message
     """
     if not _RECORD_PERF:
         return
-    subprocess.check_call(
-        './perf.py cascade {ev} --prefix {pr} --message "{msg}"'.format(
-            ev=event, pr=_PREFIX, msg=message), shell=True)
+    perf.process_event(
+        _PERF_TABLE_CLIENT, _PREFIX + 'perf', 'cascade', event,
+        datetime.datetime.utcnow().timestamp(), message)
 
 
 def generate_torrent(incl_file: pathlib.Path, resource_hash: str) -> dict:
@@ -31,12 +31,48 @@ import os
 # non-stdlib imports
 import azure.common
 import azure.cosmosdb.table as azuretable
+import azure.storage.common.models as azuremodels
+import azure.storage.common.retry as azureretry
+import requests
 
 # global defines
 _BATCHACCOUNT = os.environ['AZ_BATCH_ACCOUNT_NAME']
 _POOLID = os.environ['AZ_BATCH_POOL_ID']
 _NODEID = os.environ['AZ_BATCH_NODE_ID']
 _PARTITION_KEY = '{}${}'.format(_BATCHACCOUNT, _POOLID)
+_RETRY_MAX_ATTEMPTS = 20
+_RETRY_BACKOFF_FACTOR = 0.8
+_RETRY_MAX_BACKOFF = 8
+_STORAGE_RETRY_POLICY = azureretry.ExponentialRetry(
+    initial_backoff=_RETRY_BACKOFF_FACTOR, increment_base=2,
+    max_attempts=_RETRY_MAX_ATTEMPTS, random_jitter_range=1)
+
+
+def create_request_session(pool_maxsize: int) -> requests.Session:
+    """Create a requests session keeping connections alive in a pool
+    :param int pool_maxsize: maximum connections to keep alive per host
+    :rtype: requests.Session
+    :return: requests session
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def storage_retry(context: azuremodels.RetryContext) -> float:
+    """Unified retry policy for storage clients: exponential backoff capped
+    at a maximum backoff
+    :param azure.storage.common.models.RetryContext context: retry context
+    :rtype: float
+    :return: seconds to wait before retrying or None to not retry
+    """
+    backoff = _STORAGE_RETRY_POLICY.retry(context)
+    if backoff is None:
+        return None
+    return min((backoff, _RETRY_MAX_BACKOFF))
 
 
 def _create_credentials() -> azuretable.TableService:
@@ -48,7 +84,9 @@ def _create_credentials() -> azuretable.TableService:
     table_client = azuretable.TableService(
         account_name=sa,
         account_key=sakey,
-        endpoint_suffix=ep)
+        endpoint_suffix=ep,
+        request_session=create_request_session(1))
+    table_client.retry = storage_retry
     return table_client
 
 
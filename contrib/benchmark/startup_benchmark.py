@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# compat imports
+from __future__ import absolute_import, division, print_function
+# stdlib imports
+import argparse
+import collections
+import json
+import os
+import subprocess
+import sys
+
+# global defines
+_ROOT_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+# modules imported by each command prior to issuing any service requests
+_BATCH_COMMAND_MODULES = ['shipyard', 'convoy.clients', 'convoy.fleet']
+_COMMANDS = collections.OrderedDict([
+    ('--help', ['shipyard']),
+    ('jobs list', _BATCH_COMMAND_MODULES),
+    ('pool list', _BATCH_COMMAND_MODULES),
+    ('data files stream', _BATCH_COMMAND_MODULES),
+])
+# modules which must not be imported by the commands above
+_DEFERRED_MODULES = [
+    'adal',
+    'azure.keyvault',
+    'azure.mgmt.batch',
+    'azure.mgmt.compute',
+    'azure.mgmt.network',
+    'azure.mgmt.resource',
+    'azure.mgmt.storage',
+    'pykwalify',
+    'ruamel.yaml',
+]
+_PROBE = '''
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.time()
+for module in {modules!r}:
+    __import__(module)
+elapsed = time.time() - start
+print(json.dumps({{
+    'elapsed': elapsed,
+    'loaded': [x for x in {deferred!r} if x in sys.modules],
+}}))
+'''
+
+
+def _measure(modules, runs):
+    # type: (list, int) -> tuple
+    """Measure import time of modules in fresh interpreters
+    :param list modules: modules to import
+    :param int runs: number of runs
+    :rtype: tuple
+    :return: (best elapsed time, deferred modules loaded)
+    """
+    code = _PROBE.format(
+        root=_ROOT_PATH, modules=modules, deferred=_DEFERRED_MODULES)
+    best = None
+    loaded = []
+    for _ in range(runs):
+        out = subprocess.check_output([sys.executable, '-c', code])
+        result = json.loads(out.decode('utf8').strip().splitlines()[-1])
+        if best is None or result['elapsed'] < best:
+            best = result['elapsed']
+        loaded = result['loaded']
+    return best, loaded
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Measure Batch Shipyard CLI startup import time')
+    parser.add_argument(
+        '--runs', type=int, default=5,
+        help='number of runs per command, the best run is reported')
+    parser.add_argument(
+        '--budget', type=float,
+        help='fail if any command exceeds this many seconds')
+    args = parser.parse_args()
+    failed = False
+    for command, modules in _COMMANDS.items():
+        elapsed, loaded = _measure(modules, args.runs)
+        status = 'ok'
+        if args.budget is not None and elapsed > args.budget:
+            status = 'over budget'
+            failed = True
+        if len(loaded) > 0:
+            status = 'imports deferred modules: {}'.format(', '.join(loaded))
+            failed = True
+        print('{:<20} {:8.3f} sec  {}'.format(command, elapsed, status))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
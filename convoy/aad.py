@@ -30,7 +30,9 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import base64
 import datetime
+import hashlib
 import io
 import json
 import logging
@@ -39,15 +41,19 @@ try:
 except ImportError:
     import pathlib
 import os
+import threading
 # non-stdlib imports
-import adal
-import azure.common.credentials
 import dateutil.parser
 import msrest.authentication
-import msrestazure.azure_exceptions
 # local imports
 from . import settings
 from . import util
+# deferred non-stdlib imports
+adal = util.LazyModule('adal')
+azurecredentials = util.LazyModule('azure.common.credentials')
+azureactivedirectory = util.LazyModule(
+    'msrestazure.azure_active_directory')
+fernet = util.LazyModule('cryptography.fernet')
 
 # create logger
 logger = logging.getLogger(__name__)
@@ -55,6 +61,112 @@ util.setup_logger(logger)
 # global defines
 _LOGIN_AUTH_URI = 'https://login.microsoftonline.com'
 _CLIENT_ID = '04b07795-8ddb-461a-bbee-02f9e1bf7b46'  # xplat-cli
+_TOKEN_CACHE_DIR = pathlib.Path(
+    os.path.expanduser('~'), '.batch-shipyard', 'token-cache')
+_TOKEN_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+
+class _SharedTokenCache(object):
+    """Token cache for non-interactive auth shared across processes. Tokens
+    are keyed by authority, resource and client id, stored encrypted with a
+    key derived from the client secret under a file lock, and reacquired
+    before they expire."""
+    def __init__(self, authority, resource, client_id, secret, acquire):
+        # type: (_SharedTokenCache, str, str, str, bytes, Callable) -> None
+        """Ctor for _SharedTokenCache
+        :param _SharedTokenCache self: this
+        :param str authority: authority url including the directory id
+        :param str resource: resource
+        :param str client_id: client id
+        :param bytes secret: client secret to derive the cache key from
+        :param Callable acquire: function to acquire a token
+        """
+        key = hashlib.sha256('\n'.join(
+            (authority.lower(), resource.lower(), client_id.lower())
+        ).encode('utf8')).hexdigest()
+        self._path = pathlib.Path(_TOKEN_CACHE_DIR, key + '.token')
+        self._lock_path = pathlib.Path(_TOKEN_CACHE_DIR, key + '.lock')
+        self._cipher_key = base64.urlsafe_b64encode(
+            hashlib.sha256(key.encode('utf8') + secret).digest())
+        self._acquire = acquire
+        self._token = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_fresh(token):
+        # type: (dict) -> bool
+        """Check if a token is not within the refresh margin of expiry
+        :param dict token: token
+        :rtype: bool
+        :return: if token can be used
+        """
+        try:
+            expiry = dateutil.parser.parse(token['expiresOn'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return datetime.datetime.now() + _TOKEN_REFRESH_MARGIN < expiry
+
+    def _load(self):
+        # type: (_SharedTokenCache) -> dict
+        """Load a token from the cache
+        :param _SharedTokenCache self: this
+        :rtype: dict
+        :return: token or None if not cached or not decryptable
+        """
+        try:
+            with self._path.open('rb') as f:
+                data = f.read()
+            return json.loads(fernet.Fernet(self._cipher_key).decrypt(
+                data).decode('utf8'))
+        except Exception:
+            return None
+
+    def _save(self, token):
+        # type: (_SharedTokenCache, dict) -> None
+        """Atomically save an encrypted token to the cache
+        :param _SharedTokenCache self: this
+        :param dict token: token
+        """
+        data = fernet.Fernet(self._cipher_key).encrypt(
+            json.dumps(token).encode('utf8'))
+        tmp = '{}.{}.tmp'.format(self._path, os.getpid())
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        try:
+            os.replace(tmp, str(self._path))
+        except AttributeError:
+            # python 2 does not have an atomic replace
+            if self._path.exists():
+                self._path.unlink()
+            os.rename(tmp, str(self._path))
+
+    def get_token(self):
+        # type: (_SharedTokenCache) -> dict
+        """Get a token, from memory or the shared cache if it remains
+        valid, acquiring and caching a new one otherwise
+        :param _SharedTokenCache self: this
+        :rtype: dict
+        :return: token
+        """
+        with self._lock:
+            if self._token is not None and self._is_fresh(self._token):
+                return self._token
+            try:
+                _TOKEN_CACHE_DIR.mkdir(
+                    mode=0o700, parents=True, exist_ok=True)
+                with util.file_lock(self._lock_path):
+                    token = self._load()
+                    if token is None or not self._is_fresh(token):
+                        logger.debug('acquiring aad token for {}'.format(
+                            self._path.stem))
+                        token = self._acquire()
+                        self._save(token)
+            except (IOError, OSError) as e:
+                logger.debug('aad token cache unavailable: {}'.format(e))
+                token = self._acquire()
+            self._token = token
+            return token
 
 
 class DeviceCodeAuthentication(msrest.authentication.Authentication):
@@ -88,14 +200,16 @@ class DeviceCodeAuthentication(msrest.authentication.Authentication):
         """
         self._token = value
 
-    def signed_session(self):
+    def signed_session(self, session=None):
         """Get a signed session for requests.
         Usually called by the Azure SDKs for you to authenticate queries.
         :param DeviceCodeAuthentication self: this
+        :param requests.Session session: session to sign
         :rtype: requests.Session
         :return: request session with signed header
         """
-        session = super(DeviceCodeAuthentication, self).signed_session()
+        session = super(DeviceCodeAuthentication, self).signed_session(
+            session)
         # try to get cached token
         if self._token is None and util.is_not_empty(self._token_cache_file):
             try:
@@ -233,16 +347,23 @@ def create_aad_credentials(ctx, aad_settings):
                  'directoryid={} appid={} cert_thumbprint={}').format(
                      aad_authority_url, endpoint, aad_directory_id,
                      aad_application_id, aad_cert_thumbprint))
-        context = adal.AuthenticationContext(
-            '{}/{}'.format(aad_authority_url, aad_directory_id))
-        return msrestazure.azure_active_directory.AdalAuthentication(
-            lambda: context.acquire_token_with_client_certificate(
+        authority = '{}/{}'.format(aad_authority_url, aad_directory_id)
+        context = adal.AuthenticationContext(authority)
+        with open(aad_cert_private_key, 'rb') as f:
+            private_key = f.read()
+
+        def acquire():
+            return context.acquire_token_with_client_certificate(
                 endpoint,
                 aad_application_id,
-                util.decode_string(open(aad_cert_private_key, 'rb').read()),
+                util.decode_string(private_key),
                 aad_cert_thumbprint
             )
-        )
+        if aad_settings.token_cache_enabled:
+            acquire = _SharedTokenCache(
+                authority, endpoint, aad_application_id, private_key,
+                acquire).get_token
+        return azureactivedirectory.AdalAuthentication(acquire)
     elif util.is_not_empty(aad_auth_key):
         if util.is_not_empty(aad_password):
             raise ValueError(
@@ -253,13 +374,21 @@ def create_aad_credentials(ctx, aad_settings):
                  'directoryid={} appid={}').format(
                      aad_authority_url, endpoint, aad_directory_id,
                      aad_application_id))
-        return azure.common.credentials.ServicePrincipalCredentials(
-            aad_application_id,
-            aad_auth_key,
-            tenant=aad_directory_id,
-            auth_uri=aad_authority_url,
-            resource=endpoint,
-        )
+        if not aad_settings.token_cache_enabled:
+            return azurecredentials.ServicePrincipalCredentials(
+                aad_application_id,
+                aad_auth_key,
+                tenant=aad_directory_id,
+                auth_uri=aad_authority_url,
+                resource=endpoint,
+            )
+        authority = '{}/{}'.format(aad_authority_url, aad_directory_id)
+        context = adal.AuthenticationContext(authority)
+        return azureactivedirectory.AdalAuthentication(_SharedTokenCache(
+            authority, endpoint, aad_application_id,
+            util.encode_string(aad_auth_key),
+            lambda: context.acquire_token_with_client_credentials(
+                endpoint, aad_application_id, aad_auth_key)).get_token)
     elif util.is_not_empty(aad_password):
         if settings.verbose(ctx.config):
             logger.debug(
@@ -267,7 +396,7 @@ def create_aad_credentials(ctx, aad_settings):
                  'endpoint={} directoryid={} username={}').format(
                      aad_authority_url, endpoint, aad_directory_id, aad_user))
         try:
-            return azure.common.credentials.UserPassCredentials(
+            return azurecredentials.UserPassCredentials(
                 username=aad_user,
                 password=aad_password,
                 tenant=aad_directory_id,
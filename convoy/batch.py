@@ -49,17 +49,20 @@ import tempfile
 import time
 # non-stdlib imports
 import azure.batch.models as batchmodels
-import azure.mgmt.batch.models as mgmtbatchmodels
 import dateutil.tz
 # local imports
 from . import autoscale
 from . import crypto
 from . import data
+from . import download
 from . import keyvault
 from . import settings
+from . import stats
 from . import storage
 from . import util
 from .version import __version__
+# deferred non-stdlib imports
+mgmtbatchmodels = util.LazyModule('azure.mgmt.batch.models')
 
 # create logger
 logger = logging.getLogger(__name__)
@@ -67,6 +70,29 @@ util.setup_logger(logger)
 # global defines
 _MAX_EXECUTOR_WORKERS = min((multiprocessing.cpu_count() * 4, 32))
 _MAX_REBOOT_RETRIES = 5
+_MAX_NODE_REMOVAL_RETRIES = 5
+_NODE_WATCH_SELECT = 'id,state,startTaskInfo'
+_POOL_WATCH_SELECT = (
+    'id,vmSize,targetDedicatedNodes,targetLowPriorityNodes,resizeErrors,'
+    'resizeTimeout,allocationState,allocationStateTransitionTime'
+)
+_NODE_WATCH_MIN_INTERVAL = 3
+_NODE_WATCH_MAX_INTERVAL = 30
+_NODE_WATCH_FULL_REFRESH_POLLS = 10
+_TAIL_MIN_INTERVAL = 1
+_TAIL_MAX_INTERVAL = 30
+_TAIL_FULL_REFRESH_POLLS = 10
+_BULK_TASK_WAIT_MIN_INTERVAL = 1
+_BULK_TASK_WAIT_MAX_INTERVAL = 10
+_REMOTE_LOGIN_CACHE_FILE = '.shipyard-rls-{}.json'
+_REMOTE_LOGIN_CACHE_INVALID_STATES = frozenset((
+    batchmodels.ComputeNodeState.leaving_pool,
+    batchmodels.ComputeNodeState.preempted,
+    batchmodels.ComputeNodeState.rebooting,
+    batchmodels.ComputeNodeState.reimaging,
+    batchmodels.ComputeNodeState.unknown,
+    batchmodels.ComputeNodeState.unusable,
+))
 _SSH_TUNNEL_SCRIPT = 'ssh_docker_tunnel_shipyard.sh'
 _TASKMAP_PICKLE_FILE = 'taskmap.pickle'
 _RUN_ELEVATED = batchmodels.UserIdentity(
@@ -536,6 +562,252 @@ def _retrieve_outputs_from_failed_nodes(batch_client, config, nodeid=None):
                 pass
 
 
+def _get_nodes_by_id(batch_client, pool_id, node_ids):
+    # type: (batch.BatchServiceClient, str, List[str]) ->
+    #        Dict[str, batchmodels.ComputeNode]
+    """Get the state of specific nodes concurrently
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param str pool_id: pool id
+    :param list node_ids: node ids
+    :rtype: dict
+    :return: dict of node id -> node, nodes that no longer exist are omitted
+    """
+    def _get_node(node_id):
+        try:
+            return batch_client.compute_node.get(
+                pool_id, node_id,
+                compute_node_get_options=batchmodels.ComputeNodeGetOptions(
+                    select=_NODE_WATCH_SELECT))
+        except batchmodels.batch_error.BatchErrorException as ex:
+            if 'The specified node does not exist' in ex.message.value:
+                return None
+            raise
+    ret = {}
+    if len(node_ids) == 0:
+        return ret
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_max_workers(node_ids)) as executor:
+        for node in executor.map(_get_node, node_ids):
+            if node is not None:
+                ret[node.id] = node
+    return ret
+
+
+def _refresh_node_state_map(
+        batch_client, pool_id, node_map, stopping_states, full):
+    # type: (batch.BatchServiceClient, str,
+    #        Dict[str, batchmodels.ComputeNode],
+    #        List[batchmodels.ComputeNodeState], bool) ->
+    #        Dict[str, batchmodels.ComputeNode]
+    """Refresh a map of node states. An incremental refresh only lists nodes
+    not in stopping states and fetches nodes which have left a
+    non-stopping state since the last refresh.
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param str pool_id: pool id
+    :param dict node_map: current map of node id -> node
+    :param list stopping_states: list of node states to stop polling
+    :param bool full: perform a full refresh
+    :rtype: dict
+    :return: refreshed map of node id -> node
+    """
+    if full:
+        nodes = batch_client.compute_node.list(
+            pool_id,
+            compute_node_list_options=batchmodels.ComputeNodeListOptions(
+                select=_NODE_WATCH_SELECT))
+        return {node.id: node for node in nodes}
+    nodes = batch_client.compute_node.list(
+        pool_id,
+        compute_node_list_options=batchmodels.ComputeNodeListOptions(
+            filter=' and '.join(
+                'state ne \'{}\''.format(state.value)
+                for state in stopping_states),
+            select=_NODE_WATCH_SELECT))
+    ret = {node.id: node for node in nodes}
+    transitioned = []
+    for node_id in node_map:
+        if node_id in ret:
+            continue
+        if node_map[node_id].state in stopping_states:
+            ret[node_id] = node_map[node_id]
+        else:
+            transitioned.append(node_id)
+    ret.update(_get_nodes_by_id(batch_client, pool_id, transitioned))
+    return ret
+
+
+class _NodeRecovery(object):
+    """Dispatch recovery actions for failed and unusable nodes to a
+    background worker pool with per-node retry budgets"""
+    def __init__(self, batch_client, config, pool_id):
+        # type: (_NodeRecovery, batch.BatchServiceClient, dict, str) -> None
+        """Ctor for _NodeRecovery
+        :param _NodeRecovery self: this
+        :param batch_client: The batch client to use.
+        :type batch_client:
+            `azure.batch.batch_service_client.BatchServiceClient`
+        :param dict config: configuration dict
+        :param str pool_id: pool id
+        """
+        self._batch_client = batch_client
+        self._config = config
+        self._pool_id = pool_id
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=_MAX_EXECUTOR_WORKERS)
+        self._pending = {}
+        self._reboots = {}
+        self._removed = set()
+
+    def __enter__(self):
+        # type: (_NodeRecovery) -> _NodeRecovery
+        """Enter context
+        :param _NodeRecovery self: this
+        :rtype: _NodeRecovery
+        :return: this
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Exit context, abandoning any outstanding recovery actions on error
+        :param _NodeRecovery self: this
+        """
+        self._executor.shutdown(wait=exc_type is None)
+
+    @property
+    def pending(self):
+        # type: (_NodeRecovery) -> bool
+        """Check if any recovery actions are outstanding
+        :param _NodeRecovery self: this
+        :rtype: bool
+        :return: recovery actions are outstanding
+        """
+        return len(self._pending) > 0
+
+    def is_removed(self, node_id):
+        # type: (_NodeRecovery, str) -> bool
+        """Check if a node has been removed from the pool
+        :param _NodeRecovery self: this
+        :param str node_id: node id
+        :rtype: bool
+        :return: node has been removed
+        """
+        return node_id in self._removed
+
+    def in_recovery(self, node_id):
+        # type: (_NodeRecovery, str) -> bool
+        """Check if a node has an outstanding recovery action or has been
+        removed
+        :param _NodeRecovery self: this
+        :param str node_id: node id
+        :rtype: bool
+        :return: node is in recovery
+        """
+        return node_id in self._pending or node_id in self._removed
+
+    def _reboot(self, node_id, retrieve_outputs):
+        # type: (_NodeRecovery, str, bool) -> None
+        """Retrieve diagnostic outputs and reboot a node, do not call
+        directly
+        :param _NodeRecovery self: this
+        :param str node_id: node id
+        :param bool retrieve_outputs: retrieve start task outputs
+        """
+        if retrieve_outputs:
+            _retrieve_outputs_from_failed_nodes(
+                self._batch_client, self._config, nodeid=node_id)
+        _reboot_node(self._batch_client, self._pool_id, node_id, True)
+
+    def reboot(self, node_id):
+        # type: (_NodeRecovery, str) -> bool
+        """Schedule a reboot of a start task failed node
+        :param _NodeRecovery self: this
+        :param str node_id: node id
+        :rtype: bool
+        :return: False if the node has exhausted its reboot budget
+        """
+        if self.in_recovery(node_id):
+            return True
+        first = node_id not in self._reboots
+        if first:
+            self._reboots[node_id] = 0
+            logger.error(
+                ('Detected start task failure, attempting to retrieve files '
+                 'for error diagnosis from node {}').format(node_id))
+        if self._reboots[node_id] > _MAX_REBOOT_RETRIES:
+            return False
+        self._reboots[node_id] += 1
+        self._pending[node_id] = (
+            'reboot', self._executor.submit(self._reboot, node_id, first))
+        return True
+
+    def _remove(self, node_ids):
+        # type: (_NodeRecovery, List[str]) -> None
+        """Remove nodes from the pool, retrying on conflicts, do not call
+        directly
+        :param _NodeRecovery self: this
+        :param list node_ids: node ids
+        """
+        attempts = 0
+        while True:
+            try:
+                logger.info('Deleting nodes {} from pool {}'.format(
+                    node_ids, self._pool_id))
+                self._batch_client.pool.remove_nodes(
+                    pool_id=self._pool_id,
+                    node_remove_parameter=batchmodels.NodeRemoveParameter(
+                        node_list=node_ids,
+                    )
+                )
+                return
+            except batchmodels.batch_error.BatchErrorException as ex:
+                attempts += 1
+                if attempts > _MAX_NODE_REMOVAL_RETRIES:
+                    raise
+                logger.warning(
+                    'could not delete nodes {} from pool {}: {}'.format(
+                        node_ids, self._pool_id, ex.message.value))
+                util.backoff_for_retry(attempts, response=ex.response)
+
+    def remove(self, node_ids):
+        # type: (_NodeRecovery, List[str]) -> None
+        """Schedule removal of unusable nodes from the pool
+        :param _NodeRecovery self: this
+        :param list node_ids: node ids
+        """
+        node_ids = [x for x in node_ids if not self.in_recovery(x)]
+        if len(node_ids) == 0:
+            return
+        logger.warning('Unusable nodes detected, deleting unusable nodes')
+        future = self._executor.submit(self._remove, node_ids)
+        for node_id in node_ids:
+            self._pending[node_id] = ('remove', future)
+
+    def collect(self):
+        # type: (_NodeRecovery) -> Tuple[List[str], bool]
+        """Collect results of completed recovery actions, raising any
+        errors encountered
+        :param _NodeRecovery self: this
+        :rtype: tuple
+        :return: (rebooted node ids, if any node was removed)
+        """
+        rebooted = []
+        removed = False
+        for node_id in list(self._pending.keys()):
+            action, future = self._pending[node_id]
+            if not future.done():
+                continue
+            self._pending.pop(node_id)
+            future.result()
+            if action == 'reboot':
+                rebooted.append(node_id)
+            else:
+                self._removed.add(node_id)
+                removed = True
+        return rebooted, removed
+
+
 def _block_for_nodes_ready(
         batch_client, config, stopping_states, end_states, pool_id,
         reboot_on_failed):
@@ -559,172 +831,193 @@ def _block_for_nodes_ready(
         'waiting for all nodes in pool {} to reach one of: {!r}'.format(
             pool_id, stopping_states))
     pool_settings = settings.pool_settings(config)
-    reboot_map = {}
     failed_node_list_count = 0
     unusable_delete = False
     last = time.time()
-    while True:
-        # refresh pool to ensure that there is no dedicated resize error
-        pool = batch_client.pool.get(pool_id)
-        total_nodes = (
-            pool.target_dedicated_nodes + pool.target_low_priority_nodes
-        )
-        if util.is_not_empty(pool.resize_errors):
-            fatal_resize_error = False
-            errors = []
-            for err in pool.resize_errors:
-                errors.append('{}: {}'.format(err.code, err.message))
-                if (err.code == 'AccountCoreQuotaReached' or
-                        (err.code == 'AccountLowPriorityCoreQuotaReached' and
-                         pool.target_dedicated_nodes == 0) or
-                        (err.code == 'AllocationTimedout' and
-                         pool.target_dedicated_nodes > 0) or
-                        (err.code == 'AllocationTimedout' and
-                         pool.allocation_state ==
-                         batchmodels.AllocationState.steady)):
-                    fatal_resize_error = True
-            if fatal_resize_error:
-                pool_stats(batch_client, config, pool_id=pool_id)
-                raise RuntimeError(
-                    'Fatal resize errors encountered for pool {}: {}'.format(
-                        pool.id, os.linesep.join(errors)))
-            else:
-                logger.error(
-                    'Resize errors encountered for pool {}: {}'.format(
-                        pool.id, os.linesep.join(errors)))
-        # check pool allocation state
-        try:
-            nodes = list(batch_client.compute_node.list(pool.id))
-            failed_node_list_count = 0
-        except ssl.SSLError:
-            # SSL error happens sometimes on paging... this is probably
-            # a bug in the underlying msrest/msrestazure library that
-            # is reusing the SSL connection improperly
-            nodes = []
-            failed_node_list_count += 1
-        # check if any nodes are in start task failed state
-        if (any(node.state == batchmodels.ComputeNodeState.start_task_failed
-                for node in nodes)):
-            # attempt reboot if enabled for potentially transient errors
-            if reboot_on_failed:
-                for node in nodes:
-                    if (node.state !=
-                            batchmodels.ComputeNodeState.start_task_failed):
-                        continue
-                    if node.id not in reboot_map:
-                        reboot_map[node.id] = 0
-                        logger.error(
-                            ('Detected start task failure, attempting to '
-                             'retrieve files for error diagnosis from '
-                             'node {}').format(node.id))
-                        _retrieve_outputs_from_failed_nodes(
-                            batch_client, config, nodeid=node.id)
-                    if reboot_map[node.id] > _MAX_REBOOT_RETRIES:
+    node_map = {}
+    polls = 0
+    full_refresh = True
+    interval = _NODE_WATCH_MIN_INTERVAL
+    with _NodeRecovery(batch_client, config, pool_id) as recovery:
+        while True:
+            # refresh pool to ensure that there is no dedicated resize error
+            pool = batch_client.pool.get(
+                pool_id,
+                pool_get_options=batchmodels.PoolGetOptions(
+                    select=_POOL_WATCH_SELECT))
+            total_nodes = (
+                pool.target_dedicated_nodes + pool.target_low_priority_nodes
+            )
+            if util.is_not_empty(pool.resize_errors):
+                fatal_resize_error = False
+                errors = []
+                for err in pool.resize_errors:
+                    errors.append('{}: {}'.format(err.code, err.message))
+                    if (err.code == 'AccountCoreQuotaReached' or
+                            (err.code ==
+                             'AccountLowPriorityCoreQuotaReached' and
+                             pool.target_dedicated_nodes == 0) or
+                            (err.code == 'AllocationTimedout' and
+                             pool.target_dedicated_nodes > 0) or
+                            (err.code == 'AllocationTimedout' and
+                             pool.allocation_state ==
+                             batchmodels.AllocationState.steady)):
+                        fatal_resize_error = True
+                if fatal_resize_error:
+                    pool_stats(batch_client, config, pool_id=pool_id)
+                    raise RuntimeError(
+                        ('Fatal resize errors encountered for pool '
+                         '{}: {}').format(pool.id, os.linesep.join(errors)))
+                else:
+                    logger.error(
+                        'Resize errors encountered for pool {}: {}'.format(
+                            pool.id, os.linesep.join(errors)))
+            # collect completed recovery actions and refresh rebooted nodes
+            rebooted, removed = recovery.collect()
+            if removed:
+                unusable_delete = True
+            if len(rebooted) > 0:
+                node_map.update(
+                    _get_nodes_by_id(batch_client, pool.id, rebooted))
+            # refresh node states, periodically performing a full refresh to
+            # reconcile nodes which may have left stopping states
+            polls += 1
+            if polls % _NODE_WATCH_FULL_REFRESH_POLLS == 0:
+                full_refresh = True
+            prev_states = {
+                node_id: node.state for node_id, node in node_map.items()
+            }
+            try:
+                node_map = _refresh_node_state_map(
+                    batch_client, pool.id, node_map, stopping_states,
+                    full_refresh)
+                full_refresh = False
+                failed_node_list_count = 0
+            except ssl.SSLError:
+                # SSL error happens sometimes on paging... this is probably
+                # a bug in the underlying msrest/msrestazure library that
+                # is reusing the SSL connection improperly
+                failed_node_list_count += 1
+            # ignore nodes which have been removed but are still listed
+            node_map = {
+                node_id: node for node_id, node in node_map.items()
+                if not recovery.is_removed(node_id)
+            }
+            nodes = list(node_map.values())
+            changed = prev_states != {
+                node_id: node.state for node_id, node in node_map.items()
+            }
+            # check if any nodes are in start task failed state
+            failed = [
+                node.id for node in nodes
+                if node.state == batchmodels.ComputeNodeState.start_task_failed
+                and not recovery.in_recovery(node.id)
+            ]
+            if len(failed) > 0:
+                # attempt reboot if enabled for potentially transient errors
+                if reboot_on_failed:
+                    for node_id in failed:
+                        if recovery.reboot(node_id):
+                            continue
                         pool_stats(batch_client, config, pool_id=pool_id)
                         raise RuntimeError(
                             ('Ran out of reboot retries for recovery. '
                              'Please inspect both the node status above and '
-                             'files found within the {}/{}/startup directory '
-                             '(in the current working directory) if '
-                             'available. If this error appears '
+                             'files found within the {}/{}/startup '
+                             'directory (in the current working directory) '
+                             'if available. If this error appears '
                              'non-transient, please submit an issue on '
-                             'GitHub, if not you can delete these nodes with '
-                             '"pool nodes del --all-start-task-failed" first '
-                             'prior to the resize operation.').format(
-                                 pool.id, node.id))
-                    _reboot_node(batch_client, pool.id, node.id, True)
-                    reboot_map[node.id] += 1
-                # refresh node list to reflect rebooting states
-                try:
-                    nodes = list(batch_client.compute_node.list(pool.id))
-                    failed_node_list_count = 0
-                except ssl.SSLError:
-                    nodes = []
-                    failed_node_list_count += 1
-            else:
-                # fast path check for start task failures in non-reboot mode
-                logger.error(
-                    'Detected start task failure, attempting to retrieve '
-                    'files for error diagnosis from nodes')
-                _retrieve_outputs_from_failed_nodes(batch_client, config)
-                pool_stats(batch_client, config, pool_id=pool_id)
-                raise RuntimeError(
-                    ('Please inspect both the node status above and '
-                     'files found within the {}/<nodes>/startup directory '
-                     '(in the current working directory) if available. If '
-                     'this error appears non-transient, please submit an '
-                     'issue on GitHub, if not you can delete these nodes '
-                     'with "pool nodes del --all-start-task-failed" first '
-                     'prior to the resize operation.').format(pool.id))
-        # check if any nodes are in unusable state
-        elif (any(node.state == batchmodels.ComputeNodeState.unusable
-                  for node in nodes)):
-            pool_stats(batch_client, config, pool_id=pool_id)
-            if pool_settings.attempt_recovery_on_unusable:
-                logger.warning(
-                    'Unusable nodes detected, deleting unusable nodes')
-                del_nodes(
-                    batch_client, config, False, False, True, None,
-                    suppress_confirm=True)
-                unusable_delete = True
-            else:
-                raise RuntimeError(
-                    ('Unusable nodes detected in pool {}. You can delete '
-                     'unusable nodes with "pool nodes del --all-unusable" '
-                     'first prior to the resize operation.').format(
-                         pool.id))
-        # check for full allocation
-        if (len(nodes) == total_nodes and
-                all(node.state in stopping_states for node in nodes)):
-            if any(node.state not in end_states for node in nodes):
+                             'GitHub, if not you can delete these nodes '
+                             'with "pool nodes del --all-start-task-failed" '
+                             'first prior to the resize operation.').format(
+                                 pool.id, node_id))
+                else:
+                    # fast path check for start task failures in non-reboot
+                    # mode
+                    logger.error(
+                        'Detected start task failure, attempting to retrieve '
+                        'files for error diagnosis from nodes')
+                    _retrieve_outputs_from_failed_nodes(batch_client, config)
+                    pool_stats(batch_client, config, pool_id=pool_id)
+                    raise RuntimeError(
+                        ('Please inspect both the node status above and '
+                         'files found within the {}/<nodes>/startup '
+                         'directory (in the current working directory) if '
+                         'available. If this error appears non-transient, '
+                         'please submit an issue on GitHub, if not you can '
+                         'delete these nodes with "pool nodes del '
+                         '--all-start-task-failed" first prior to the resize '
+                         'operation.').format(pool.id))
+            # check if any nodes are in unusable state
+            unusable = [
+                node.id for node in nodes
+                if node.state == batchmodels.ComputeNodeState.unusable and
+                not recovery.in_recovery(node.id)
+            ]
+            if len(unusable) > 0:
                 pool_stats(batch_client, config, pool_id=pool_id)
-                raise RuntimeError(
-                    ('Node(s) of pool {} not in {} state. Please inspect the '
-                     'state of nodes in the pool above. If this appears to '
-                     'be a transient error, please retry pool creation or '
-                     'the resize operation. If any unusable nodes exist, you '
-                     'can delete them with "pool nodes del --all-unusable" '
-                     'first prior to the resize operation.').format(
-                         pool.id, end_states))
-            else:
-                return nodes
-        # issue resize if unusable deletion has occurred
-        if (unusable_delete and len(nodes) < total_nodes and
-                pool.allocation_state != batchmodels.AllocationState.resizing):
-            resize_pool(batch_client, config, wait=False)
-            unusable_delete = False
-        now = time.time()
-        if (now - last) > 20:
-            last = now
-            logger.debug(
-                ('waiting for {} dedicated nodes and {} low priority '
-                 'nodes of size {} to reach desired state in pool {} '
-                 '[resize_timeout={} allocation_state={} '
-                 'allocation_state_transition_time={}]').format(
-                     pool.target_dedicated_nodes,
-                     pool.target_low_priority_nodes,
-                     pool.vm_size,
-                     pool.id,
-                     pool.resize_timeout,
-                     pool.allocation_state.value,
-                     pool.allocation_state_transition_time))
-            if len(nodes) <= 3:
-                for node in nodes:
-                    logger.debug('{}: {}'.format(node.id, node.state.value))
+                if pool_settings.attempt_recovery_on_unusable:
+                    recovery.remove(unusable)
+                else:
+                    raise RuntimeError(
+                        ('Unusable nodes detected in pool {}. You can delete '
+                         'unusable nodes with "pool nodes del --all-unusable" '
+                         'first prior to the resize operation.').format(
+                             pool.id))
+            # check for full allocation
+            if (not recovery.pending and len(nodes) == total_nodes and
+                    all(node.state in stopping_states for node in nodes)):
+                if any(node.state not in end_states for node in nodes):
+                    pool_stats(batch_client, config, pool_id=pool_id)
+                    raise RuntimeError(
+                        ('Node(s) of pool {} not in {} state. Please inspect '
+                         'the state of nodes in the pool above. If this '
+                         'appears to be a transient error, please retry pool '
+                         'creation or the resize operation. If any unusable '
+                         'nodes exist, you can delete them with "pool nodes '
+                         'del --all-unusable" first prior to the resize '
+                         'operation.').format(
+                             pool.id, end_states))
+                else:
+                    # return full node information once ready
+                    return list(batch_client.compute_node.list(pool.id))
+            # issue resize if unusable deletion has occurred
+            if (unusable_delete and len(nodes) < total_nodes and
+                    pool.allocation_state !=
+                    batchmodels.AllocationState.resizing):
+                resize_pool(batch_client, config, wait=False)
+                unusable_delete = False
+            now = time.time()
+            if (now - last) > 20:
+                last = now
+                logger.debug(
+                    ('waiting for {} dedicated nodes and {} low priority '
+                     'nodes of size {} to reach desired state in pool {} '
+                     '[resize_timeout={} allocation_state={} '
+                     'allocation_state_transition_time={}]').format(
+                         pool.target_dedicated_nodes,
+                         pool.target_low_priority_nodes,
+                         pool.vm_size,
+                         pool.id,
+                         pool.resize_timeout,
+                         pool.allocation_state.value,
+                         pool.allocation_state_transition_time))
+                if len(nodes) <= 3:
+                    for node in nodes:
+                        logger.debug('{}: {}'.format(
+                            node.id, node.state.value))
+                else:
+                    logger.debug(_node_state_counts(nodes))
+                if failed_node_list_count > 0:
+                    logger.error(
+                        'could not get a valid node list for pool: {}'.format(
+                            pool.id))
+            # back off if no node has changed state since the last poll
+            if changed or recovery.pending:
+                interval = _NODE_WATCH_MIN_INTERVAL
             else:
-                logger.debug(_node_state_counts(nodes))
-            if failed_node_list_count > 0:
-                logger.error(
-                    'could not get a valid node list for pool: {}'.format(
-                        pool.id))
-        if len(nodes) < 10:
-            time.sleep(3)
-        elif len(nodes) < 50:
-            time.sleep(6)
-        elif len(nodes) < 100:
-            time.sleep(12)
-        else:
-            time.sleep(24)
+                interval = min((interval * 2, _NODE_WATCH_MAX_INTERVAL))
+            time.sleep(interval)
 
 
 def _node_state_counts(nodes):
@@ -1328,6 +1621,7 @@ def del_pool(batch_client, config, pool_id=None):
         return False
     logger.info('Deleting pool: {}'.format(pool_id))
     batch_client.pool.delete(pool_id)
+    invalidate_remote_login_settings_cache(config, pool_id)
     return True
 
 
@@ -1366,30 +1660,30 @@ def pool_stats(batch_client, config, pool_id=None):
         if key == 'running' or key == 'idle':
             runnable_nodes += value
         nsc.append('  * {}: {}'.format(key, value))
-    node_up_times = []
-    node_alloc_times = []
-    node_start_times = []
-    tasks_run = []
-    tasks_running = []
+    node_up_times = stats.StreamingStatistics()
+    node_alloc_times = stats.StreamingStatistics()
+    node_start_times = stats.StreamingStatistics()
+    tasks_run = stats.StreamingStatistics()
+    tasks_running = stats.StreamingStatistics()
     now = datetime.datetime.now(dateutil.tz.tzutc())
     for node in nodes:
         if node.last_boot_time is not None:
-            node_up_times.append((now - node.last_boot_time).total_seconds())
+            node_up_times.add((now - node.last_boot_time).total_seconds())
         if (node.start_task_info is not None and
                 node.start_task_info.end_time is not None):
-            node_alloc_times.append(
+            node_alloc_times.add(
                 (node.start_task_info.end_time -
                  node.allocation_time).total_seconds()
             )
-            node_start_times.append(
+            node_start_times.add(
                 (node.start_task_info.end_time -
                  node.last_boot_time).total_seconds()
             )
         if node.total_tasks_run is not None:
-            tasks_run.append(node.total_tasks_run)
+            tasks_run.add(node.total_tasks_run)
         if node.running_tasks_count is not None:
-            tasks_running.append(node.running_tasks_count)
-    total_running_tasks = sum(tasks_running)
+            tasks_running.add(node.running_tasks_count)
+    total_running_tasks = int(tasks_running.sum)
     runnable_task_slots = runnable_nodes * pool.max_tasks_per_node
     total_task_slots = (
         pool.current_dedicated_nodes + pool.current_low_priority_nodes
@@ -1403,6 +1697,29 @@ def pool_stats(batch_client, config, pool_id=None):
         if md.name == settings.get_metadata_version_name():
             version = md.value
             break
+    if settings.raw(config):
+        util.print_raw_json({
+            'pool_id': pool_id,
+            'batch_shipyard_version': version,
+            'nodes': {
+                'dedicated': pool.current_dedicated_nodes,
+                'target_dedicated': pool.target_dedicated_nodes,
+                'low_priority': pool.current_low_priority_nodes,
+                'target_low_priority': pool.target_low_priority_nodes,
+                'states': _node_state_counts(nodes)._asdict(),
+            },
+            'node_up_times': node_up_times.to_dict(),
+            'node_alloc_times': node_alloc_times.to_dict(),
+            'node_start_times': node_start_times.to_dict(),
+            'tasks_running': tasks_running.to_dict(),
+            'tasks_run': tasks_run.to_dict(),
+            'task_slots': {
+                'busy': total_running_tasks,
+                'runnable': runnable_task_slots,
+                'total': total_task_slots,
+            },
+        })
+        return
     log = [
         '* Batch Shipyard version: {}'.format(version),
         '* Total nodes: {}'.format(
@@ -1425,64 +1742,19 @@ def pool_stats(batch_client, config, pool_id=None):
         '* Node states:',
         os.linesep.join(nsc),
     ]
-    if len(node_up_times) > 0:
-        log.extend([
-            '* Node uptime:',
-            '  * Mean: {}'.format(
-                datetime.timedelta(
-                    seconds=(sum(node_up_times) / len(node_up_times)))
-            ),
-            '  * Min: {}'.format(
-                datetime.timedelta(seconds=min(node_up_times))
-            ),
-            '  * Max: {}'.format(
-                datetime.timedelta(seconds=max(node_up_times))
-            ),
-        ])
-    if len(node_alloc_times) > 0:
-        log.extend([
-            '* Time taken for node creation to ready:',
-            '  * Mean: {}'.format(
-                datetime.timedelta(
-                    seconds=(sum(node_alloc_times) / len(node_alloc_times)))
-            ),
-            '  * Min: {}'.format(
-                datetime.timedelta(seconds=min(node_alloc_times))
-            ),
-            '  * Max: {}'.format(
-                datetime.timedelta(seconds=max(node_alloc_times))
-            ),
-        ])
-    if len(node_start_times) > 0:
-        log.extend([
-            '* Time taken for last boot startup (includes prep):',
-            '  * Mean: {}'.format(
-                datetime.timedelta(
-                    seconds=(sum(node_start_times) / len(node_start_times)))
-            ),
-            '  * Min: {}'.format(
-                datetime.timedelta(seconds=min(node_start_times))
-            ),
-            '  * Max: {}'.format(
-                datetime.timedelta(seconds=max(node_start_times))
-            ),
-        ])
-    if len(tasks_running) > 0:
-        log.extend([
-            '* Running tasks:',
-            '  * Sum: {}'.format(total_running_tasks),
-            '  * Mean: {}'.format(total_running_tasks / len(tasks_running)),
-            '  * Min: {}'.format(min(tasks_running)),
-            '  * Max: {}'.format(max(tasks_running)),
-        ])
-    if len(tasks_run) > 0:
-        log.extend([
-            '* Total tasks run:',
-            '  * Sum: {}'.format(sum(tasks_run)),
-            '  * Mean: {}'.format(sum(tasks_run) / len(tasks_run)),
-            '  * Min: {}'.format(min(tasks_run)),
-            '  * Max: {}'.format(max(tasks_run)),
-        ])
+    if node_up_times.count > 0:
+        log.extend(stats.format_timings('Node uptime', node_up_times))
+    if node_alloc_times.count > 0:
+        log.extend(stats.format_timings(
+            'Time taken for node creation to ready', node_alloc_times))
+    if node_start_times.count > 0:
+        log.extend(stats.format_timings(
+            'Time taken for last boot startup (includes prep)',
+            node_start_times))
+    if tasks_running.count > 0:
+        log.extend(stats.format_counts('Running tasks', tasks_running))
+    if tasks_run.count > 0:
+        log.extend(stats.format_counts('Total tasks run', tasks_run))
     log.extend([
         '* Task scheduling slots:',
         '  * Busy: {0} ({1:.2f}% of runnable)'.format(
@@ -1841,6 +2113,38 @@ def update_job_with_pool(
             text, job_id, poolid))
 
 
+def _get_job_statistics(batch_client, job):
+    # type: (azure.batch.batch_service_client.BatchServiceClient,
+    #        batchmodels.CloudJob) ->
+    #        Tuple[batchmodels.TaskCounts, stats.StreamingStatistics,
+    #              stats.StreamingStatistics]
+    """Get task counts and task timing statistics for a job
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param batchmodels.CloudJob job: job
+    :rtype: tuple
+    :return: (task counts, task times, task wall times)
+    """
+    tc = batch_client.job.get_task_counts(job_id=job.id)
+    task_times = stats.StreamingStatistics()
+    task_wall_times = stats.StreamingStatistics()
+    tasks = batch_client.task.list(
+        job_id=job.id,
+        task_list_options=batchmodels.TaskListOptions(
+            filter='(state eq \'running\') or (state eq \'completed\')',
+            select='id,state,stats,executionInfo',
+        ))
+    for task in tasks:
+        if task.stats is not None:
+            task_wall_times.add(task.stats.wall_clock_time.total_seconds())
+        if (task.execution_info is not None and
+                task.execution_info.end_time is not None):
+            task_times.add(
+                (task.execution_info.end_time -
+                 task.execution_info.start_time).total_seconds())
+    return tc, task_times, task_wall_times
+
+
 def job_stats(batch_client, config, jobid=None):
     # type: (azure.batch.batch_service_client.BatchServiceClient, dict,
     #        str) -> None
@@ -1863,45 +2167,56 @@ def job_stats(batch_client, config, jobid=None):
     else:
         jobs = list(batch_client.job.list(
             job_list_options=batchmodels.JobListOptions(expand='stats')))
-    job_count = 0
-    job_times = []
-    task_times = []
-    task_wall_times = []
+    job_count = len(jobs)
+    job_times = stats.StreamingStatistics()
+    task_times = stats.StreamingStatistics()
+    task_wall_times = stats.StreamingStatistics()
     task_counts = batchmodels.TaskCounts(0, 0, 0, 0, 0, 'validated')
     total_tasks = 0
     for job in jobs:
-        job_count += 1
-        # get task counts
-        tc = batch_client.job.get_task_counts(job_id=job.id)
-        task_counts.active += tc.active
-        task_counts.running += tc.running
-        task_counts.completed += tc.completed
-        task_counts.succeeded += tc.succeeded
-        task_counts.failed += tc.failed
-        total_tasks += tc.active + tc.running + tc.completed
-        if (tc.validation_status !=
-                batchmodels.TaskCountValidationStatus.validated):
-            task_counts.validation_status = tc.validation_status
         if job.execution_info.end_time is not None:
-            job_times.append(
+            job_times.add(
                 (job.execution_info.end_time -
                  job.execution_info.start_time).total_seconds())
-        # get task-level execution info
-        tasks = batch_client.task.list(
-            job_id=job.id,
-            task_list_options=batchmodels.TaskListOptions(
-                filter='(state eq \'running\') or (state eq \'completed\')',
-                select='id,state,stats,executionInfo',
-            ))
-        for task in tasks:
-            if task.stats is not None:
-                task_wall_times.append(
-                    task.stats.wall_clock_time.total_seconds())
-            if (task.execution_info is not None and
-                    task.execution_info.end_time is not None):
-                task_times.append(
-                    (task.execution_info.end_time -
-                     task.execution_info.start_time).total_seconds())
+    # fetch task counts and task-level execution info for each job
+    # concurrently and merge per-job statistics as they complete
+    if job_count > 0:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=_max_workers(jobs)) as executor:
+            futures = [
+                executor.submit(_get_job_statistics, batch_client, job)
+                for job in jobs
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                tc, jtt, jtwt = future.result()
+                task_counts.active += tc.active
+                task_counts.running += tc.running
+                task_counts.completed += tc.completed
+                task_counts.succeeded += tc.succeeded
+                task_counts.failed += tc.failed
+                total_tasks += tc.active + tc.running + tc.completed
+                if (tc.validation_status !=
+                        batchmodels.TaskCountValidationStatus.validated):
+                    task_counts.validation_status = tc.validation_status
+                task_times.merge(jtt)
+                task_wall_times.merge(jtwt)
+    if settings.raw(config):
+        util.print_raw_json({
+            'jobs': job_count,
+            'task_counts': {
+                'total': total_tasks,
+                'active': task_counts.active,
+                'running': task_counts.running,
+                'completed': task_counts.completed,
+                'succeeded': task_counts.succeeded,
+                'failed': task_counts.failed,
+                'validation_status': str(task_counts.validation_status),
+            },
+            'job_times': job_times.to_dict(),
+            'task_times': task_times.to_dict(),
+            'task_wall_times': task_wall_times.to_dict(),
+        })
+        return
     log = [
         '* Total jobs: {}'.format(job_count),
         '* Total tasks: {} ({})'.format(
@@ -1930,46 +2245,16 @@ def job_stats(batch_client, config, jobid=None):
             if task_counts.completed > 0 else 0
         ),
     ]
-    if len(job_times) > 0:
-        log.extend([
-            '* Job creation to completion time:',
-            '  * Mean: {}'.format(
-                datetime.timedelta(seconds=(sum(job_times) / len(job_times)))
-            ),
-            '  * Min: {}'.format(
-                datetime.timedelta(seconds=min(job_times))
-            ),
-            '  * Max: {}'.format(
-                datetime.timedelta(seconds=max(job_times))
-            ),
-        ])
-    if len(task_times) > 0:
-        log.extend([
-            '* Task end-to-end time (completed):',
-            '  * Mean: {}'.format(
-                datetime.timedelta(seconds=(sum(task_times) / len(task_times)))
-            ),
-            '  * Min: {}'.format(
-                datetime.timedelta(seconds=min(task_times))
-            ),
-            '  * Max: {}'.format(
-                datetime.timedelta(seconds=max(task_times))
-            ),
-        ])
-    if len(task_wall_times) > 0:
-        log.extend([
-            '* Task command walltime (running and completed):',
-            '  * Mean: {}'.format(
-                datetime.timedelta(
-                    seconds=(sum(task_wall_times) / len(task_wall_times)))
-            ),
-            '  * Min: {}'.format(
-                datetime.timedelta(seconds=min(task_wall_times))
-            ),
-            '  * Max: {}'.format(
-                datetime.timedelta(seconds=max(task_wall_times))
-            ),
-        ])
+    if job_times.count > 0:
+        log.extend(stats.format_timings(
+            'Job creation to completion time', job_times))
+    if task_times.count > 0:
+        log.extend(stats.format_timings(
+            'Task end-to-end time (completed)', task_times))
+    if task_wall_times.count > 0:
+        log.extend(stats.format_timings(
+            'Task command walltime (running and completed)',
+            task_wall_times))
     logger.info('statistics summary for {}{}{}'.format(
         'job {}'.format(jobid) if jobid is not None else 'all jobs',
         os.linesep, os.linesep.join(log)))
@@ -2120,10 +2405,60 @@ def _wait_for_task_deletion(batch_client, job_id, task):
             raise
 
 
+def _wait_for_task_counts(batch_client, job_id, deleted):
+    # type: (azure.batch.batch_service_client.BatchServiceClient,
+    #        str, bool) -> None
+    """Wait for all tasks in a job to complete or be deleted as confirmed
+    by aggregate task counts
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param str job_id: job id
+    :param bool deleted: wait for tasks to be deleted
+    """
+    interval = _BULK_TASK_WAIT_MIN_INTERVAL
+    while True:
+        try:
+            tc = batch_client.job.get_task_counts(job_id=job_id)
+        except batchmodels.batch_error.BatchErrorException as ex:
+            if 'The specified job does not exist' in ex.message.value:
+                return
+            raise
+        pending = tc.active + tc.running
+        if deleted:
+            pending += tc.completed
+        if pending == 0:
+            break
+        logger.debug('waiting for {} tasks in job {} to {}'.format(
+            pending, job_id, 'delete' if deleted else 'terminate'))
+        time.sleep(interval)
+        interval = min((interval * 2, _BULK_TASK_WAIT_MAX_INTERVAL))
+    logger.info('all tasks in job {} {}'.format(
+        job_id, 'deleted' if deleted else 'completed'))
+
+
+def _delete_task(batch_client, job_id, task):
+    # type: (azure.batch.batch_service_client.BatchServiceClient,
+    #        str, str) -> None
+    """Delete a task, ignoring tasks which no longer exist
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param str job_id: job id of task to delete
+    :param str task: task id to delete
+    """
+    logger.debug('deleting task {} in job {}'.format(task, job_id))
+    try:
+        batch_client.task.delete(job_id, task)
+    except batchmodels.batch_error.BatchErrorException as ex:
+        if 'The specified task does not exist' not in ex.message.value:
+            raise
+
+
 def del_tasks(batch_client, config, jobid=None, taskid=None, wait=False):
     # type: (azure.batch.batch_service_client.BatchServiceClient, dict,
     #        str, str, bool) -> None
-    """Delete tasks
+    """Delete tasks. If no task id is specified, all tasks in each job are
+    listed once and deleted with a bounded worker pool after a single
+    confirmation per job.
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param dict config: configuration dict
@@ -2140,11 +2475,13 @@ def del_tasks(batch_client, config, jobid=None, taskid=None, wait=False):
         jobs = settings.job_specifications(config)
     else:
         jobs = [{'id': jobid}]
-    nocheck = {}
+    deleted = []
     for job in jobs:
         job_id = settings.job_id(job)
-        nocheck[job_id] = set()
         if taskid is None:
+            if not util.confirm_action(
+                    config, 'delete all tasks in job {}'.format(job_id)):
+                continue
             tasks = [
                 x.id for x in batch_client.task.list(
                     job_id,
@@ -2152,47 +2489,29 @@ def del_tasks(batch_client, config, jobid=None, taskid=None, wait=False):
                 )
             ]
         else:
-            tasks = [taskid]
-        tasks_to_delete = []
-        for task in tasks:
             if not util.confirm_action(
                     config, 'delete {} task in job {}'.format(
-                        task, job_id)):
-                nocheck[job_id].add(task)
+                        taskid, job_id)):
                 continue
-            tasks_to_delete.append(task)
-        if len(tasks_to_delete) == 0:
+            tasks = [taskid]
+        deleted.append(job_id)
+        if len(tasks) == 0:
             continue
+        logger.info('Deleting {} tasks in job {}'.format(len(tasks), job_id))
         with concurrent.futures.ThreadPoolExecutor(
-                max_workers=_max_workers(tasks_to_delete)) as executor:
-            for task in tasks_to_delete:
-                logger.info('Deleting task: {}'.format(task))
-                executor.submit(batch_client.task.delete, job_id, task)
+                max_workers=_max_workers(tasks)) as executor:
+            futures = [
+                executor.submit(_delete_task, batch_client, job_id, task)
+                for task in tasks
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
     if wait:
-        for job in jobs:
-            job_id = settings.job_id(job)
+        for job_id in deleted:
             if taskid is None:
-                tasks = [
-                    x.id for x in batch_client.task.list(
-                        job_id,
-                        task_list_options=batchmodels.TaskListOptions(
-                            select='id')
-                    )
-                ]
+                _wait_for_task_counts(batch_client, job_id, True)
             else:
-                tasks = [taskid]
-            if len(tasks) == 0:
-                continue
-            with concurrent.futures.ThreadPoolExecutor(
-                    max_workers=_max_workers(tasks)) as executor:
-                for task in tasks:
-                    try:
-                        if task in nocheck[job_id]:
-                            continue
-                    except KeyError:
-                        pass
-                executor.submit(
-                    _wait_for_task_deletion, batch_client, job_id, task)
+                _wait_for_task_deletion(batch_client, job_id, taskid)
 
 
 def clean_mi_jobs(batch_client, config):
@@ -2293,7 +2612,7 @@ def delete_or_terminate_jobs(
         batch_client, config, delete, jobid=None, jobscheduleid=None,
         termtasks=False, wait=False):
     # type: (azure.batch.batch_service_client.BatchServiceClient, dict,
-    #        bool, str, str, bool, bool) -> None
+    #        bool, str, str, bool, bool) -> List[str]
     """Delete or terminate jobs
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
@@ -2303,6 +2622,8 @@ def delete_or_terminate_jobs(
     :param str jobscheduleid: job schedule id to terminate
     :param bool termtasks: terminate tasks manually prior
     :param bool wait: wait for job to terminate
+    :rtype: list
+    :return: ids of jobs acted upon
     """
     if delete:
         action = 'delete'
@@ -2387,12 +2708,16 @@ def delete_or_terminate_jobs(
                             text, job_id))
                 else:
                     raise
+    return [
+        settings.job_id(job) for job in jobs
+        if settings.job_id(job) not in nocheck
+    ]
 
 
 def delete_or_terminate_all_jobs(
         batch_client, config, delete, termtasks=False, wait=False):
     # type: (azure.batch.batch_service_client.BatchServiceClient, dict,
-    #        bool, bool, bool) -> None
+    #        bool, bool, bool) -> List[str]
     """Delete or terminate all jobs
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
@@ -2400,6 +2725,8 @@ def delete_or_terminate_all_jobs(
     :param bool delete: delete instead of terminate
     :param bool termtasks: terminate tasks prior
     :param bool wait: wait for jobs to terminate
+    :rtype: list
+    :return: ids of jobs acted upon
     """
     if delete:
         action = 'delete'
@@ -2444,6 +2771,7 @@ def delete_or_terminate_all_jobs(
             except batchmodels.batch_error.BatchErrorException as ex:
                 if 'The specified job does not exist' not in ex.message.value:
                     raise
+    return list(check)
 
 
 def delete_or_terminate_all_job_schedules(
@@ -2503,40 +2831,18 @@ def delete_or_terminate_all_job_schedules(
                     raise
 
 
-def _send_docker_kill_signal(
-        batch_client, config, username, ssh_private_key, pool_id, node_id,
-        job_id, task_id, task_is_mi):
-    # type: (azure.batch.batch_service_client.BatchServiceClient, dict, str,
-    #        pathlib.Path, str, str, str, str, bool) -> None
-    """Send docker kill signal via SSH
-    :param batch_client: The batch client to use.
-    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+def _get_task_container_name(config, job_id, task_id, task_is_mi):
+    # type: (dict, str, str, bool) -> str
+    """Get the Docker container name of a task
     :param dict config: configuration dict
-    :param str username: SSH username
-    :param pathlib.Path ssh_private_key: SSH private key
-    :param str pool_id: pool_id of node
-    :param str node_id: node_id of node
-    :param str job_id: job id of task id to kill
-    :param str task_id: task id to kill
+    :param str job_id: job id of task
+    :param str task_id: task id
     :param bool task_is_mi: task is multi-instance
+    :rtype: str
+    :return: container name
     """
-    if util.is_none_or_empty(username):
-        raise ValueError(
-            'cannot terminate non-native Docker container without an SSH '
-            'username')
-    if not ssh_private_key.exists():
-        raise RuntimeError(
-            ('cannot terminate non-native Docker container with a '
-             'non-existent SSH private key: {}').format(
-                 ssh_private_key))
-    targets = [(pool_id, node_id)]
     task_name = None
-    # if this task is multi-instance, get all subtasks
     if task_is_mi:
-        subtasks = batch_client.task.list_subtasks(job_id, task_id)
-        for subtask in subtasks.value:
-            targets.append(
-                (subtask.node_info.pool_id, subtask.node_info.node_id))
         # fetch container name
         try:
             jobs = settings.job_specifications(config)
@@ -2551,69 +2857,80 @@ def _send_docker_kill_signal(
     # TODO get task names for non-mi tasks?
     if task_name is None:
         task_name = '{}-{}'.format(job_id, task_id)
-    # for each task node target, issue docker kill
-    for target in targets:
-        rls = batch_client.compute_node.get_remote_login_settings(
-            target[0], target[1])
-        command = [
-            'sudo',
-            ('/bin/bash -c "docker kill {tn}; docker ps -qa -f name={tn} | '
-             'xargs --no-run-if-empty docker rm -v"').format(tn=task_name),
-        ]
-        rc = crypto.connect_or_exec_ssh_command(
-            rls.remote_login_ip_address, rls.remote_login_port,
-            ssh_private_key, username, sync=True, tty=True, command=command)
-        if rc != 0:
-            logger.error('docker kill failed with return code: {}'.format(rc))
+    return task_name
 
 
-def _terminate_task(
-        batch_client, config, ssh_username, ssh_private_key, native, force,
-        job_id, task, nocheck):
-    # type: (azure.batch.batch_service_client.BatchServiceClient, dict,
-    #        str, str, bool, bool, str, str, dict) -> None
-    """Terminate a task, do not call directly
+def _send_docker_kill_signal(
+        username, ssh_private_key, node_id, rls, task_names):
+    # type: (str, pathlib.Path, str,
+    #        batchmodels.ComputeNodeGetRemoteLoginSettingsResult,
+    #        Set[str]) -> None
+    """Send docker kill signal for containers on a node in one SSH session
+    :param str username: SSH username
+    :param pathlib.Path ssh_private_key: SSH private key
+    :param str node_id: node_id of node
+    :param batchmodels.ComputeNodeGetRemoteLoginSettingsResult rls:
+        remote login settings of node
+    :param set task_names: container names to kill
+    """
+    task_names = sorted(task_names)
+    command = [
+        'sudo',
+        ('/bin/bash -c "docker kill {tn}; docker ps -qa {filters} | '
+         'xargs --no-run-if-empty docker rm -v"').format(
+             tn=' '.join(task_names),
+             filters=' '.join('-f name={}'.format(x) for x in task_names)),
+    ]
+    rc = crypto.connect_or_exec_ssh_command(
+        rls.remote_login_ip_address, rls.remote_login_port,
+        ssh_private_key, username, sync=True, tty=True, command=command)
+    if rc != 0:
+        logger.error(
+            'docker kill on node {} failed with return code: {}'.format(
+                node_id, rc))
+
+
+def _get_docker_kill_targets(batch_client, config, job_id, tasks):
+    # type: (azure.batch.batch_service_client.BatchServiceClient, dict, str,
+    #        List[batchmodels.CloudTask]) -> Dict[Tuple[str, str], Set[str]]
+    """Group container names of Docker tasks by the nodes they run on
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param dict config: configuration dict
-    :param str ssh_username: ssh username
-    :param str ssh_private_key: ssh private key
-    :param bool native: native mode
-    :param bool force: force task docker kill signal regardless of state
-    :param str jobid: job id of task to terminate
-    :param str task: task id to terminate
-    :param dict nocheck: nocheck dict
+    :param str job_id: job id of tasks
+    :param list tasks: list of tasks
+    :rtype: dict
+    :return: map of (pool id, node id) -> set of container names
     """
-    _task = batch_client.task.get(job_id, task)
-    # if completed, skip
-    if (_task.state == batchmodels.TaskState.completed and
-            (not force or native)):
-        logger.debug(
-            'Skipping termination of completed task {} on '
-            'job {}'.format(task, job_id))
-        nocheck[job_id].add(task)
-        return
-    logger.info('Terminating task: {}'.format(task))
-    # directly send docker kill signal if running
-    if (not native and
-            (_task.state == batchmodels.TaskState.running or force)):
-        # check if task is a docker task
-        if ('docker run' in _task.command_line or
-                'docker exec' in _task.command_line):
-            if (_task.multi_instance_settings is not None and
-                    _task.multi_instance_settings.
-                    number_of_instances > 1):
-                task_is_mi = True
-            else:
-                task_is_mi = False
-            _send_docker_kill_signal(
-                batch_client, config, ssh_username,
-                ssh_private_key, _task.node_info.pool_id,
-                _task.node_info.node_id, job_id, task, task_is_mi)
-        else:
-            batch_client.task.terminate(job_id, task)
-    else:
-        batch_client.task.terminate(job_id, task)
+    targets = collections.defaultdict(set)
+    mi_tasks = []
+    for task in tasks:
+        if (task.multi_instance_settings is not None and
+                task.multi_instance_settings.number_of_instances > 1):
+            mi_tasks.append(task)
+            continue
+        targets[(task.node_info.pool_id, task.node_info.node_id)].add(
+            _get_task_container_name(config, job_id, task.id, False))
+    if len(mi_tasks) == 0:
+        return targets
+    # if a task is multi-instance, get all subtasks
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_max_workers(mi_tasks)) as executor:
+        futures = {
+            executor.submit(
+                batch_client.task.list_subtasks, job_id, task.id): task
+            for task in mi_tasks
+        }
+        for future in concurrent.futures.as_completed(futures):
+            task = futures[future]
+            task_name = _get_task_container_name(
+                config, job_id, task.id, True)
+            targets[(task.node_info.pool_id, task.node_info.node_id)].add(
+                task_name)
+            for subtask in future.result().value:
+                targets[(subtask.node_info.pool_id,
+                         subtask.node_info.node_id)].add(task_name)
+    return targets
 
 
 def _wait_for_task_completion(batch_client, job_id, task):
@@ -2646,7 +2963,10 @@ def terminate_tasks(
         force=False):
     # type: (azure.batch.batch_service_client.BatchServiceClient, dict,
     #        str, str, bool, bool) -> None
-    """Terminate tasks
+    """Terminate tasks. If no task id is specified, only tasks which have
+    not completed are listed in each job and terminated with a bounded
+    worker pool after a single confirmation per job. Docker kill signals
+    for non-native pools are grouped into one SSH session per node.
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param dict config: configuration dict
@@ -2655,11 +2975,14 @@ def terminate_tasks(
     :param bool wait: wait for task to terminate
     :param bool force: force task docker kill signal regardless of state
     """
-    pool = None
     native = settings.is_native_docker_pool(config)
     # get ssh login settings for non-native pools
-    if not native:
+    if native:
+        select = 'id,state'
+    else:
+        select = 'id,state,commandLine,nodeInfo,multiInstanceSettings'
         pool = settings.pool_settings(config)
+        ssh_username = pool.ssh.username
         ssh_private_key = pool.ssh.ssh_private_key
         if ssh_private_key is None:
             ssh_private_key = pathlib.Path(
@@ -2669,61 +2992,102 @@ def terminate_tasks(
         jobs = settings.job_specifications(config)
     else:
         jobs = [{'id': jobid}]
-    nocheck = {}
+    terminated = []
     for job in jobs:
         job_id = settings.job_id(job)
-        nocheck[job_id] = set()
         if taskid is None:
-            tasks = [
-                x.id for x in batch_client.task.list(
-                    job_id,
-                    task_list_options=batchmodels.TaskListOptions(select='id')
+            if not util.confirm_action(
+                    config, 'terminate all tasks in job {}'.format(job_id)):
+                continue
+            # completed tasks are only targeted for forced docker kills
+            tasks = list(batch_client.task.list(
+                job_id,
+                task_list_options=batchmodels.TaskListOptions(
+                    filter=(
+                        'state ne \'completed\''
+                        if not force or native else None
+                    ),
+                    select=select,
                 )
-            ]
+            ))
         else:
-            tasks = [taskid]
-        tasks_to_term = []
-        for task in tasks:
             if not util.confirm_action(
                     config, 'terminate {} task in job {}'.format(
-                        task, job_id)):
-                nocheck[job_id].add(task)
+                        taskid, job_id)):
                 continue
-            tasks_to_term.append(task)
-        if len(tasks_to_term) == 0:
+            tasks = [batch_client.task.get(
+                job_id, taskid,
+                task_get_options=batchmodels.TaskGetOptions(select=select)
+            )]
+        terminated.append(job_id)
+        tasks_to_term = []
+        tasks_to_kill = []
+        for task in tasks:
+            # if completed, skip
+            if (task.state == batchmodels.TaskState.completed and
+                    (not force or native)):
+                logger.debug(
+                    'Skipping termination of completed task {} on '
+                    'job {}'.format(task.id, job_id))
+                continue
+            # directly send docker kill signal if running
+            if (not native and task.node_info is not None and
+                    (task.state == batchmodels.TaskState.running or
+                     force) and
+                    ('docker run' in task.command_line or
+                     'docker exec' in task.command_line)):
+                tasks_to_kill.append(task)
+            else:
+                tasks_to_term.append(task.id)
+        if len(tasks_to_kill) > 0:
+            if util.is_none_or_empty(ssh_username):
+                raise ValueError(
+                    'cannot terminate non-native Docker container without '
+                    'an SSH username')
+            if not ssh_private_key.exists():
+                raise RuntimeError(
+                    ('cannot terminate non-native Docker container with a '
+                     'non-existent SSH private key: {}').format(
+                         ssh_private_key))
+            targets = _get_docker_kill_targets(
+                batch_client, config, job_id, tasks_to_kill)
+            # retrieve remote login settings of target nodes per pool
+            pool_nodes = collections.defaultdict(list)
+            for target in targets:
+                pool_nodes[target[0]].append(target[1])
+            rls = {
+                pool_id: get_cached_remote_login_settings(
+                    batch_client, config, node_ids=pool_nodes[pool_id],
+                    pool_id=pool_id)
+                for pool_id in pool_nodes
+            }
+        else:
+            targets = {}
+        if len(tasks_to_term) + len(targets) == 0:
             continue
+        logger.info('Terminating {} tasks in job {}'.format(
+            len(tasks_to_term) + len(tasks_to_kill), job_id))
         with concurrent.futures.ThreadPoolExecutor(
-                max_workers=_max_workers(tasks_to_term)) as executor:
-            for task in tasks_to_term:
+                max_workers=_MAX_EXECUTOR_WORKERS) as executor:
+            futures = [
+                executor.submit(
+                    batch_client.task.terminate, job_id, task)
+                for task in tasks_to_term
+            ]
+            futures.extend(
                 executor.submit(
-                    _terminate_task, batch_client, config, pool.ssh.username,
-                    ssh_private_key, native, force, job_id, task, nocheck)
+                    _send_docker_kill_signal, ssh_username, ssh_private_key,
+                    target[1], rls[target[0]][target[1]], targets[target])
+                for target in targets
+            )
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
     if wait:
-        for job in jobs:
-            job_id = settings.job_id(job)
+        for job_id in terminated:
             if taskid is None:
-                tasks = [
-                    x.id for x in batch_client.task.list(
-                        job_id,
-                        task_list_options=batchmodels.TaskListOptions(
-                            select='id'
-                        )
-                    )
-                ]
+                _wait_for_task_counts(batch_client, job_id, False)
             else:
-                tasks = [taskid]
-            if len(tasks) == 0:
-                continue
-            with concurrent.futures.ThreadPoolExecutor(
-                    max_workers=_max_workers(tasks)) as executor:
-                for task in tasks:
-                    try:
-                        if task in nocheck[job_id]:
-                            continue
-                    except KeyError:
-                        pass
-                    executor.submit(
-                        _wait_for_task_completion, batch_client, job_id, task)
+                _wait_for_task_completion(batch_client, job_id, taskid)
 
 
 def list_nodes(batch_client, config, pool_id=None, nodes=None):
@@ -2815,10 +3179,129 @@ def list_nodes(batch_client, config, pool_id=None, nodes=None):
         logger.info(os.linesep.join(log))
 
 
+def _get_remote_login_settings_cache_path(config, pool_id):
+    # type: (dict, str) -> pathlib.Path
+    """Get path to the local remote login settings cache of a pool
+    :param dict config: configuration dict
+    :param str pool_id: pool id
+    :rtype: pathlib.Path
+    :return: path to remote login settings cache
+    """
+    pool = settings.pool_settings(config)
+    return pathlib.Path(
+        pool.ssh.generated_file_export_path,
+        _REMOTE_LOGIN_CACHE_FILE.format(pool_id))
+
+
+def invalidate_remote_login_settings_cache(config, pool_id=None):
+    # type: (dict, str) -> None
+    """Invalidate the local remote login settings cache of a pool
+    :param dict config: configuration dict
+    :param str pool_id: pool id
+    """
+    if util.is_none_or_empty(pool_id):
+        pool_id = settings.pool_id(config)
+    path = _get_remote_login_settings_cache_path(config, pool_id)
+    if path.exists():
+        logger.debug(
+            'invalidating remote login settings cache {}'.format(path))
+        path.unlink()
+
+
+def get_cached_remote_login_settings(
+        batch_client, config, node_ids=None, pool_id=None):
+    # type: (batch.BatchServiceClient, dict, List[str], str) -> dict
+    """Get remote login settings from a local per-pool cache. Nodes are
+    listed once to validate cached entries: an entry is discarded if the
+    node has left the pool, rebooted or is in a transitional state. A
+    single node is retrieved directly instead of listing the pool. Missing
+    entries are retrieved in parallel.
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param dict config: configuration dict
+    :param list node_ids: list of node ids to restrict to
+    :param str pool_id: pool id, defaults to the configured pool
+    :rtype: dict
+    :return: dict of node id -> remote login settings
+    """
+    if util.is_none_or_empty(pool_id):
+        pool_id = settings.pool_id(config)
+    if node_ids is not None:
+        node_ids = frozenset(node_ids)
+    single = node_ids is not None and len(node_ids) == 1
+    if single:
+        nodes = [batch_client.compute_node.get(
+            pool_id, next(iter(node_ids)),
+            compute_node_get_options=batchmodels.ComputeNodeGetOptions(
+                select='id,state,lastBootTime')
+        )]
+    else:
+        nodes = list(batch_client.compute_node.list(
+            pool_id,
+            compute_node_list_options=batchmodels.ComputeNodeListOptions(
+                select='id,state,lastBootTime')
+        ))
+    path = _get_remote_login_settings_cache_path(config, pool_id)
+    cache = util.load_json_file(path)
+    # prune entries of nodes which have left the pool, a single node
+    # retrieval only validates the entry of that node
+    if single:
+        entries = {
+            key: cache[key] for key in cache if key != nodes[0].id
+        }
+    else:
+        entries = {}
+    for node in nodes:
+        if (node.id in cache and
+                node.state not in _REMOTE_LOGIN_CACHE_INVALID_STATES and
+                cache[node.id]['last_boot_time'] == str(
+                    node.last_boot_time)):
+            entries[node.id] = cache[node.id]
+    dirty = len(entries) != len(cache)
+    if node_ids is not None:
+        nodes = [node for node in nodes if node.id in node_ids]
+    ret = {}
+    misses = []
+    for node in nodes:
+        if node.id in entries:
+            ret[node.id] = batchmodels.ComputeNodeGetRemoteLoginSettingsResult(
+                remote_login_ip_address=entries[node.id]['ip'],
+                remote_login_port=entries[node.id]['port'])
+        else:
+            misses.append(node)
+    logger.debug(
+        'remote login settings for pool {}: {} cached, {} to retrieve'.format(
+            pool_id, len(ret), len(misses)))
+    if len(misses) > 0:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=_max_workers(misses)) as executor:
+            futures = {
+                executor.submit(
+                    batch_client.compute_node.get_remote_login_settings,
+                    pool_id, node.id): node
+                for node in misses
+            }
+            for future in concurrent.futures.as_completed(futures):
+                node = futures[future]
+                rls = future.result()
+                ret[node.id] = rls
+                if (node.last_boot_time is not None and node.state not in
+                        _REMOTE_LOGIN_CACHE_INVALID_STATES):
+                    entries[node.id] = {
+                        'ip': rls.remote_login_ip_address,
+                        'port': rls.remote_login_port,
+                        'last_boot_time': str(node.last_boot_time),
+                    }
+                    dirty = True
+    if dirty:
+        util.save_json_file(path, entries)
+    return collections.OrderedDict(sorted(ret.items()))
+
+
 def get_remote_login_settings(
         batch_client, config, nodes=None, suppress_output=False):
     # type: (batch.BatchServiceClient, dict, List[str], bool) -> dict
-    """Get remote login settings
+    """Get remote login settings, served from the local per-pool cache
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param dict config: configuration dict
@@ -2828,13 +3311,13 @@ def get_remote_login_settings(
     :return: dict of node id -> remote login settings
     """
     pool_id = settings.pool_id(config)
-    if nodes is None:
-        nodes = batch_client.compute_node.list(
-            pool_id,
-            compute_node_list_options=batchmodels.ComputeNodeListOptions(
-                select='id')
-        )
     if settings.raw(config):
+        if nodes is None:
+            nodes = batch_client.compute_node.list(
+                pool_id,
+                compute_node_list_options=batchmodels.ComputeNodeListOptions(
+                    select='id')
+            )
         raw = []
         for node in nodes:
             raw.append(util.print_raw_output(
@@ -2842,27 +3325,14 @@ def get_remote_login_settings(
                 pool_id, node.id, return_json=True))
         util.print_raw_json(raw)
         return None
-    ret = {}
-    nodes = list(nodes)
-    if len(nodes) > 0:
-        with concurrent.futures.ThreadPoolExecutor(
-                max_workers=_max_workers(nodes)) as executor:
-            futures = {}
-            for node in nodes:
-                futures[node.id] = executor.submit(
-                    batch_client.compute_node.get_remote_login_settings,
-                    pool_id, node.id)
-            for node_id in futures:
-                ret[node_id] = futures[node_id].result()
-        if util.on_python2():
-            ret = collections.OrderedDict(sorted(ret.iteritems()))
-        else:
-            ret = collections.OrderedDict(sorted(ret.items()))
-        if not suppress_output:
-            for node_id in ret:
-                logger.info('node {}: ip {} port {}'.format(
-                    node_id, ret[node_id].remote_login_ip_address,
-                    ret[node_id].remote_login_port))
+    ret = get_cached_remote_login_settings(
+        batch_client, config,
+        node_ids=None if nodes is None else [node.id for node in nodes])
+    if not suppress_output:
+        for node_id in ret:
+            logger.info('node {}: ip {} port {}'.format(
+                node_id, ret[node_id].remote_login_ip_address,
+                ret[node_id].remote_login_port))
     return ret
 
 
@@ -2887,8 +3357,8 @@ def get_remote_login_setting_for_node(batch_client, config, cardinal, node_id):
                 ('cardinal value {} invalid for number of nodes {} in '
                  'pool {}').format(cardinal, len(nodes), pool_id))
         node_id = nodes[cardinal].id
-    rls = batch_client.compute_node.get_remote_login_settings(
-        pool_id, node_id)
+    rls = get_cached_remote_login_settings(
+        batch_client, config, node_ids=[node_id])[node_id]
     return rls.remote_login_ip_address, rls.remote_login_port
 
 
@@ -2966,10 +3436,203 @@ def egress_service_logs(
             time.sleep(2)
 
 
+class _TailedFile(object):
+    """State of a task file being followed by the tail engine"""
+    def __init__(self, task_id, fd):
+        # type: (_TailedFile, str, object) -> None
+        """Ctor for _TailedFile
+        :param _TailedFile self: this
+        :param str task_id: task id
+        :param object fd: file object to write to or None for console
+        """
+        self.task_id = task_id
+        self.fd = fd
+        self.state = None
+        self.offset = 0
+        self.partial = b''
+        self.interval = _TAIL_MIN_INTERVAL
+        self.next_poll = 0
+        self.final = False
+        self.done = False
+
+    def schedule(self, now, active):
+        # type: (_TailedFile, float, bool) -> None
+        """Schedule the next poll, backing off exponentially while the file
+        is idle and resetting once new data arrives
+        :param _TailedFile self: this
+        :param float now: current time
+        :param bool active: new data was retrieved
+        """
+        if active:
+            self.interval = _TAIL_MIN_INTERVAL
+        else:
+            self.interval = min(
+                (self.interval * 2, _TAIL_MAX_INTERVAL))
+        self.next_poll = now + self.interval
+
+    def wake(self, now):
+        # type: (_TailedFile, float) -> None
+        """Poll at the earliest opportunity
+        :param _TailedFile self: this
+        :param float now: current time
+        """
+        self.interval = _TAIL_MIN_INTERVAL
+        self.next_poll = now
+
+
+def _parse_tail_task_spec(task_spec):
+    # type: (str) -> Tuple[bool, List[str]]
+    """Parse a task specification for the tail engine
+    :param str task_spec: task specification
+    :rtype: tuple
+    :return: (is pattern, list of task ids or patterns)
+    """
+    if task_spec == '@ALL':
+        return True, ['*']
+    specs = [x for x in task_spec.split(':') if len(x) > 0]
+    pattern = any(
+        '*' in x or '?' in x or '[' in x for x in specs) or len(specs) > 1
+    return pattern, specs
+
+
+def _match_tail_task(task_id, specs):
+    # type: (str, List[str]) -> bool
+    """Check if a task id matches a task specification
+    :param str task_id: task id
+    :param list specs: list of task ids or patterns
+    :rtype: bool
+    :return: task id matches
+    """
+    return any(fnmatch.fnmatchcase(task_id, x) for x in specs)
+
+
+def _list_tail_tasks(batch_client, job_id, task_id, full):
+    # type: (batch.BatchServiceClient, str, str, bool) -> Dict[str, str]
+    """List task states for the tail engine. If a task id is given, only
+    the state of that task is retrieved. Otherwise, tasks are listed and an
+    incremental listing only returns tasks which have not completed.
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param str job_id: job id
+    :param str task_id: task id or None to list tasks
+    :param bool full: list all tasks
+    :rtype: dict
+    :return: map of task id -> task state
+    """
+    if task_id is not None:
+        try:
+            task = batch_client.task.get(
+                job_id, task_id,
+                task_get_options=batchmodels.TaskGetOptions(select='state')
+            )
+        except batchmodels.batch_error.BatchErrorException as ex:
+            if 'The specified task does not exist' in ex.message.value:
+                raise RuntimeError('task {} does not exist in job {}'.format(
+                    task_id, job_id))
+            raise
+        return {task_id: task.state}
+    if full:
+        options = batchmodels.TaskListOptions(select='id,state')
+    else:
+        options = batchmodels.TaskListOptions(
+            filter='state ne \'completed\'', select='id,state')
+    tasks = batch_client.task.list(job_id, task_list_options=options)
+    return {task.id: task.state for task in tasks}
+
+
+def _get_first_running_task(batch_client, job_id):
+    # type: (batch.BatchServiceClient, str) -> str
+    """Wait for the first running task in a job
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param str job_id: job id
+    :rtype: str
+    :return: task id
+    """
+    logger.debug('attempting to get first running task in job {}'.format(
+        job_id))
+    interval = _TAIL_MIN_INTERVAL
+    while True:
+        tasks = batch_client.task.list(
+            job_id,
+            task_list_options=batchmodels.TaskListOptions(
+                filter='state eq \'running\'',
+                select='id,state',
+            ),
+        )
+        for task in tasks:
+            return task.id
+        time.sleep(interval)
+        interval = min((interval * 2, _TAIL_MAX_INTERVAL))
+
+
+def _poll_tailed_file(batch_client, job_id, file, tf):
+    # type: (batch.BatchServiceClient, str, str, _TailedFile) ->
+    #        Tuple[int, bytes]
+    """Poll a task file and retrieve any bytes beyond the current offset
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param str job_id: job id
+    :param str file: task-relative file path
+    :param _TailedFile tf: tailed file
+    :rtype: tuple
+    :return: (file size or None if not available, new data)
+    """
+    try:
+        tfp = batch_client.file.get_properties_from_task(
+            job_id, tf.task_id, file, raw=True)
+    except batchmodels.BatchErrorException as ex:
+        if ('The specified operation is not valid for the current '
+                'state of the resource.' in ex.message or
+                'The specified file does not exist.' in ex.message or
+                'The specified path does not exist.' in ex.message):
+            return None, None
+        raise
+    size = int(tfp.response.headers['Content-Length'])
+    if size <= tf.offset:
+        return size, b''
+    frag = batch_client.file.get_from_task(
+        job_id, tf.task_id, file,
+        batchmodels.FileGetFromTaskOptions(
+            ocp_range='bytes={}-{}'.format(tf.offset, size - 1))
+    )
+    return size, b''.join(frag)
+
+
+def _emit_tailed_data(tf, data, prefix, flush):
+    # type: (_TailedFile, bytes, bool, bool) -> None
+    """Write data retrieved for a tailed file
+    :param _TailedFile tf: tailed file
+    :param bytes data: data
+    :param bool prefix: prefix console output lines with the task id
+    :param bool flush: flush any partial line
+    """
+    if tf.fd is not None:
+        if len(data) > 0:
+            tf.fd.write(data)
+        return
+    if not prefix:
+        if len(data) > 0:
+            print(data.decode('utf8', 'replace'), end='')
+        if flush:
+            print()
+        return
+    lines = (tf.partial + data).split(b'\n')
+    tf.partial = lines.pop()
+    if flush and len(tf.partial) > 0:
+        lines.append(tf.partial)
+        tf.partial = b''
+    for line in lines:
+        print('[{}] {}'.format(tf.task_id, line.decode('utf8', 'replace')))
+
+
 def stream_file_and_wait_for_task(
         batch_client, config, filespec=None, disk=False):
     # type: (batch.BatchServiceClient, dict, str, bool) -> None
-    """Stream a file and wait for task to complete
+    """Stream a file from one or more tasks and wait for the tasks to
+    complete. The task portion of the filespec may be a task id,
+    @FIRSTRUNNING, @ALL or a colon-separated list of task ids or glob
+    patterns. Output of multiple tasks is prefixed by task id.
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param dict config: configuration dict
@@ -2993,103 +3656,176 @@ def stream_file_and_wait_for_task(
         file = 'stdout.txt'
     # get first running task if specified
     if task_id == '@FIRSTRUNNING':
-        logger.debug('attempting to get first running task in job {}'.format(
-            job_id))
-        while True:
-            tasks = batch_client.task.list(
-                job_id,
-                task_list_options=batchmodels.TaskListOptions(
-                    filter='state eq \'running\'',
-                    select='id,state',
-                ),
-            )
-            for task in tasks:
-                task_id = task.id
-                break
-            if task_id == '@FIRSTRUNNING':
-                time.sleep(1)
-            else:
-                break
+        task_id = _get_first_running_task(batch_client, job_id)
+    pattern, specs = _parse_tail_task_spec(task_id)
     logger.debug('attempting to stream file {} from job={} task={}'.format(
         file, job_id, task_id))
-    curr = 0
-    completed = False
-    notfound = 0
+    tailed = {}
+    if not pattern:
+        tailed[task_id] = None
+
+    def _open(tid):
+        if not disk:
+            return None
+        fp = pathlib.Path(job_id, tid, file)
+        if (fp.exists() and not util.confirm_action(
+                config, 'overwrite {}'.format(fp))):
+            return None
+        fp.parent.mkdir(mode=0o750, parents=True, exist_ok=True)
+        logger.info('writing streamed data to disk: {}'.format(fp))
+        return fp.open('wb', buffering=0)
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=_MAX_EXECUTOR_WORKERS)
     try:
-        fd = None
-        if disk:
-            fp = pathlib.Path(job_id, task_id, file)
-            if (fp.exists() and not util.confirm_action(
-                    config, 'overwrite {}'.format(fp))):
+        for tid in list(tailed.keys()):
+            tailed[tid] = _TailedFile(tid, _open(tid))
+            if disk and tailed[tid].fd is None:
                 return
-            fp.parent.mkdir(mode=0o750, parents=True, exist_ok=True)
-            logger.info('writing streamed data to disk: {}'.format(fp))
-            fd = fp.open('wb', buffering=0)
+        state_interval = _TAIL_MIN_INTERVAL
+        next_state = 0
+        polls = 0
         while True:
-            # get task file properties
-            try:
-                tfp = batch_client.file.get_properties_from_task(
-                    job_id, task_id, file, raw=True)
-            except batchmodels.BatchErrorException as ex:
-                if ('The specified operation is not valid for the current '
-                        'state of the resource.' in ex.message):
-                    time.sleep(1)
-                    continue
-                elif ('The specified file does not exist.' in ex.message or
-                      'The specified path does not exist.' in ex.message):
-                    notfound += 1
-                    if notfound > 20:
-                        raise
-                    time.sleep(1)
-                    continue
+            now = time.time()
+            # refresh task states with a single selective request
+            if now >= next_state:
+                full = polls % _TAIL_FULL_REFRESH_POLLS == 0
+                states = _list_tail_tasks(
+                    batch_client, job_id, None if pattern else task_id,
+                    full)
+                polls += 1
+                changed = False
+                if pattern:
+                    for tid in states:
+                        if (tid not in tailed and
+                                _match_tail_task(tid, specs)):
+                            tf = _TailedFile(tid, _open(tid))
+                            if disk and tf.fd is None:
+                                tf.done = True
+                            tailed[tid] = tf
+                            changed = True
+                for tf in tailed.values():
+                    if tf.done:
+                        continue
+                    state = states.get(tf.task_id)
+                    if state is None:
+                        if not full and tf.state is not None:
+                            # absent from incremental listing: completed
+                            state = batchmodels.TaskState.completed
+                        else:
+                            continue
+                    if state != tf.state:
+                        tf.state = state
+                        tf.wake(now)
+                        changed = True
+                if changed:
+                    state_interval = _TAIL_MIN_INTERVAL
                 else:
-                    raise
-            size = int(tfp.response.headers['Content-Length'])
-            if curr < size:
-                frag = batch_client.file.get_from_task(
-                    job_id, task_id, file,
-                    batchmodels.FileGetFromTaskOptions(
-                        ocp_range='bytes={}-{}'.format(curr, size))
-                )
-                for f in frag:
-                    if fd is not None:
-                        fd.write(f)
+                    state_interval = min(
+                        (state_interval * 2, _TAIL_MAX_INTERVAL))
+                next_state = now + state_interval
+            # poll files which are due
+            due = [
+                tf for tf in tailed.values()
+                if not tf.done and tf.next_poll <= now and
+                tf.state in (
+                    batchmodels.TaskState.running,
+                    batchmodels.TaskState.completed)
+            ]
+            if len(due) > 0:
+                futures = {
+                    executor.submit(
+                        _poll_tailed_file, batch_client, job_id, file,
+                        tf): tf
+                    for tf in due
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    tf = futures[future]
+                    completed = tf.state == batchmodels.TaskState.completed
+                    size, data = future.result()
+                    if size is None:
+                        if completed:
+                            if not pattern:
+                                raise RuntimeError(
+                                    'file {} does not exist for job={} '
+                                    'task={}'.format(file, job_id, tf.task_id))
+                            logger.warning(
+                                'file {} does not exist for job={} '
+                                'task={}'.format(file, job_id, tf.task_id))
+                            tf.done = True
+                            continue
+                        tf.schedule(now, False)
+                        continue
+                    tf.offset += len(data)
+                    if tf.final and len(data) == 0:
+                        # the file was fully read after task completion
+                        _emit_tailed_data(tf, data, pattern, True)
+                        tf.done = True
+                        continue
+                    _emit_tailed_data(tf, data, pattern, False)
+                    if completed:
+                        # re-read once more to drain any trailing data
+                        tf.final = True
+                        tf.wake(now)
                     else:
-                        print(f.decode('utf8'), end='')
-                curr = size
-            elif completed:
-                if not disk:
-                    print()
+                        tf.schedule(now, len(data) > 0)
+            # check for completion
+            if (len(tailed) > 0 and all(tf.done for tf in tailed.values())
+                    and (not pattern or not any(
+                        _match_tail_task(tid, specs)
+                        for tid, state in states.items()
+                        if state != batchmodels.TaskState.completed))):
                 break
-            if not completed and curr == size:
-                task = batch_client.task.get(
-                    job_id, task_id,
-                    task_get_options=batchmodels.TaskGetOptions(
-                        select='state')
-                )
-                if task.state == batchmodels.TaskState.completed:
-                    completed = True
-            time.sleep(1)
+            now = time.time()
+            wait = [
+                tf.next_poll for tf in tailed.values()
+                if not tf.done and tf.state in (
+                    batchmodels.TaskState.running,
+                    batchmodels.TaskState.completed)
+            ]
+            wait.append(next_state)
+            delay = min(wait) - now
+            if delay > 0:
+                time.sleep(delay)
     finally:
-        if fd is not None:
-            fd.close()
+        executor.shutdown(wait=False)
+        for tf in tailed.values():
+            if tf is not None and tf.fd is not None:
+                tf.fd.close()
 
 
-def _get_task_file(batch_client, job_id, task_id, filename, fp):
+def _get_task_file(
+        batch_client, job_id, task_id, filename, fp, size=None,
+        last_modified=None):
     # type: (batch.BatchServiceClient, str, str, str,
-    #        pathlib.Path) -> None
-    """Get a files from a task
+    #        pathlib.Path, int, str) -> None
+    """Get a files from a task. Large files are downloaded in concurrent
+    ranges which can be resumed.
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param str job_id: job id
     :param str task_id: task id
     :param str filename: file name
     :param pathlib.Path fp: file path
+    :param int size: file size if known
+    :param str last_modified: last modified time if known
     """
-    stream = batch_client.file.get_from_task(job_id, task_id, filename)
-    with fp.open('wb') as f:
-        for fdata in stream:
-            f.write(fdata)
+    content_md5 = None
+    if size is None:
+        tfp = batch_client.file.get_properties_from_task(
+            job_id, task_id, filename, raw=True)
+        size = int(tfp.response.headers['Content-Length'])
+        last_modified = tfp.response.headers.get('Last-Modified')
+        content_md5 = tfp.response.headers.get('Content-MD5')
+
+    def _get_range(ocp_range):
+        return batch_client.file.get_from_task(
+            job_id, task_id, filename,
+            batchmodels.FileGetFromTaskOptions(ocp_range=ocp_range))
+
+    download.download_file(
+        _get_range, fp, size, last_modified=last_modified,
+        content_md5=content_md5)
 
 
 def get_file_via_task(batch_client, config, filespec=None):
@@ -3209,7 +3945,8 @@ def get_all_files_via_task(batch_client, config, filespec=None):
                     dirs_created.add(str(fp.parent))
                 executor.submit(
                     _get_task_file, batch_client, job_id, task_id,
-                    file.name, fp)
+                    file.name, fp, size=file.properties.content_length,
+                    last_modified=str(file.properties.last_modified))
                 i += 1
     if i == 0:
         logger.error('no files found for task {} job {} include={}'.format(
@@ -3220,22 +3957,38 @@ def get_all_files_via_task(batch_client, config, filespec=None):
                 job_id, task_id, incl if incl is not None else ''))
 
 
-def _get_node_file(batch_client, pool_id, node_id, filename, fp):
-    # type: (batch.BatchServiceClient, dict, str, str, str,
-    #        pathlib.Path) -> None
-    """Get a file from the node
+def _get_node_file(
+        batch_client, pool_id, node_id, filename, fp, size=None,
+        last_modified=None):
+    # type: (batch.BatchServiceClient, str, str, str,
+    #        pathlib.Path, int, str) -> None
+    """Get a file from the node. Large files are downloaded in concurrent
+    ranges which can be resumed.
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param str pool_id: pool id
     :param str node_id: node id
     :param str filename: file name
     :param pathlib.Path fp: file path
+    :param int size: file size if known
+    :param str last_modified: last modified time if known
     """
-    stream = batch_client.file.get_from_compute_node(
-        pool_id, node_id, filename)
-    with fp.open('wb') as f:
-        for fdata in stream:
-            f.write(fdata)
+    content_md5 = None
+    if size is None:
+        nfp = batch_client.file.get_properties_from_compute_node(
+            pool_id, node_id, filename, raw=True)
+        size = int(nfp.response.headers['Content-Length'])
+        last_modified = nfp.response.headers.get('Last-Modified')
+        content_md5 = nfp.response.headers.get('Content-MD5')
+
+    def _get_range(ocp_range):
+        return batch_client.file.get_from_compute_node(
+            pool_id, node_id, filename,
+            batchmodels.FileGetFromComputeNodeOptions(ocp_range=ocp_range))
+
+    download.download_file(
+        _get_range, fp, size, last_modified=last_modified,
+        content_md5=content_md5)
 
 
 def get_all_files_via_node(batch_client, config, filespec=None):
@@ -3279,7 +4032,8 @@ def get_all_files_via_node(batch_client, config, filespec=None):
                     dirs_created.add(str(fp.parent))
                 executor.submit(
                     _get_node_file, batch_client, pool_id, node_id,
-                    file.name, fp)
+                    file.name, fp, size=file.properties.content_length,
+                    last_modified=str(file.properties.last_modified))
                 i += 1
     if i == 0:
         logger.error('no files found for pool {} node {} include={}'.format(
@@ -3931,6 +4685,7 @@ def _submit_task_sub_collection(
                  'slice={}').format(slice))
     else:
         # go through result and retry just failed tasks
+        attempts = 0
         while True:
             retry = []
             for result in results.value:
@@ -3949,8 +4704,12 @@ def _submit_task_sub_collection(
                       batchmodels.TaskAddStatus.server_error):
                     retry.append(task_map[result.task_id])
             if len(retry) > 0:
+                attempts += 1
                 logger.debug('retrying adding {} tasks to job {}'.format(
                     len(retry), job_id))
+                # server errors indicate the service is overloaded
+                util.backoff_for_retry(
+                    attempts, endpoint=batch_client.config.base_url)
                 results = batch_client.task.add_collection(job_id, retry)
             else:
                 break
@@ -3985,13 +4744,14 @@ def _construct_task(
         docker_missing_images, singularity_missing_images, cloud_pool,
         pool, jobspec, job_id, job_env_vars, task_map, existing_tasklist,
         reserved_task_id, lasttaskid, is_merge_task, uses_task_dependencies,
-        on_task_failure, _task):
+        on_task_failure, taskrf_prefix, taskrf_expiry_days, taskrf_blobs,
+        _task):
     # type: (batch.BatchServiceClient, azureblob.BlockBlobService,
     #        azure.keyvault.KeyVaultClient, dict, tuple,
     #        settings.BatchShipyardSettings, bool, bool, str, bool,
     #        list, list, batchmodels.CloudPool, settings.PoolSettings,
     #        dict, str, dict, dict, list, str, str, bool, bool,
-    #        batchmodels.OnTaskFailure, dict) -> str
+    #        batchmodels.OnTaskFailure, str, int, list, dict) -> str
     """Contruct a Batch task and add it to the task map
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
@@ -4017,6 +4777,9 @@ def _construct_task(
     :param bool is_merge_task: is merge task
     :param bool uses_task_dependencies: uses task dependencies
     :param batchmodels.OntaskFailure on_task_failure: on task failure
+    :param str taskrf_prefix: task resource file blob prefix
+    :param int taskrf_expiry_days: task resource file sas expiry in days
+    :param list taskrf_blobs: uploaded task resource file blobs
     :param dict _task: task spec
     :rtype: tuple
     :return: (list of committed task ids for job, task id added to task map)
@@ -4051,8 +4814,7 @@ def _construct_task(
     # get and create env var file
     sas_urls = None
     if util.is_not_empty(env_vars) or task.infiniband or task.gpu:
-        envfileloc = '{}taskrf-{}/{}{}'.format(
-            bs.storage_entity_prefix, job_id, task.id, task.envfile)
+        envfileloc = '{}{}{}'.format(taskrf_prefix, task.id, task.envfile)
         f = tempfile.NamedTemporaryFile(mode='wb', delete=False)
         fname = f.name
         try:
@@ -4085,7 +4847,9 @@ def _construct_task(
             f.close()
             if not native and not is_singularity:
                 sas_urls = storage.upload_resource_files(
-                    blob_client, config, [(envfileloc, fname)])
+                    blob_client, config, [(envfileloc, fname)],
+                    expiry_days=taskrf_expiry_days, generated=True)
+                taskrf_blobs.append(envfileloc)
         finally:
             os.unlink(fname)
             del f
@@ -4402,6 +5166,10 @@ def add_jobs(
     lasttaskid = None
     jobschedule = None
     tasksadded = False
+    # drop task resource file buckets past retention
+    storage.expire_task_resource_files(blob_client, config)
+    # resolve all referenced environment variable secrets up front
+    keyvault.prefetch_job_secrets(keyvault_client, config)
     for jobspec in settings.job_specifications(config):
         job_id = settings.job_id(jobspec)
         lastjob = job_id
@@ -4806,6 +5574,14 @@ def add_jobs(
         del _job_env_vars_secid
         # add all tasks under job
         task_map = {}
+        # job schedules refer to task resource files for their lifetime,
+        # thus these are never placed in expiring date buckets
+        recurring = jobschedule is not None
+        taskrf_prefix = storage.get_task_resource_file_prefix(
+            bs, job_id, recurring)
+        taskrf_expiry_days = storage.get_task_resource_file_sas_expiry_days(
+            bs, recurring)
+        taskrf_blobs = []
         for _task in settings.job_tasks(config, jobspec):
             existing_tasklist, lasttaskid = _construct_task(
                 batch_client, blob_client, keyvault_client, config, bxfile,
@@ -4813,7 +5589,8 @@ def add_jobs(
                 docker_missing_images, singularity_missing_images, cloud_pool,
                 pool, jobspec, job_id, job_env_vars, task_map,
                 existing_tasklist, reserved_task_id, lasttaskid, False,
-                uses_task_dependencies, on_task_failure, _task)
+                uses_task_dependencies, on_task_failure, taskrf_prefix,
+                taskrf_expiry_days, taskrf_blobs, _task)
         if has_merge_task:
             _task = settings.job_merge_task(jobspec)
             existing_tasklist, merge_task_id = _construct_task(
@@ -4822,7 +5599,8 @@ def add_jobs(
                 docker_missing_images, singularity_missing_images, cloud_pool,
                 pool, jobspec, job_id, job_env_vars, task_map,
                 existing_tasklist, reserved_task_id, lasttaskid, True,
-                uses_task_dependencies, on_task_failure, _task)
+                uses_task_dependencies, on_task_failure, taskrf_prefix,
+                taskrf_expiry_days, taskrf_blobs, _task)
             # set dependencies on merge task
             merge_task = task_map.pop(merge_task_id)
             merge_task.depends_on = batchmodels.TaskDependencies(
@@ -4835,6 +5613,12 @@ def add_jobs(
                      'please limit the the number of tasks').format(job_id))
             # add merge task into map
             task_map[merge_task_id] = merge_task
+        # track task resource files of the job in its index
+        if not recurring:
+            storage.update_task_resource_file_index(
+                blob_client, config, job_id, taskrf_blobs)
+        del taskrf_blobs
+        del recurring
         # submit job schedule if required
         if jobschedule is not None:
             taskmaploc = '{}jsrf-{}/{}'.format(
@@ -4847,7 +5631,8 @@ def add_jobs(
                     pickle.dump(task_map, f, protocol=pickle.HIGHEST_PROTOCOL)
                 f.close()
                 sas_urls = storage.upload_resource_files(
-                    blob_client, config, [(taskmaploc, fname)])
+                    blob_client, config, [(taskmaploc, fname)],
+                    generated=True)
             finally:
                 os.unlink(fname)
                 del f
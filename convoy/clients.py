@@ -30,17 +30,13 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import copy
 import logging
+import threading
 # non-stdlib imports
 import azure.batch.batch_auth as batchauth
 import azure.batch.batch_service_client as batchsc
 import azure.cosmosdb.table as azuretable
-import azure.keyvault
-import azure.mgmt.batch
-import azure.mgmt.compute
-import azure.mgmt.network
-import azure.mgmt.resource
-import azure.mgmt.storage
 import azure.storage.blob as azureblob
 # local imports
 from . import aad
@@ -48,21 +44,84 @@ from . import settings
 from . import storage
 from . import util
 from .version import __version__
+# deferred non-stdlib imports
+azurekeyvault = util.LazyModule('azure.keyvault')
+mgmtbatch = util.LazyModule('azure.mgmt.batch')
+mgmtcompute = util.LazyModule('azure.mgmt.compute')
+mgmtnetwork = util.LazyModule('azure.mgmt.network')
+mgmtresource = util.LazyModule('azure.mgmt.resource')
+mgmtstorage = util.LazyModule('azure.mgmt.storage')
 
 # create logger
 logger = logging.getLogger(__name__)
 util.setup_logger(logger)
 
 
+class _LazyObject(object):
+    """Proxy which constructs an object, such as a client, with the given
+    factory on first attribute access"""
+    def __init__(self, factory):
+        # type: (_LazyObject, Callable) -> None
+        """Ctor for _LazyObject
+        :param _LazyObject self: this
+        :param Callable factory: factory to construct object
+        """
+        self._lazy_factory = factory
+        self._lazy_object = None
+        self._lazy_lock = threading.Lock()
+
+    def _lazy_get(self):
+        # type: (_LazyObject) -> object
+        """Get the object, constructing it if required
+        :param _LazyObject self: this
+        :rtype: object
+        :return: object
+        """
+        if self._lazy_object is None:
+            with self._lazy_lock:
+                if self._lazy_object is None:
+                    self._lazy_object = self._lazy_factory()
+        return self._lazy_object
+
+    def __getattr__(self, attr):
+        # type: (_LazyObject, str) -> object
+        """Get an attribute of the object
+        :param _LazyObject self: this
+        :param str attr: attribute name
+        :rtype: object
+        :return: attribute
+        """
+        if attr.startswith('_lazy_'):
+            raise AttributeError(attr)
+        return getattr(self._lazy_get(), attr)
+
+
+class _SharedKeyCredentials(batchauth.SharedKeyCredentials):
+    """Batch shared key credentials which sign a provided session so that
+    connections are kept alive across requests"""
+    def signed_session(self, session=None):
+        # type: (_SharedKeyCredentials, requests.Session) -> requests.Session
+        """Get a signed session for requests
+        :param _SharedKeyCredentials self: this
+        :param requests.Session session: session to sign
+        :rtype: requests.Session
+        :return: signed session
+        """
+        session = super(
+            batchauth.SharedKeyCredentials, self).signed_session(session)
+        session.auth = self.auth
+        return session
+
+
 def _modify_client_for_retry_and_user_agent(client):
     # type: (Any) -> None
-    """Extend retry policy of clients and add user agent string
+    """Apply the shared connection pool and retry policy to clients and
+    add user agent string
     :param Any client: a client object
     """
     if client is None:
         return
-    client.config.retry_policy.max_backoff = 8
-    client.config.retry_policy.retries = 20
+    util.configure_msrest_client(client)
     client.config.add_user_agent('batch-shipyard/{}'.format(__version__))
 
 
@@ -88,7 +147,7 @@ def _create_resource_client(
         subscription_id = ctx.subscription_id or mgmt_aad.subscription_id
     if endpoint is None:
         endpoint = ctx.aad_endpoint or mgmt_aad.endpoint
-    client = azure.mgmt.resource.resources.ResourceManagementClient(
+    client = mgmtresource.resources.ResourceManagementClient(
         credentials, subscription_id, base_url=endpoint)
     _modify_client_for_retry_and_user_agent(client)
     return client
@@ -116,7 +175,7 @@ def _create_compute_client(
         subscription_id = ctx.subscription_id or mgmt_aad.subscription_id
     if endpoint is None:
         endpoint = ctx.aad_endpoint or mgmt_aad.endpoint
-    client = azure.mgmt.compute.ComputeManagementClient(
+    client = mgmtcompute.ComputeManagementClient(
         credentials, subscription_id, base_url=endpoint)
     _modify_client_for_retry_and_user_agent(client)
     return client
@@ -144,7 +203,7 @@ def _create_network_client(
         subscription_id = ctx.subscription_id or mgmt_aad.subscription_id
     if endpoint is None:
         endpoint = ctx.aad_endpoint or mgmt_aad.endpoint
-    client = azure.mgmt.network.NetworkManagementClient(
+    client = mgmtnetwork.NetworkManagementClient(
         credentials, subscription_id, base_url=endpoint)
     _modify_client_for_retry_and_user_agent(client)
     return client
@@ -175,7 +234,7 @@ def _create_storage_mgmt_client(
         subscription_id = ctx.subscription_id or subid
     if endpoint is None:
         endpoint = ctx.aad_endpoint or storage_aad.endpoint
-    client = azure.mgmt.storage.StorageManagementClient(
+    client = mgmtstorage.StorageManagementClient(
         credentials, subscription_id, base_url=endpoint)
     _modify_client_for_retry_and_user_agent(client)
     return client
@@ -203,12 +262,38 @@ def _create_batch_mgmt_client(
         subscription_id = ctx.subscription_id or mgmt_aad.subscription_id
     if endpoint is None:
         endpoint = ctx.aad_endpoint or mgmt_aad.endpoint
-    batch_mgmt_client = azure.mgmt.batch.BatchManagementClient(
+    batch_mgmt_client = mgmtbatch.BatchManagementClient(
         credentials, subscription_id, base_url=endpoint)
     _modify_client_for_retry_and_user_agent(batch_mgmt_client)
     return batch_mgmt_client
 
 
+def _create_batch_mgmt_client_or_raise(
+        ctx, credentials, subscription_id, endpoint):
+    # type: (CliContext, object, str, str) ->
+    #        azure.mgmt.batch.BatchManagementClient
+    """Create batch management client, raising a descriptive error on
+    failure
+    :param CliContext ctx: Cli Context
+    :param object credentials: credentials object
+    :param str subscription_id: subscription id
+    :param str endpoint: endpoint
+    :rtype: azure.mgmt.batch.BatchManagementClient
+    :return: batch management client
+    """
+    try:
+        return _create_batch_mgmt_client(
+            ctx, credentials=credentials, subscription_id=subscription_id,
+            endpoint=endpoint)
+    except Exception as e:
+        if settings.verbose(ctx.config):
+            logger.warning(
+                'could not create batch management client: {}'.format(e))
+        raise RuntimeError(
+            'Batch management client is invalid, please specify management '
+            'aad credentials and valid subscription_id')
+
+
 def create_all_clients(ctx, batch_clients=False):
     # type: (CliContext, bool) ->
     #        Tuple[azure.mgmt.resource.resources.ResourceManagementClient,
@@ -217,7 +302,8 @@ def create_all_clients(ctx, batch_clients=False):
     #              azure.mgmt.storage.StorageManagementClient,
     #              azure.mgmt.batch.BatchManagementClient,
     #              azure.batch.batch_service_client.BatchServiceClient]
-    """Create all arm clients and batch service client
+    """Create all arm clients and batch service client. ARM clients and
+    their credentials are constructed on first use.
     :param CliContext ctx: Cli Context
     :param bool batch_clients: create batch clients
     :rtype: tuple
@@ -232,46 +318,48 @@ def create_all_clients(ctx, batch_clients=False):
     mgmt = settings.credentials_management(ctx.config)
     subscription_id = ctx.subscription_id or mgmt.subscription_id
     endpoint = ctx.aad_endpoint or mgmt.aad.endpoint
+    # snapshot the context as cli options are released after
+    # initialization but may be needed to create credentials on first use
+    ctx = copy.copy(ctx)
+    credentials = _LazyObject(
+        lambda: aad.create_aad_credentials(ctx, mgmt.aad))
     if util.is_none_or_empty(subscription_id):
-        credentials = None
         resource_client = None
         compute_client = None
         network_client = None
         storage_mgmt_client = None
+        batch_mgmt_client = None
     else:
         # subscription_id must be of type 'str' due to python management
         # library type checking, but can be read as 'unicode' from json
         subscription_id = str(subscription_id)
-        # create add credential object
-        credentials = aad.create_aad_credentials(ctx, mgmt.aad)
         # create clients
-        resource_client = _create_resource_client(
-            ctx, credentials=credentials, subscription_id=subscription_id,
-            endpoint=endpoint)
-        compute_client = _create_compute_client(
-            ctx, credentials=credentials, subscription_id=subscription_id,
-            endpoint=endpoint)
-        network_client = _create_network_client(
-            ctx, credentials=credentials, subscription_id=subscription_id,
-            endpoint=endpoint)
-        storage_mgmt_client = _create_storage_mgmt_client(
-            ctx, credentials=credentials, subscription_id=subscription_id,
-            endpoint=endpoint)
+        resource_client = _LazyObject(
+            lambda: _create_resource_client(
+                ctx, credentials=credentials._lazy_get(),
+                subscription_id=subscription_id, endpoint=endpoint))
+        compute_client = _LazyObject(
+            lambda: _create_compute_client(
+                ctx, credentials=credentials._lazy_get(),
+                subscription_id=subscription_id, endpoint=endpoint))
+        network_client = _LazyObject(
+            lambda: _create_network_client(
+                ctx, credentials=credentials._lazy_get(),
+                subscription_id=subscription_id, endpoint=endpoint))
+        storage_mgmt_client = _LazyObject(
+            lambda: _create_storage_mgmt_client(
+                ctx, credentials=credentials._lazy_get(),
+                subscription_id=subscription_id, endpoint=endpoint))
+        batch_mgmt_client = None
+        if batch_clients:
+            batch_mgmt_client = _LazyObject(
+                lambda: _create_batch_mgmt_client_or_raise(
+                    ctx, credentials=credentials._lazy_get(),
+                    subscription_id=subscription_id, endpoint=endpoint))
     if batch_clients:
-        try:
-            if credentials is None:
-                credentials = aad.create_aad_credentials(ctx, mgmt.aad)
-            batch_mgmt_client = _create_batch_mgmt_client(
-                ctx, credentials=credentials, subscription_id=subscription_id,
-                endpoint=endpoint)
-        except Exception:
-            if settings.verbose(ctx.config):
-                logger.warning('could not create batch management client')
-            batch_mgmt_client = None
         # create batch service client
         batch_client = _create_batch_service_client(ctx)
     else:
-        batch_mgmt_client = None
         batch_client = None
     return (
         resource_client, compute_client, network_client, storage_mgmt_client,
@@ -289,7 +377,7 @@ def create_keyvault_client(ctx):
     kv = settings.credentials_keyvault(ctx.config)
     if util.is_none_or_empty(ctx.keyvault_uri or kv.keyvault_uri):
         return None
-    client = azure.keyvault.KeyVaultClient(
+    client = azurekeyvault.KeyVaultClient(
         aad.create_aad_credentials(ctx, kv.aad)
     )
     _modify_client_for_retry_and_user_agent(client)
@@ -309,8 +397,7 @@ def _create_batch_service_client(ctx):
         batch_aad = settings.credentials_batch(ctx.config).aad
         credentials = aad.create_aad_credentials(ctx, batch_aad)
     else:
-        credentials = batchauth.SharedKeyCredentials(
-            bc.account, bc.account_key)
+        credentials = _SharedKeyCredentials(bc.account, bc.account_key)
     batch_client = batchsc.BatchServiceClient(
         credentials, base_url=bc.account_service_url)
     _modify_client_for_retry_and_user_agent(batch_client)
@@ -326,14 +413,17 @@ def create_storage_clients():
     account_name = storage.get_storageaccount()
     account_key = storage.get_storageaccount_key()
     endpoint_suffix = storage.get_storageaccount_endpoint()
-    blob_client = azureblob.BlockBlobService(
+    request_session = util.get_shared_http_session('storage')
+    blob_client = util.configure_storage_client(azureblob.BlockBlobService(
         account_name=account_name,
         account_key=account_key,
         endpoint_suffix=endpoint_suffix,
-    )
-    table_client = azuretable.TableService(
+        request_session=request_session,
+    ))
+    table_client = util.configure_storage_client(azuretable.TableService(
         account_name=account_name,
         account_key=account_key,
         endpoint_suffix=endpoint_suffix,
-    )
+        request_session=request_session,
+    ))
     return blob_client, table_client
@@ -40,9 +40,22 @@ try:
     import pathlib2 as pathlib
 except ImportError:
     import pathlib
+import re
 import tempfile
 import stat
 import subprocess
+import threading
+# non-stdlib imports
+try:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+except ImportError:
+    serialization = None
+try:
+    from cryptography.hazmat.primitives.serialization import pkcs12
+except ImportError:
+    pkcs12 = None
 # local imports
 from . import settings
 from . import util
@@ -53,6 +66,10 @@ util.setup_logger(logger)
 # global defines
 _SSH_KEY_PREFIX = 'id_rsa_shipyard'
 _REMOTEFS_SSH_KEY_PREFIX = '{}_remotefs'.format(_SSH_KEY_PREFIX)
+_ENCRYPTED_STRING_CACHE = {}
+_ENCRYPTED_STRING_CACHE_LOCK = threading.Lock()
+_PUBLIC_KEY_CACHE = {}
+_PUBLIC_KEY_CACHE_LOCK = threading.Lock()
 # named tuples
 PfxSettings = collections.namedtuple(
     'PfxSettings', [
@@ -180,6 +197,44 @@ def connect_or_exec_ssh_command(
             ssh_cmd, shell=shell, pipe_stderr=True)
 
 
+def start_ssh_agent(ssh_private_key):
+    # type: (pathlib.Path) -> dict
+    """Start a dedicated SSH agent holding the given private key, which
+    allows agent forwarding without copying the key to remote hosts
+    :param pathlib.Path ssh_private_key: SSH private key
+    :rtype: dict
+    :return: environment with SSH agent variables set
+    """
+    if not ssh_private_key.exists():
+        raise RuntimeError('SSH private key file not found at: {}'.format(
+            ssh_private_key))
+    output = util.decode_string(
+        subprocess.check_output(['ssh-agent', '-s']))
+    env = os.environ.copy()
+    for var in ('SSH_AUTH_SOCK', 'SSH_AGENT_PID'):
+        match = re.search(r'{}=([^;]+);'.format(var), output)
+        if match is None:
+            raise RuntimeError('could not start ssh-agent')
+        env[var] = match.group(1)
+    rc = util.subprocess_with_output(
+        ['ssh-add', str(ssh_private_key)], suppress_output=True, env=env)
+    if rc != 0:
+        stop_ssh_agent(env)
+        raise RuntimeError(
+            'could not add SSH private key {} to ssh-agent'.format(
+                ssh_private_key))
+    return env
+
+
+def stop_ssh_agent(env):
+    # type: (dict) -> None
+    """Stop an SSH agent started with start_ssh_agent
+    :param dict env: environment with SSH agent variables set
+    """
+    util.subprocess_with_output(
+        ['ssh-agent', '-k'], suppress_output=True, env=env)
+
+
 def derive_private_key_pem_from_pfx(pfxfile, passphrase=None, pemfile=None):
     # type: (str, str, str) -> str
     """Derive a private key pem file from a pfx
@@ -496,9 +551,74 @@ def get_encryption_pfx_settings(config):
         filename=pfxfile, passphrase=pfx_passphrase, sha1=sha1_cert_tp)
 
 
+def _load_public_key_from_pfx(pfxfile, passphrase):
+    # type: (str, str) -> object
+    """Load the public key of a pfx in-process
+    :param str pfxfile: pfx file
+    :param str passphrase: passphrase for pfx
+    :rtype: cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey
+    :return: public key
+    """
+    if pfxfile is None:
+        raise ValueError('pfx file is invalid')
+    if passphrase is None:
+        passphrase = getpass.getpass('Enter password for PFX: ')
+    with open(pfxfile, 'rb') as f:
+        data = f.read()
+    privkey = pkcs12.load_key_and_certificates(
+        data, util.encode_string(passphrase), backend=default_backend())[0]
+    if privkey is None:
+        raise RuntimeError('pfx {} does not contain a private key'.format(
+            pfxfile))
+    return privkey.public_key()
+
+
+def _load_public_key(config):
+    # type: (dict) -> object
+    """Load the encryption public key, caching it for the lifetime of the
+    process
+    :param dict config: configuration dict
+    :rtype: cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey
+    :return: public key
+    """
+    pemfile = settings.batch_shipyard_encryption_public_key_pem(config)
+    pfxfile = settings.batch_shipyard_encryption_pfx_filename(config)
+    key = (pemfile, pfxfile)
+    with _PUBLIC_KEY_CACHE_LOCK:
+        try:
+            return _PUBLIC_KEY_CACHE[key]
+        except KeyError:
+            pass
+        pfx_passphrase = settings.batch_shipyard_encryption_pfx_passphrase(
+            config)
+        if pemfile is None and pkcs12 is not None:
+            pubkey = _load_public_key_from_pfx(pfxfile, pfx_passphrase)
+        else:
+            derived = False
+            if pemfile is None:
+                # derive pem from pfx
+                derived = True
+                pemfile = derive_public_key_pem_from_pfx(
+                    pfxfile, pfx_passphrase, None)
+                if pemfile is None:
+                    raise RuntimeError('public encryption key is invalid')
+            try:
+                with open(pemfile, 'rb') as f:
+                    pubkey = serialization.load_pem_public_key(
+                        f.read(), backend=default_backend())
+            finally:
+                if derived:
+                    fp = pathlib.Path(pemfile)
+                    if fp.exists():
+                        fp.unlink()
+        _PUBLIC_KEY_CACHE[key] = pubkey
+        return pubkey
+
+
 def _rsa_encrypt_string(data, config):
     # type: (str, dict) -> str
-    """RSA encrypt a string
+    """RSA encrypt a string with PKCS#1 v1.5 padding, in-process if the
+    cryptography package is available
     :param str data: clear text data to encrypt
     :param dict config: configuration dict
     :rtype: str
@@ -506,6 +626,21 @@ def _rsa_encrypt_string(data, config):
     """
     if util.is_none_or_empty(data):
         raise ValueError('invalid data to encrypt')
+    if serialization is None:
+        return _rsa_encrypt_string_openssl(data, config)
+    pubkey = _load_public_key(config)
+    return util.base64_encode_string(
+        pubkey.encrypt(util.encode_string(data), padding.PKCS1v15()))
+
+
+def _rsa_encrypt_string_openssl(data, config):
+    # type: (str, dict) -> str
+    """RSA encrypt a string with openssl
+    :param str data: clear text data to encrypt
+    :param dict config: configuration dict
+    :rtype: str
+    :return: base64-encoded cipher text
+    """
     inkey = settings.batch_shipyard_encryption_public_key_pem(config)
     derived = False
     if inkey is None:
@@ -566,14 +701,43 @@ def _rsa_decrypt_string_with_pfx(ciphertext, config):
 
 def encrypt_string(enabled, string, config):
     # type: (bool, str, dict) -> str
-    """Encrypt a string
+    """Encrypt a string. Cipher text is cached per public key such that
+    identical strings are only encrypted once.
     :param bool enabled: if encryption is enabled
     :param str string: string to encrypt
     :param dict config: configuration dict
     :rtype: str
     :return: encrypted string if enabled
     """
-    if enabled:
-        return _rsa_encrypt_string(string, config)
-    else:
+    if not enabled:
         return string
+    key = (
+        settings.batch_shipyard_encryption_public_key_pem(config),
+        settings.batch_shipyard_encryption_pfx_filename(config),
+        string,
+    )
+    with _ENCRYPTED_STRING_CACHE_LOCK:
+        try:
+            return _ENCRYPTED_STRING_CACHE[key]
+        except KeyError:
+            pass
+    ciphertext = _rsa_encrypt_string(string, config)
+    with _ENCRYPTED_STRING_CACHE_LOCK:
+        _ENCRYPTED_STRING_CACHE[key] = ciphertext
+    return ciphertext
+
+
+def encrypt_strings(enabled, strings, config):
+    # type: (bool, List[str], dict) -> List[str]
+    """Encrypt a list of strings with a single load of the public key
+    :param bool enabled: if encryption is enabled
+    :param list strings: strings to encrypt
+    :param dict config: configuration dict
+    :rtype: list
+    :return: encrypted strings if enabled
+    """
+    if not enabled:
+        return list(strings)
+    if serialization is not None and len(strings) > 0:
+        _load_public_key(config)
+    return [encrypt_string(enabled, x, config) for x in strings]
@@ -30,6 +30,7 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import concurrent.futures
 import datetime
 import fnmatch
 import logging
@@ -43,10 +44,12 @@ try:
     from shlex import quote as shellquote
 except ImportError:
     from pipes import quote as shellquote
+import tempfile
 import threading
 import time
 # non-stdlib imports
 import azure.batch.models as batchmodels
+import azure.storage.blob as azureblob
 # local imports
 from . import crypto
 from . import resource
@@ -63,6 +66,10 @@ _BLOBXFER_VERSION = '1.2.0'
 _MEGABYTE = 1048576
 _MAX_READ_BLOCKSIZE_BYTES = 4194304
 _FILE_SPLIT_PREFIX = '_shipyard-'
+_INGRESS_PROGRESS_INTERVAL = 10
+_BROADCAST_RELAY_FILE = pathlib.Path(
+    pathlib.Path(__file__).resolve().parent.parent,
+    'scripts/shipyard_broadcast_relay.sh')
 
 
 def _get_gluster_paths(config):
@@ -125,7 +132,7 @@ def _process_storage_input_data(config, input_data, on_task):
     gluster_host, gluster_container = _get_gluster_paths(config)
     # parse storage input data blocks
     encrypt = settings.batch_shipyard_encryption_enabled(config)
-    args = []
+    xfers = []
     for xfer in input_data:
         storage_settings = settings.credentials_storage(
             config, settings.data_storage_account_settings(xfer))
@@ -154,20 +161,25 @@ def _process_storage_input_data(config, input_data, on_task):
         if (util.is_not_empty(gluster_container) and
                 local_path.startswith(gluster_container)):
             local_path = local_path.replace(gluster_container, gluster_host, 1)
-        # construct argument
-        # kind:encrypted:<sa:ep:saskey:remote_path>:local_path:eo
-        creds = crypto.encrypt_string(
-            encrypt,
+        xfers.append((
             '{},{},{},{}'.format(
                 storage_settings.account, storage_settings.endpoint,
                 saskey, remote_path),
-            config)
+            local_path,
+            ' '.join((filters, eo)).lstrip(),
+        ))
+    # encrypt all credentials at once
+    creds = crypto.encrypt_strings(encrypt, [x[0] for x in xfers], config)
+    # construct arguments
+    # kind:encrypted:<sa:ep:saskey:remote_path>:local_path:eo
+    args = []
+    for cred, xfer in zip(creds, xfers):
         args.append('"{bxver},i,{enc},{creds},{lp},{eo}"'.format(
             bxver=_BLOBXFER_VERSION,
             enc=encrypt,
-            creds=creds,
-            lp=local_path,
-            eo=' '.join((filters, eo)).lstrip(),
+            creds=cred,
+            lp=xfer[1],
+            eo=xfer[2],
         ))
     return args
 
@@ -342,6 +354,11 @@ def _process_storage_output_data(config, native, is_windows, output_data):
         if (util.is_not_empty(gluster_container) and
                 local_path.startswith(gluster_container)):
             local_path = local_path.replace(gluster_container, gluster_host, 1)
+        create_manifest = settings.data_create_manifest(xfer)
+        if create_manifest and (native or '--mode file' in eo):
+            raise ValueError(
+                'output manifests are only supported for non-native '
+                'container pools egressing to Azure Blob storage')
         if native:
             if util.is_not_empty(excludes):
                 raise ValueError(
@@ -382,12 +399,19 @@ def _process_storage_output_data(config, native, is_windows, output_data):
                     storage_settings.account, storage_settings.endpoint,
                     saskey, remote_path),
                 config)
-            args.append('"{bxver},e,{enc},{creds},{lp},{eo}"'.format(
+            if create_manifest:
+                # m:includes:excludes with filters delimited by semicolons
+                manifest = ',m,{},{}'.format(
+                    ';'.join(includes), ';'.join(excludes))
+            else:
+                manifest = ''
+            args.append('"{bxver},e,{enc},{creds},{lp},{eo}{manifest}"'.format(
                 bxver=_BLOBXFER_VERSION,
                 enc=encrypt,
                 creds=creds,
                 lp=local_path,
                 eo=' '.join((filters, eo)).lstrip(),
+                manifest=manifest,
             ))
     return args
 
@@ -685,6 +709,122 @@ def _multinode_transfer(
                 (total_size * 8 / 1e6) / diff.total_seconds()))
 
 
+def _broadcast_transfer(
+        dest, source, dst, username, ssh_private_key, rls, node_ips):
+    # type: (DestinationSettings, SourceSettings, str, str, pathlib.Path,
+    #        dict, dict) -> None
+    """Broadcast data to all nodes through a pipelined tree. The local
+    machine streams data to seed nodes only, which extract and relay the
+    stream to their children over the internal network. SSH authentication
+    between nodes is performed via a forwarded local SSH agent, thus the
+    private key never leaves the local machine.
+    :param DestinationSettings dest: destination settings
+    :param SourceSettings source: source settings
+    :param str dst: destination path
+    :param str username: username
+    :param pathlib.Path: ssh private key
+    :param dict rls: remote login settings
+    :param dict node_ips: internal ip addresses keyed by node id
+    """
+    src = source.path
+    src_incl = source.include
+    src_excl = source.exclude
+    psrc = pathlib.Path(src)
+    # if source isn't a directory, convert it using src_incl
+    if not psrc.is_dir():
+        src_excl = None
+        src_incl = [psrc.name]
+        src = str(psrc.parent)
+        psrc = psrc.parent
+    # gather file list
+    total_size = 0
+    xfer_files = []
+    for entry in util.scantree(src):
+        srel = str(pathlib.Path(entry.path).relative_to(psrc))
+        if src_excl is not None:
+            inc = not any([fnmatch.fnmatch(srel, x) for x in src_excl])
+        else:
+            inc = True
+        if src_incl is not None:
+            inc = any([fnmatch.fnmatch(srel, x) for x in src_incl])
+        if not inc:
+            logger.debug('skipping file {} due to filters'.format(
+                entry.path))
+            continue
+        total_size += entry.stat().st_size
+        xfer_files.append(srel)
+    if len(xfer_files) == 0:
+        logger.error('no files to ingress')
+        return
+    if util.is_not_empty(dest.relative_destination_path):
+        dst = '{}/{}'.format(dst.rstrip('/'), dest.relative_destination_path)
+    # partition nodes into a subtree per seed
+    nodes = sorted(x for x in rls if x in node_ips)
+    if len(nodes) == 0:
+        raise RuntimeError(
+            'no nodes with remote login settings and internal ip '
+            'addresses available to broadcast data to')
+    nseeds = min((dest.data_transfer.broadcast_seed_nodes, len(nodes)))
+    seeds = nodes[:nseeds]
+    others = nodes[nseeds:]
+    chunk = int(math.ceil(len(others) / nseeds))
+    relay = util.base64_encode_string(_BROADCAST_RELAY_FILE.read_bytes())
+    relaycmd = 'bash -c "$(echo {b64} | base64 -d)" relay {b64} {}'.format(
+        ' '.join((
+            shellquote(dst), str(dest.data_transfer.broadcast_fanout),
+            shellquote(username))),
+        b64=relay)
+    listfile = tempfile.NamedTemporaryFile(mode='wb', delete=False)
+    try:
+        listfile.write(b'\0'.join(util.encode_string(x) for x in xfer_files))
+        listfile.close()
+        env = crypto.start_ssh_agent(ssh_private_key)
+        try:
+            logger.info(
+                'ingress data: {0:.4f} MiB in {1} files to broadcast to {2} '
+                'nodes via {3} seed nodes'.format(
+                    total_size / _MEGABYTE, len(xfer_files), len(nodes),
+                    nseeds))
+            logger.info('begin ingressing data from {} to {}'.format(
+                src, dst))
+            start = datetime.datetime.now()
+            procs = []
+            for i in range(0, nseeds):
+                subtree = ' '.join(
+                    node_ips[x] for x in others[i * chunk:(i + 1) * chunk])
+                cmd = ('{{ echo "{}"; tar -c -C {} --null -T {}; }} | '
+                       'ssh -A -T -x -o StrictHostKeyChecking=no '
+                       '-o UserKnownHostsFile={} {} -p {} {}@{} {}').format(
+                           subtree, shellquote(src),
+                           shellquote(listfile.name), os.devnull,
+                           dest.data_transfer.scp_ssh_extra_options,
+                           rls[seeds[i]].remote_login_port, username,
+                           rls[seeds[i]].remote_login_ip_address,
+                           shellquote(relaycmd))
+                procs.append(util.subprocess_nowait(cmd, shell=True, env=env))
+            rcodes, _, _ = util.subprocess_wait_all(procs)
+            diff = datetime.datetime.now() - start
+        finally:
+            crypto.stop_ssh_agent(env)
+    finally:
+        os.unlink(listfile.name)
+    success = True
+    for i in range(0, nseeds):
+        if rcodes[i] != 0:
+            logger.error(
+                'data ingress failed to subtree of seed node {} with return '
+                'code: {}'.format(seeds[i], rcodes[i]))
+            success = False
+    if success:
+        logger.info(
+            'finished broadcasting {0:.4f} MB of data in {1} files from {2} '
+            'to {3} on {4} nodes in {5:.2f} sec ({6:.3f} Mbit/s local '
+            'egress)'.format(
+                total_size / _MEGABYTE, len(xfer_files), src, dst,
+                len(nodes), diff.total_seconds(),
+                (total_size * nseeds * 8 / 1e6) / diff.total_seconds()))
+
+
 def _spawn_next_transfer(
         method, file, ip, port, username, ssh_private_key, eo, reo,
         procs, psprocs, psdst):
@@ -824,17 +964,348 @@ def _multinode_thread_worker(
     rcodes[node_id] = 0
 
 
-def _azure_blob_storage_transfer(storage_settings, data_transfer, source):
+class _TransferRateLimiter(object):
+    """Token bucket rate limiter shared by all transfer workers"""
+    def __init__(self, rate):
+        # type: (_TransferRateLimiter, int) -> None
+        """Ctor for _TransferRateLimiter
+        :param int rate: rate in bytes per second
+        """
+        self._rate = rate
+        self._tokens = rate
+        self._last = time.time()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes):
+        # type: (_TransferRateLimiter, int) -> None
+        """Consume tokens, blocking until the rate permits
+        :param int nbytes: number of bytes to consume
+        """
+        with self._lock:
+            now = time.time()
+            self._tokens = min(
+                self._rate, self._tokens + (now - self._last) * self._rate)
+            self._last = now
+            self._tokens -= nbytes
+            deficit = -self._tokens
+        if deficit > 0:
+            time.sleep(deficit / self._rate)
+
+
+class _BlobIngressEngine(object):
+    """In-process Azure Blob Storage ingress engine. All sources share one
+    HTTP connection pool and one worker pool, such that concurrency and
+    bandwidth limits are global across all sources. Files larger than the
+    block size are uploaded as blocks in parallel and committed once all
+    blocks are uploaded."""
+    def __init__(self, ingress_settings, blob_client=None):
+        # type: (_BlobIngressEngine, settings.FilesIngressSettings,
+        #        azureblob.BlockBlobService) -> None
+        """Ctor for _BlobIngressEngine
+        :param settings.FilesIngressSettings ingress_settings: settings
+        :param azureblob.BlockBlobService blob_client: blob client to use
+            for all transfers instead of per storage account clients
+        """
+        self._block_size = ingress_settings.block_size_bytes
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=ingress_settings.max_concurrent_transfers)
+        if ingress_settings.max_bandwidth_bytes_per_second is not None:
+            self._limiter = _TransferRateLimiter(
+                ingress_settings.max_bandwidth_bytes_per_second)
+        else:
+            self._limiter = None
+        # transfers are paced by the shared storage connection pool which
+        # is grown to hold a connection per concurrent transfer
+        self._session = util.create_http_session(
+            'storage', maxsize=ingress_settings.max_concurrent_transfers)
+        self._blob_client = blob_client
+        self._clients = {}
+        self._containers = set()
+        self._cond = threading.Condition()
+        self._outstanding = 0
+        self._files_total = 0
+        self._files_done = 0
+        self._bytes_total = 0
+        self._bytes_done = 0
+        self._failures = []
+        self._start = None
+        self._done = threading.Event()
+        self._progress = None
+        self._finalized = False
+
+    def _get_blob_client(self, storage_settings):
+        # type: (_BlobIngressEngine,
+        #        settings.StorageCredentialsSettings) ->
+        #        azureblob.BlockBlobService
+        """Get blob client for storage account sharing the connection pool
+        :param settings.StorageCredentialsSettings storage_settings:
+            storage settings
+        :rtype: azureblob.BlockBlobService
+        :return: blob client
+        """
+        if self._blob_client is not None:
+            return self._blob_client
+        key = (storage_settings.account, storage_settings.endpoint)
+        with self._cond:
+            if key not in self._clients:
+                self._clients[key] = util.configure_storage_client(
+                    azureblob.BlockBlobService(
+                        account_name=storage_settings.account,
+                        account_key=storage_settings.account_key,
+                        endpoint_suffix=storage_settings.endpoint,
+                        request_session=self._session))
+            return self._clients[key]
+
+    def _progress_worker(self):
+        # type: (_BlobIngressEngine) -> None
+        """Periodically log progress"""
+        while not self._done.wait(_INGRESS_PROGRESS_INTERVAL):
+            with self._cond:
+                elapsed = time.time() - self._start
+                logger.info(
+                    'ingress progress: {}/{} files, {:.4f}/{:.4f} MB '
+                    '({:.3f} Mbit/s)'.format(
+                        self._files_done, self._files_total,
+                        self._bytes_done / _MEGABYTE,
+                        self._bytes_total / _MEGABYTE,
+                        (self._bytes_done * 8 / 1e6) / elapsed))
+
+    def _read_range(self, path, offset, length):
+        # type: (_BlobIngressEngine, str, int, int) -> bytes
+        """Read a range from a local file, subject to bandwidth limits
+        :param str path: local path
+        :param int offset: offset
+        :param int length: length
+        :rtype: bytes
+        :return: data
+        """
+        if self._limiter is not None:
+            self._limiter.consume(length)
+        with open(path, 'rb') as f:
+            f.seek(offset, 0)
+            return f.read(length)
+
+    def _complete_bytes(self, nbytes):
+        # type: (_BlobIngressEngine, int) -> None
+        """Account for transferred bytes
+        :param int nbytes: number of bytes
+        """
+        with self._cond:
+            self._bytes_done += nbytes
+
+    def _complete_file(self, entry, error=None):
+        # type: (_BlobIngressEngine, dict, Exception) -> None
+        """Account for a completed file
+        :param dict entry: file entry
+        :param Exception error: error if failed
+        """
+        with self._cond:
+            if error is not None:
+                self._failures.append((entry['path'], error))
+            else:
+                self._files_done += 1
+            self._outstanding -= 1
+            self._cond.notify_all()
+
+    def _upload_whole(self, entry):
+        # type: (_BlobIngressEngine, dict) -> None
+        """Upload a file as a single blob
+        :param dict entry: file entry
+        """
+        try:
+            data = self._read_range(entry['path'], 0, entry['size'])
+            entry['client'].create_blob_from_bytes(
+                entry['container'], entry['name'], data, max_connections=1)
+            self._complete_bytes(len(data))
+        except Exception as exc:
+            logger.error('failed to upload {}: {}'.format(entry['path'], exc))
+            self._complete_file(entry, exc)
+        else:
+            self._complete_file(entry)
+
+    def _upload_block(self, entry, block_id, offset, length):
+        # type: (_BlobIngressEngine, dict, str, int, int) -> None
+        """Upload a block of a file and commit the block list if this is
+        the last outstanding block
+        :param dict entry: file entry
+        :param str block_id: block id
+        :param int offset: offset
+        :param int length: length
+        """
+        commit = False
+        try:
+            if entry['error'] is None:
+                data = self._read_range(entry['path'], offset, length)
+                entry['client'].put_block(
+                    entry['container'], entry['name'], data, block_id)
+                self._complete_bytes(len(data))
+        except Exception as exc:
+            logger.error('failed to upload block {} of {}: {}'.format(
+                block_id, entry['path'], exc))
+            entry['error'] = exc
+        with entry['lock']:
+            entry['remaining'] -= 1
+            commit = entry['remaining'] == 0
+        if not commit:
+            return
+        if entry['error'] is not None:
+            self._complete_file(entry, entry['error'])
+            return
+        try:
+            entry['client'].put_block_list(
+                entry['container'], entry['name'],
+                [azureblob.BlobBlock(id=x) for x in entry['blocks']])
+        except Exception as exc:
+            logger.error('failed to commit block list for {}: {}'.format(
+                entry['path'], exc))
+            self._complete_file(entry, exc)
+        else:
+            self._complete_file(entry)
+
+    def _submit_file(self, client, container, name, path, size):
+        # type: (_BlobIngressEngine, azureblob.BlockBlobService, str, str,
+        #        str, int) -> None
+        """Submit a file for upload
+        :param azureblob.BlockBlobService client: blob client
+        :param str container: container
+        :param str name: blob name
+        :param str path: local path
+        :param int size: file size
+        """
+        entry = {
+            'client': client,
+            'container': container,
+            'name': name,
+            'path': path,
+            'size': size,
+            'error': None,
+        }
+        with self._cond:
+            self._outstanding += 1
+            self._files_total += 1
+            self._bytes_total += size
+        if size <= self._block_size:
+            self._executor.submit(self._upload_whole, entry)
+            return
+        nblocks = int(math.ceil(size / self._block_size))
+        entry['lock'] = threading.Lock()
+        entry['remaining'] = nblocks
+        entry['blocks'] = [
+            util.base64_encode_string(
+                util.encode_string('{0:08d}'.format(i)))
+            for i in range(0, nblocks)
+        ]
+        for i in range(0, nblocks):
+            offset = i * self._block_size
+            self._executor.submit(
+                self._upload_block, entry, entry['blocks'][i], offset,
+                min((self._block_size, size - offset)))
+
+    def submit(self, storage_settings, data_transfer, source):
+        # type: (_BlobIngressEngine, settings.StorageCredentialsSettings,
+        #        settings.DataTransferSettings,
+        #        settings.SourceSettings) -> None
+        """Submit a source for ingress
+        :param settings.StorageCredentialsSettings storage_settings:
+            storage settings
+        :param settings.DataTransferSettings data_transfer: data transfer
+            settings
+        :param settings.SourceSettings source: source settings
+        """
+        if self._start is None:
+            self._start = time.time()
+            self._progress = threading.Thread(target=self._progress_worker)
+            self._progress.daemon = True
+            self._progress.start()
+        client = self._get_blob_client(storage_settings)
+        rp = data_transfer.remote_path.strip('/').split('/')
+        container = rp[0]
+        vdir = '/'.join(rp[1:])
+        if (id(client), container) not in self._containers:
+            client.create_container(container, fail_on_exist=False)
+            self._containers.add((id(client), container))
+        logger.info('begin ingressing data from {} to remote path {}'.format(
+            source.path, data_transfer.remote_path))
+        psrc = pathlib.Path(source.path)
+        if psrc.is_file():
+            files = [(psrc.name, str(psrc), psrc.stat().st_size)]
+        else:
+            files = []
+            for entry in util.scantree(str(psrc)):
+                rel = pathlib.Path(entry.path).relative_to(psrc).as_posix()
+                if (util.is_not_empty(source.include) and
+                        not any(fnmatch.fnmatch(rel, x)
+                                for x in source.include)):
+                    continue
+                if (util.is_not_empty(source.exclude) and
+                        any(fnmatch.fnmatch(rel, x)
+                            for x in source.exclude)):
+                    continue
+                files.append((rel, entry.path, entry.stat().st_size))
+        for rel, path, size in files:
+            name = '{}/{}'.format(vdir, rel) if len(vdir) > 0 else rel
+            self._submit_file(client, container, name, path, size)
+
+    def join(self, timeout=None):
+        # type: (_BlobIngressEngine, float) -> None
+        """Wait for all submitted transfers to complete
+        :param float timeout: timeout in seconds
+        """
+        with self._cond:
+            if timeout is None:
+                while self._outstanding > 0:
+                    self._cond.wait()
+            elif self._outstanding > 0:
+                self._cond.wait(timeout)
+            if self._outstanding > 0 or self._finalized:
+                return
+            self._finalized = True
+        self._done.set()
+        self._executor.shutdown(wait=True)
+        if self._start is None:
+            return
+        diff = max((time.time() - self._start, 1e-6))
+        if len(self._failures) > 0:
+            for path, exc in self._failures:
+                logger.error('data ingress failed for {}: {}'.format(
+                    path, exc))
+        logger.info(
+            'finished ingressing {0:.4f} MB of data in {1}/{2} files to '
+            'Azure Blob Storage in {3:.2f} sec ({4:.3f} Mbit/s)'.format(
+                self._bytes_done / _MEGABYTE, self._files_done,
+                self._files_total, diff,
+                (self._bytes_done * 8 / 1e6) / diff))
+
+    def is_alive(self):
+        # type: (_BlobIngressEngine) -> bool
+        """Check if transfers are outstanding
+        :rtype: bool
+        :return: if transfers are outstanding
+        """
+        with self._cond:
+            return self._outstanding > 0
+
+
+def _azure_blob_storage_transfer(
+        storage_settings, data_transfer, source, engine):
     # type: (settings.StorageCredentialsSettings,
     #        settings.DataTransferSettings,
-    #        settings.SourceSettings) -> None
+    #        settings.SourceSettings, _BlobIngressEngine) -> threading.Thread
     """Initiate an azure blob storage transfer
     :param settings.StorageCredentialsSettings storage_settings:
         storage settings
     :param settings.DataTransferSettings data_transfer: data transfer settings
     :param settings.SourceSettings source: source settings
+    :param _BlobIngressEngine engine: in-process ingress engine
+    :rtype: threading.Thread
+    :return: blobxfer thread or None if submitted to the engine
     """
     eo = data_transfer.blobxfer_extra_options
+    # transfers to blob storage without extra options are performed
+    # in-process, otherwise defer to blobxfer
+    if not data_transfer.is_file_share and util.is_none_or_empty(eo):
+        engine.submit(storage_settings, data_transfer, source)
+        return None
     # append appropriate option for fshare
     if data_transfer.is_file_share and '--mode file' not in eo:
         eo = '--mode file {}'.format(eo)
@@ -900,30 +1371,25 @@ def _wrap_blobxfer_subprocess(storage_settings, remote_path, source, eo):
 
 def wait_for_storage_threads(storage_threads):
     # type: (list) -> None
-    """Wait for storage processes to complete
-    :param list storage_threads: list of storage threads
+    """Wait for storage transfers to complete
+    :param list storage_threads: list of storage threads or ingress engines
     """
-    if storage_threads is None:
+    if util.is_none_or_empty(storage_threads):
         return
-    i = 0
     nthreads = len(storage_threads)
-    while nthreads > 0:
-        alive = sum(thr.is_alive() for thr in storage_threads)
-        if alive > 0:
-            i += 1
-            if i % 10 == 0:
-                i = 0
-                logger.debug(
-                    'waiting for Azure Blob Storage transfer processes '
-                    'to complete: {} active, {} completed'.format(
-                        alive, nthreads - alive))
-            time.sleep(1)
-        else:
-            for thr in storage_threads:
-                thr.join()
-            if nthreads > 0:
-                logger.info('Azure Blob/File Storage transfer completed')
-            break
+    for thr in storage_threads:
+        while True:
+            thr.join(_INGRESS_PROGRESS_INTERVAL)
+            if not thr.is_alive():
+                break
+            alive = sum(x.is_alive() for x in storage_threads)
+            logger.debug(
+                'waiting for Azure Blob Storage transfers to complete: '
+                '{} active, {} completed'.format(alive, nthreads - alive))
+    # finalize
+    for thr in storage_threads:
+        thr.join()
+    logger.info('Azure Blob/File Storage transfer completed')
 
 
 def ingress_data(
@@ -952,6 +1418,7 @@ def ingress_data(
     if util.is_none_or_empty(files):
         logger.info('no files to ingress detected')
         return storage_threads
+    engine = None
     pool = settings.pool_settings(config)
     is_windows = settings.is_windows_pool(config)
     for fdict in files:
@@ -963,6 +1430,7 @@ def ingress_data(
                 'cannot specify both shared data volume and storage for the '
                 'destination for source: {}'.format(source.path))
         direct_single_node = False
+        direct_broadcast = False
         if dest.relative_destination_path is not None:
             if dest.storage_account_settings is not None:
                 raise RuntimeError(
@@ -971,7 +1439,9 @@ def ingress_data(
                     'instead.')
             # check if this is going to a single vm
             if dest.shared_data_volume is None:
-                if total_vm_count == 1:
+                if dest.data_transfer.method == 'broadcast+ssh':
+                    direct_broadcast = True
+                elif total_vm_count == 1:
                     direct_single_node = True
                 elif kind == 'storage':
                     # this is to prevent total_vm_count check below for
@@ -985,8 +1455,14 @@ def ingress_data(
                         'Cannot ingress data directly into compute node '
                         'host for pools with more than one node. Please use '
                         'a shared data volume as the ingress destination '
-                        'instead.')
-        if dest.shared_data_volume is not None or direct_single_node:
+                        'or the broadcast+ssh transfer method instead.')
+        elif dest.data_transfer.method == 'broadcast+ssh':
+            raise RuntimeError(
+                'broadcast+ssh transfer method requires a '
+                'relative_destination_path for source: {}'.format(
+                    source.path))
+        if (dest.shared_data_volume is not None or direct_single_node or
+                direct_broadcast):
             if kind == 'storage':
                 logger.warning(
                     'skipping data ingress from {} to {} for pool as ingress '
@@ -1005,7 +1481,7 @@ def ingress_data(
             dst = '{}/batch/tasks/mounts'.format(
                 settings.temp_disk_mountpoint(config))
             # convert shared to actual path
-            if not direct_single_node:
+            if not direct_single_node and not direct_broadcast:
                 sdv = settings.global_resources_shared_data_volumes(config)
                 for sdvkey in sdv:
                     if sdvkey == dest.shared_data_volume:
@@ -1096,6 +1572,16 @@ def ingress_data(
                     _singlenode_transfer(
                         dest, source.path, dst, username, ssh_private_key,
                         rls)
+            elif dest.data_transfer.method == 'broadcast+ssh':
+                node_ips = {}
+                for node in batch_client.compute_node.list(
+                        pool.id,
+                        compute_node_list_options=batchmodels.
+                        ComputeNodeListOptions(select='id,ipAddress')):
+                    node_ips[node.id] = node.ip_address
+                _broadcast_transfer(
+                    dest, source, dst, username, ssh_private_key, rls,
+                    node_ips)
             elif (dest.data_transfer.method == 'multinode_scp' or
                   dest.data_transfer.method == 'multinode_rsync+ssh'):
                 _multinode_transfer(
@@ -1113,12 +1599,18 @@ def ingress_data(
                     'to Azure Blob/File Storage not specified'.format(
                         source.path))
                 continue
+            if engine is None:
+                engine = _BlobIngressEngine(
+                    settings.global_resources_files_ingress_settings(config))
             thr = _azure_blob_storage_transfer(
                 settings.credentials_storage(
                     config, dest.storage_account_settings),
-                dest.data_transfer, source)
-            storage_threads.append(thr)
+                dest.data_transfer, source, engine)
+            if thr is not None:
+                storage_threads.append(thr)
         else:
             raise RuntimeError(
                 'invalid file transfer configuration: {}'.format(fdict))
+    if engine is not None:
+        storage_threads.append(engine)
     return storage_threads
@@ -0,0 +1,224 @@
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# compat imports
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+from builtins import (  # noqa
+    bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
+    next, oct, open, pow, round, super, filter, map, zip)
+# stdlib imports
+import base64
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+# non-stdlib imports
+# local imports
+
+# global defines
+_RANGED_DOWNLOAD_THRESHOLD = 67108864
+_RANGED_DOWNLOAD_CHUNK_SIZE = 16777216
+_MAX_RANGED_DOWNLOAD_WORKERS = 8
+_MAX_RANGE_RETRIES = 3
+_PROGRESS_SUFFIX = '.shipyard-progress'
+_MD5_BLOCK_SIZE = 4194304
+
+
+def _progress_path(fp):
+    # type: (str) -> str
+    """Get the sidecar progress record path for a file
+    :param str fp: file path
+    :rtype: str
+    :return: progress record path
+    """
+    return fp + _PROGRESS_SUFFIX
+
+
+def _load_progress(fp, size, chunk_size, last_modified):
+    # type: (str, int, int, str) -> set
+    """Load completed chunks from a sidecar progress record if it matches
+    the remote file
+    :param str fp: file path
+    :param int size: file size
+    :param int chunk_size: chunk size
+    :param str last_modified: last modified time of remote file
+    :rtype: set
+    :return: completed chunk indices
+    """
+    pfp = _progress_path(fp)
+    if not os.path.exists(pfp) or not os.path.exists(fp):
+        return set()
+    try:
+        with open(pfp, 'r') as f:
+            progress = json.load(f)
+    except ValueError:
+        return set()
+    if (progress.get('size') != size or
+            progress.get('chunk_size') != chunk_size or
+            progress.get('last_modified') != last_modified or
+            os.path.getsize(fp) != size):
+        return set()
+    return set(progress.get('completed', []))
+
+
+def _save_progress(fp, size, chunk_size, last_modified, completed):
+    # type: (str, int, int, str, set) -> None
+    """Atomically save a sidecar progress record
+    :param str fp: file path
+    :param int size: file size
+    :param int chunk_size: chunk size
+    :param str last_modified: last modified time of remote file
+    :param set completed: completed chunk indices
+    """
+    pfp = _progress_path(fp)
+    tmp = pfp + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({
+            'size': size,
+            'chunk_size': chunk_size,
+            'last_modified': last_modified,
+            'completed': sorted(completed),
+        }, f)
+    try:
+        os.replace(tmp, pfp)
+    except AttributeError:
+        # python 2 does not have an atomic replace
+        if os.path.exists(pfp):
+            os.remove(pfp)
+        os.rename(tmp, pfp)
+
+
+def _compute_md5(fp):
+    # type: (str) -> str
+    """Compute the base64-encoded MD5 of a file
+    :param str fp: file path
+    :rtype: str
+    :return: base64 md5
+    """
+    md5 = hashlib.md5()
+    with open(fp, 'rb') as f:
+        while True:
+            data = f.read(_MD5_BLOCK_SIZE)
+            if not data:
+                break
+            md5.update(data)
+    return base64.b64encode(md5.digest()).decode('ascii')
+
+
+def _download_range(get_range, fp, start, end):
+    # type: (Callable, str, int, int) -> None
+    """Download a byte range into a preallocated file, retrying on errors
+    :param callable get_range: function taking an ocp range and returning
+        an iterable of bytes
+    :param str fp: file path
+    :param int start: start offset, inclusive
+    :param int end: end offset, inclusive
+    """
+    attempts = 0
+    while True:
+        try:
+            with open(fp, 'r+b') as f:
+                f.seek(start)
+                for data in get_range('bytes={}-{}'.format(start, end)):
+                    f.write(data)
+            return
+        except Exception:
+            attempts += 1
+            if attempts > _MAX_RANGE_RETRIES:
+                raise
+
+
+def download_file(
+        get_range, fp, size, last_modified=None, content_md5=None,
+        chunk_size=_RANGED_DOWNLOAD_CHUNK_SIZE):
+    # type: (Callable, pathlib.Path, int, str, str, int) -> None
+    """Download a file. Files larger than the ranged download threshold are
+    split into byte ranges that are fetched concurrently into a
+    preallocated file and may be resumed from a sidecar progress record.
+    :param callable get_range: function taking an ocp range (or None for
+        the entire file) and returning an iterable of bytes
+    :param pathlib.Path fp: file path
+    :param int size: file size, or None if unknown
+    :param str last_modified: last modified time of the remote file
+    :param str content_md5: base64-encoded md5 to verify, if known
+    :param int chunk_size: range size
+    """
+    fp = str(fp)
+    if size is None or size < _RANGED_DOWNLOAD_THRESHOLD:
+        with open(fp, 'wb') as f:
+            for data in get_range(None):
+                f.write(data)
+    else:
+        completed = _load_progress(fp, size, chunk_size, last_modified)
+        if len(completed) == 0:
+            # preallocate file
+            with open(fp, 'wb') as f:
+                f.truncate(size)
+        lock = threading.Lock()
+        chunks = [
+            x for x in range((size + chunk_size - 1) // chunk_size)
+            if x not in completed
+        ]
+
+        def _chunk_done(index):
+            with lock:
+                completed.add(index)
+                _save_progress(
+                    fp, size, chunk_size, last_modified, completed)
+
+        _save_progress(fp, size, chunk_size, last_modified, completed)
+        if len(chunks) > 0:
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=min(
+                        (len(chunks), _MAX_RANGED_DOWNLOAD_WORKERS))
+            ) as executor:
+                futures = {}
+                for index in chunks:
+                    start = index * chunk_size
+                    end = min((start + chunk_size, size)) - 1
+                    futures[executor.submit(
+                        _download_range, get_range, fp, start, end)] = index
+                # record every completed range so that a failed download
+                # can be resumed
+                error = None
+                for future in concurrent.futures.as_completed(futures):
+                    if future.exception() is not None:
+                        error = future.exception()
+                    else:
+                        _chunk_done(futures[future])
+                if error is not None:
+                    raise error
+        os.remove(_progress_path(fp))
+        # verify size of the ranged download only: a file fetched whole
+        # may still be growing (e.g., live stdout/stderr on a node)
+        if os.path.getsize(fp) != size:
+            raise RuntimeError(
+                'size mismatch for {}: expected {} bytes, got {} '
+                'bytes'.format(fp, size, os.path.getsize(fp)))
+    # verify integrity
+    if content_md5 is not None and _compute_md5(fp) != content_md5:
+        raise RuntimeError('md5 mismatch for {}'.format(fp))
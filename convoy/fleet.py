@@ -30,6 +30,7 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import concurrent.futures
 import logging
 import os
 try:
@@ -61,6 +62,14 @@ logger = logging.getLogger(__name__)
 util.setup_logger(logger)
 # global defines
 _REQUEST_CHUNK_SIZE = 4194304
+_MAX_SSH_SESSIONS = 40
+_IMAGE_INVENTORY_FILE = '.shipyard-image-inventory-{}.json'
+_IMAGE_INVENTORY_TTL = 600
+_IMAGE_INVENTORY_MARKER = '--- image inventory ---'
+_IMAGE_INVENTORY_COMMAND = (
+    'echo "{}" && docker images --digests --format '
+    '"{{{{.ID}}}} {{{{.Digest}}}} {{{{.Repository}}}} {{{{.Tag}}}}"'
+).format(_IMAGE_INVENTORY_MARKER)
 _ROOT_PATH = pathlib.Path(__file__).resolve().parent.parent
 _RESOURCES_PATH = None
 _NVIDIA_DRIVER = {
@@ -1636,10 +1645,32 @@ def _setup_glusterfs(
             batchtask.id, job_id))
 
 
+def _execute_command_on_node_over_ssh(
+        node_id, rls, ssh_private_key, username, command):
+    # type: (str, batchmodels.ComputeNodeGetRemoteLoginSettingsResult,
+    #        pathlib.Path, str, list) -> Tuple[str, int, str, str]
+    """Execute a command on a node over ssh
+    :param str node_id: node id
+    :param batchmodels.ComputeNodeGetRemoteLoginSettingsResult rls:
+        remote login settings of node
+    :param pathlib.Path ssh_private_key: SSH private key
+    :param str username: username
+    :param list command: command
+    :rtype: tuple
+    :return: (node id, return code, stdout, stderr)
+    """
+    proc = crypto.connect_or_exec_ssh_command(
+        rls.remote_login_ip_address, rls.remote_login_port,
+        ssh_private_key, username, sync=False, tty=False,
+        command=command)
+    stdout, stderr = proc.communicate()
+    return node_id, proc.returncode, stdout, stderr
+
+
 def _execute_command_on_pool_over_ssh_with_keyed_output(
-        batch_client, config, pool, desc, cmd):
+        batch_client, config, pool, desc, cmd, log_stdout=False, nodes=None):
     # type: (batchsc.BatchServiceClient, dict, batchmodels.CloudPool, str,
-    #        list) -> dict
+    #        list, bool, List[str]) -> dict
     """Execute a command on all nodes in pool over ssh
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
@@ -1647,6 +1678,8 @@ def _execute_command_on_pool_over_ssh_with_keyed_output(
     :param batchmodels.CloudPool pool: cloud pool
     :param str desc: description of action
     :param list cmd: command
+    :param bool log_stdout: log stdout of each node as it completes
+    :param list nodes: restrict execution to these node ids
     :rtype: dict
     :return: keyed stdout by node id
     """
@@ -1677,48 +1710,39 @@ def _execute_command_on_pool_over_ssh_with_keyed_output(
     command = ['sudo', '/bin/bash -c \'{}\''.format(' && '.join(cmd))]
     if settings.verbose(config):
         logger.debug('executing command: {}'.format(command))
-    # iterate through all nodes
-    nodes = batch_client.compute_node.list(pool.id)
-    procs = {}
+    # execute over a sliding window of ssh sessions across all nodes
+    rls = batch.get_cached_remote_login_settings(
+        batch_client, config, node_ids=nodes)
+    nodes = list(rls.keys())
     stdout = {}
-    stderr = {}
     failures = False
-    for node in nodes:
-        rls = batch_client.compute_node.get_remote_login_settings(
-            pool.id, node.id)
-        procs[node.id] = crypto.connect_or_exec_ssh_command(
-            rls.remote_login_ip_address, rls.remote_login_port,
-            ssh_private_key, username, sync=False, tty=False,
-            command=command)
-        if len(procs) >= 40:
-            logger.debug('waiting for {} processes to complete'.format(
-                len(procs)))
-            for key in procs:
-                stdout[key], stderr[key] = procs[key].communicate()
-            rcs, _, _ = util.subprocess_wait_all(
-                list(procs.values()), poll=True)
-            if any([x != 0 for x in rcs]):
-                if settings.verbose(config):
-                    logger.warning('return codes: {}'.format(rcs))
-                    logger.warning('stdout: {}'.format(stdout))
-                    logger.warning('stderr: {}'.format(stderr))
-                failures = True
-            procs = []
-            del rcs
-    if len(procs) > 0:
-        logger.debug('waiting for {} processes to complete'.format(
-            len(procs)))
-        for key in procs:
-            stdout[key], stderr[key] = procs[key].communicate()
-        rcs, _, _ = util.subprocess_wait_all(list(procs.values()), poll=True)
-        if any([x != 0 for x in rcs]):
-            if settings.verbose(config):
-                logger.warning('return codes: {}'.format(rcs))
-                logger.warning('stdout: {}'.format(stdout))
-                logger.warning('stderr: {}'.format(stderr))
-            failures = True
-        del procs
-        del rcs
+    if len(nodes) > 0:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min((len(nodes), _MAX_SSH_SESSIONS))) as executor:
+            futures = [
+                executor.submit(
+                    _execute_command_on_node_over_ssh, node_id,
+                    rls[node_id], ssh_private_key, username, command)
+                for node_id in nodes
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                node_id, rc, out, err = future.result()
+                stdout[node_id] = out
+                if log_stdout and not settings.raw(config):
+                    _log_node_stdout(pool.id, desc, node_id, out)
+                if rc != 0:
+                    logger.error(
+                        '{} failed on node {} with return code {}'.format(
+                            desc, node_id, rc))
+                    if settings.verbose(config):
+                        logger.warning('stdout: {}'.format(out))
+                        logger.warning('stderr: {}'.format(err))
+                    failures = True
+                else:
+                    logger.debug('{} completed on node {} ({}/{})'.format(
+                        desc, node_id, len(stdout), len(nodes)))
+    if log_stdout and settings.raw(config):
+        _log_stdout_by_nodeid(config, pool.id, desc, stdout)
     if failures:
         raise RuntimeError(
             'failures detected performing {} on pool: {}'.format(
@@ -1728,13 +1752,31 @@ def _execute_command_on_pool_over_ssh_with_keyed_output(
     return stdout
 
 
+def _log_node_stdout(pool_id, desc, node_id, stdout):
+    # type: (str, str, str, str) -> None
+    """Log stdout returned by SSH remote execution on a node
+    :param str pool_id: pool id
+    :param str desc: description
+    :param str node_id: node id
+    :param str stdout: stdout
+    """
+    log = [
+        'stdout for {} on pool {} node id: {}'.format(desc, pool_id, node_id)
+    ]
+    for line in stdout.split('\n'):
+        if len(line) == 0:
+            continue
+        log.append('  >> {}'.format(line))
+    logger.info(os.linesep.join(log))
+
+
 def _log_stdout_by_nodeid(config, pool_id, desc, stdout):
-    # type: (dict, str, str, list) -> None
+    # type: (dict, str, str, dict) -> None
     """Log stdout returned by keyed SSH remote execution
     :param dict config: configuration dict
     :param str pool_id: pool id
     :param str desc: description
-    :param list stdout: keyed stdout by node id
+    :param dict stdout: keyed stdout by node id
     """
     if settings.raw(config):
         raw = {
@@ -1749,16 +1791,8 @@ def _log_stdout_by_nodeid(config, pool_id, desc, stdout):
                 raw['nodes'][key].append(line)
         util.print_raw_json(raw)
     else:
-        log = [
-            'stdout for {} on pool {}'.format(desc, pool_id)
-        ]
         for key in stdout:
-            log.append('* node id: {}'.format(key))
-            for line in stdout[key].split('\n'):
-                if len(line) == 0:
-                    continue
-                log.append('  >> {}'.format(line))
-        logger.info(os.linesep.join(log))
+            _log_node_stdout(pool_id, desc, key, stdout[key])
 
 
 def _docker_system_prune_over_ssh(batch_client, config, volumes):
@@ -1779,9 +1813,9 @@ def _docker_system_prune_over_ssh(batch_client, config, volumes):
     cmd = [
         'docker system prune -f{}'.format(' --volumes' if volumes else '')
     ]
-    stdout = _execute_command_on_pool_over_ssh_with_keyed_output(
-        batch_client, config, pool, desc, cmd)
-    _log_stdout_by_nodeid(config, pool_id, desc, stdout)
+    _execute_command_on_pool_over_ssh_with_keyed_output(
+        batch_client, config, pool, desc, cmd, log_stdout=True)
+    _invalidate_image_inventory(config, pool_id)
 
 
 def _zap_all_container_processes_over_ssh(batch_client, config, remove, stop):
@@ -1805,9 +1839,8 @@ def _zap_all_container_processes_over_ssh(batch_client, config, remove, stop):
     ]
     if remove:
         cmd.append('docker ps -aq -f status=exited | xargs -r docker rm')
-    stdout = _execute_command_on_pool_over_ssh_with_keyed_output(
-        batch_client, config, pool, desc, cmd)
-    _log_stdout_by_nodeid(config, pool_id, desc, stdout)
+    _execute_command_on_pool_over_ssh_with_keyed_output(
+        batch_client, config, pool, desc, cmd, log_stdout=True)
 
 
 def _update_container_images(
@@ -1931,9 +1964,26 @@ def _update_container_images(
         coordcmd.append('chown -R _azbatch:_azbatchgrp {}'.format(
             settings.get_singularity_cachedir(config)))
     if force_ssh:
+        # pull only on nodes lacking the requested docker image digests
+        nodes = None
+        if (util.is_not_empty(docker_images) and
+                util.is_none_or_empty(singularity_images)):
+            nodes = _get_nodes_lacking_images(
+                batch_client, config, pool, coordcmd, docker_images)
+            if len(nodes) == 0:
+                logger.info(
+                    'all nodes in pool {} are up to date'.format(pool_id))
+                return
+        if util.is_not_empty(docker_images):
+            coordcmd.append(_IMAGE_INVENTORY_COMMAND)
         stdout = _execute_command_on_pool_over_ssh_with_keyed_output(
-            batch_client, config, pool, 'update container images', coordcmd)
-        _log_stdout_by_nodeid(config, pool_id, 'uci', stdout)
+            batch_client, config, pool, 'update container images', coordcmd,
+            log_stdout=True, nodes=nodes)
+        if util.is_not_empty(docker_images):
+            inventory = util.load_json_file(
+                _get_image_inventory_path(config, pool_id))
+            _update_image_inventory(
+                config, pool_id, inventory, stdout or {})
         return
     if not is_windows:
         # update taskenv for Singularity
@@ -1995,6 +2045,7 @@ def _update_container_images(
             job_id, batchtask.id, 'stdout.txt'))
     # clean up
     batch_client.job.delete(job_id)
+    _invalidate_image_inventory(config, pool_id)
     if batchtask.execution_info.exit_code != 0:
         raise RuntimeError('update container images job failed')
     logger.info(
@@ -2013,44 +2064,258 @@ def _docker_ps_over_ssh(batch_client, config):
     pool = batch_client.pool.get(pool_id)
     desc = 'docker ps'
     cmd = ['docker ps -a']
-    stdout = _execute_command_on_pool_over_ssh_with_keyed_output(
-        batch_client, config, pool, desc, cmd)
-    _log_stdout_by_nodeid(config, pool_id, desc, stdout)
+    _execute_command_on_pool_over_ssh_with_keyed_output(
+        batch_client, config, pool, desc, cmd, log_stdout=True)
 
 
-def _list_docker_images(batch_client, config):
-    # type: (batchsc.BatchServiceClient, dict) -> None
+def _get_image_inventory_path(config, pool_id):
+    # type: (dict, str) -> pathlib.Path
+    """Get path to the local Docker image inventory cache of a pool
+    :param dict config: configuration dict
+    :param str pool_id: pool id
+    :rtype: pathlib.Path
+    :return: path to image inventory cache
+    """
+    _pool = settings.pool_settings(config)
+    return pathlib.Path(
+        _pool.ssh.generated_file_export_path,
+        _IMAGE_INVENTORY_FILE.format(pool_id))
+
+
+def _invalidate_image_inventory(config, pool_id):
+    # type: (dict, str) -> None
+    """Invalidate the local Docker image inventory cache of a pool
+    :param dict config: configuration dict
+    :param str pool_id: pool id
+    """
+    path = _get_image_inventory_path(config, pool_id)
+    if path.exists():
+        logger.debug('invalidating image inventory cache {}'.format(path))
+        path.unlink()
+
+
+def _normalize_image_repository(repository):
+    # type: (str) -> str
+    """Normalize a Docker image repository to its short form
+    :param str repository: repository
+    :rtype: str
+    :return: normalized repository
+    """
+    for prefix in ('docker.io/library/', 'docker.io/', 'library/'):
+        if repository.startswith(prefix):
+            return repository[len(prefix):]
+    return repository
+
+
+def _split_image_reference(image):
+    # type: (str) -> Tuple[str, str, str]
+    """Split a Docker image reference
+    :param str image: image[:tag] or image@digest
+    :rtype: tuple
+    :return: (normalized repository, tag, digest)
+    """
+    if '@' in image:
+        repository, digest = image.split('@', 1)
+        return _normalize_image_repository(repository), None, digest
+    idx = image.rfind(':')
+    if idx > image.rfind('/'):
+        repository, tag = image[:idx], image[idx + 1:]
+    else:
+        repository, tag = image, 'latest'
+    return _normalize_image_repository(repository), tag, None
+
+
+def _parse_image_inventory(stdout):
+    # type: (str) -> List[dict]
+    """Parse Docker image inventory output of a node
+    :param str stdout: stdout of inventory command
+    :rtype: list
+    :return: list of images or None if no inventory present
+    """
+    images = None
+    for line in stdout.split('\n'):
+        if images is None:
+            if line.strip() == _IMAGE_INVENTORY_MARKER:
+                images = []
+            continue
+        dec = line.split()
+        if len(dec) != 4:
+            continue
+        if (dec[2].startswith('alfpark/batch-shipyard') or
+                dec[2].startswith('alfpark/blobxfer')):
+            continue
+        images.append({
+            'id': dec[0],
+            'digest': None if dec[1] == '<none>' else dec[1],
+            'repository': _normalize_image_repository(dec[2]),
+            'tag': None if dec[3] == '<none>' else dec[3],
+        })
+    return images
+
+
+def _update_image_inventory(config, pool_id, inventory, stdout):
+    # type: (dict, str, dict, dict) -> None
+    """Update and save the Docker image inventory of a pool from keyed
+    inventory command output
+    :param dict config: configuration dict
+    :param str pool_id: pool id
+    :param dict inventory: image inventory
+    :param dict stdout: keyed stdout by node id
+    """
+    now = time.time()
+    for node_id in stdout:
+        images = _parse_image_inventory(stdout[node_id])
+        if images is None:
+            inventory.pop(node_id, None)
+        else:
+            inventory[node_id] = {'timestamp': now, 'images': images}
+    util.save_json_file(
+        _get_image_inventory_path(config, pool_id), inventory)
+
+
+def _collect_image_inventory(batch_client, config, pool, refresh=False):
+    # type: (batchsc.BatchServiceClient, dict, batchmodels.CloudPool,
+    #        bool) -> dict
+    """Collect the Docker image inventory of all nodes in a pool. Cached
+    node inventories younger than the TTL are reused and only the remaining
+    nodes are queried over SSH.
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param dict config: configuration dict
+    :param batchmodels.CloudPool pool: cloud pool
+    :param bool refresh: ignore cached inventories
+    :rtype: dict
+    :return: map of node id -> inventory
+    """
+    if refresh:
+        cache = {}
+    else:
+        cache = util.load_json_file(
+            _get_image_inventory_path(config, pool.id))
+    nodes = [
+        node.id for node in batch_client.compute_node.list(
+            pool.id,
+            compute_node_list_options=batchmodels.ComputeNodeListOptions(
+                select='id'))
+    ]
+    now = time.time()
+    inventory = {}
+    stale = []
+    for node_id in nodes:
+        entry = cache.get(node_id)
+        if (entry is not None and
+                now - entry['timestamp'] < _IMAGE_INVENTORY_TTL):
+            inventory[node_id] = entry
+        else:
+            stale.append(node_id)
+    logger.debug(
+        'image inventory for pool {}: {} cached, {} to query'.format(
+            pool.id, len(inventory), len(stale)))
+    if len(stale) > 0:
+        stdout = _execute_command_on_pool_over_ssh_with_keyed_output(
+            batch_client, config, pool, 'list docker images',
+            [_IMAGE_INVENTORY_COMMAND], nodes=stale)
+        _update_image_inventory(config, pool.id, inventory, stdout or {})
+    elif len(inventory) != len(cache):
+        util.save_json_file(
+            _get_image_inventory_path(config, pool.id), inventory)
+    return inventory
+
+
+def _get_nodes_lacking_images(
+        batch_client, config, pool, coordcmd, docker_images):
+    # type: (batchsc.BatchServiceClient, dict, batchmodels.CloudPool,
+    #        list, list) -> List[str]
+    """Get nodes which lack the digest of any of the given Docker images.
+    The digest of an image specified without one is resolved by first
+    updating a single canary node.
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param dict config: configuration dict
+    :param batchmodels.CloudPool pool: cloud pool
+    :param list coordcmd: update command
+    :param list docker_images: docker images to update
+    :rtype: list
+    :return: sorted list of node ids to update
+    """
+    inventory = _collect_image_inventory(batch_client, config, pool)
+    if len(inventory) == 0:
+        return []
+    refs = [_split_image_reference(x) for x in docker_images]
+    canary = None
+    if any(digest is None for _, _, digest in refs):
+        canary = sorted(inventory)[0]
+        logger.debug('resolving image digests on canary node {}'.format(
+            canary))
+        stdout = _execute_command_on_pool_over_ssh_with_keyed_output(
+            batch_client, config, pool, 'update container images',
+            coordcmd + [_IMAGE_INVENTORY_COMMAND], log_stdout=True,
+            nodes=[canary])
+        _update_image_inventory(
+            config, pool.id, inventory, stdout or {})
+    update = set()
+    for repository, tag, digest in refs:
+        if digest is None:
+            for image in inventory.get(canary, {}).get('images', []):
+                if (image['repository'] == repository and
+                        image['tag'] == tag):
+                    digest = image['digest']
+                    break
+        if digest is None:
+            logger.warning(
+                'could not resolve digest for {}:{}, updating all '
+                'nodes'.format(repository, tag))
+            update.update(inventory)
+            continue
+        for node_id in inventory:
+            if not any(
+                    image['repository'] == repository and
+                    image['digest'] == digest
+                    for image in inventory[node_id]['images']):
+                update.add(node_id)
+    logger.info(
+        '{} of {} nodes in pool {} lack the requested Docker images'.format(
+            len(update), len(inventory), pool.id))
+    return sorted(update)
+
+
+def _list_docker_images(batch_client, config, refresh=False):
+    # type: (batchsc.BatchServiceClient, dict, bool) -> None
     """List Docker images in pool over ssh
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param dict config: configuration dict
+    :param bool refresh: ignore cached image inventories
     """
     pool_id = settings.pool_id(config)
     pool = batch_client.pool.get(pool_id)
-    cmd = ['docker images --format "{{.ID}} {{.Repository}}:{{.Tag}}"']
-    stdout = _execute_command_on_pool_over_ssh_with_keyed_output(
-        batch_client, config, pool, 'list docker images', cmd)
-    # process stdout
+    inventory = _collect_image_inventory(
+        batch_client, config, pool, refresh=refresh)
+    if len(inventory) == 0:
+        logger.warning('no image inventory for pool {}'.format(pool.id))
+        return
+    # process inventory
     node_images = {}
     all_images = {}
-    for key in stdout:
+    digests = {}
+    for key in inventory:
         node_images[key] = set()
-        spout = stdout[key].split('\n')
-        for out in spout:
-            if util.is_not_empty(out):
-                dec = out.split()
-                if (not dec[1].startswith('alfpark/batch-shipyard') and
-                        not dec[1].startswith('alfpark/blobxfer')):
-                    node_images[key].add(dec[0])
-                    if dec[0] not in all_images:
-                        all_images[dec[0]] = dec[1]
+        for image in inventory[key]['images']:
+            node_images[key].add(image['id'])
+            if image['id'] not in all_images:
+                all_images[image['id']] = '{}:{}'.format(
+                    image['repository'], image['tag'])
+            if image['digest'] is not None:
+                digests.setdefault('{}@{}'.format(
+                    image['repository'], image['digest']), set()).add(key)
     # find set intersection among all nodes
     intersecting_images = set.intersection(*list(node_images.values()))
     if settings.raw(config):
         raw = {
             'pool_id': pool.id,
             'common': {},
-            'mismatched': {}
+            'mismatched': {},
+            'missing': {},
         }
         for key in intersecting_images:
             raw['common'][key] = all_images[key]
@@ -2081,6 +2346,17 @@ def _list_docker_images(batch_client, config):
                             ['{} {}'.format(key, all_images[key])
                              for key in diff])
                     ))
+    # find nodes lacking each digest
+    for key in sorted(digests):
+        missing = sorted(set(inventory).difference(digests[key]))
+        if len(missing) == 0:
+            continue
+        if settings.raw(config):
+            raw['missing'][key] = missing
+        else:
+            logger.warning(
+                'Docker image {} missing on {} nodes:{}{}'.format(
+                    key, len(missing), os.linesep, os.linesep.join(missing)))
     if settings.raw(config):
         util.print_raw_json(raw)
 
@@ -3261,15 +3537,16 @@ def action_pool_images_update(
         singularity_image, force_ssh=ssh)
 
 
-def action_pool_images_list(batch_client, config):
-    # type: (batchsc.BatchServiceClient, dict, str, str, bool) -> None
+def action_pool_images_list(batch_client, config, refresh):
+    # type: (batchsc.BatchServiceClient, dict, bool) -> None
     """Action: Pool Images List
     :param azure.batch.batch_service_client.BatchServiceClient batch_client:
         batch client
     :param dict config: configuration dict
+    :param bool refresh: ignore cached image inventories
     """
     _check_batch_client(batch_client)
-    _list_docker_images(batch_client, config)
+    _list_docker_images(batch_client, config, refresh=refresh)
 
 
 def action_pool_stats(batch_client, config, pool_id):
@@ -3512,8 +3789,10 @@ def action_jobs_del_or_term(
     if all_jobs:
         if jobid is not None:
             raise ValueError('cannot specify both --all-jobs and --jobid')
-        batch.delete_or_terminate_all_jobs(
+        job_ids = batch.delete_or_terminate_all_jobs(
             batch_client, config, delete, termtasks=termtasks, wait=wait)
+        if delete:
+            storage.delete_task_resource_files(blob_client, config, job_ids)
     elif all_jobschedules:
         if jobscheduleid is not None:
             raise ValueError(
@@ -3540,9 +3819,11 @@ def action_jobs_del_or_term(
         else:
             autopool = False
         # terminate the jobs
-        batch.delete_or_terminate_jobs(
+        job_ids = batch.delete_or_terminate_jobs(
             batch_client, config, delete, jobid=jobid,
             jobscheduleid=jobscheduleid, termtasks=termtasks, wait=wait)
+        if delete and not autopool:
+            storage.delete_task_resource_files(blob_client, config, job_ids)
         # if autopool, delete the storage
         if autopool:
             storage.cleanup_with_del_pool(blob_client, table_client, config)
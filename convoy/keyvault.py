@@ -30,16 +30,19 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import concurrent.futures
+import copy
 import json
 import logging
+import threading
+import time
 import zlib
-# non-stdlib imports
-import azure.common.credentials
-import azure.keyvault
-import ruamel.yaml
 # local imports
 from . import settings
 from . import util
+# deferred non-stdlib imports
+azurekeyvault = util.LazyModule('azure.keyvault')
+yaml = util.LazyModule('ruamel.yaml')
 
 # create logger
 logger = logging.getLogger(__name__)
@@ -47,6 +50,11 @@ util.setup_logger(logger)
 # global defines
 _SECRET_ENCODED_FORMAT_KEY = 'format'
 _SECRET_ENCODED_FORMAT_VALUE = 'zlib+base64'
+# secrets without an explicit version are refetched after this many seconds
+_SECRET_CACHE_TTL = 300
+_SECRET_CACHE = {}
+_SECRET_CACHE_LOCK = threading.Lock()
+_MAX_PREFETCH_WORKERS = 16
 
 
 def _explode_secret_id(uri):
@@ -68,6 +76,103 @@ def _explode_secret_id(uri):
             'cannot handle keyvault secret id uri: {}'.format(uri))
 
 
+def _get_secret_cache_key(secret_id):
+    # type: (str) -> Tuple[str, str, str]
+    """Get the secret cache key of a secret id
+    :param str secret_id: secret id
+    :rtype: tuple
+    :return: base url, secret name, version
+    """
+    base_url, name, version = _explode_secret_id(secret_id)
+    return base_url.rstrip('/').lower(), name.lower(), version
+
+
+def _invalidate_cached_secret(keyvault_uri, secret_name):
+    # type: (str, str) -> None
+    """Invalidate all cached versions of a secret
+    :param str keyvault_uri: keyvault uri
+    :param str secret_name: secret name
+    """
+    base_url = keyvault_uri.rstrip('/').lower()
+    secret_name = secret_name.lower()
+    with _SECRET_CACHE_LOCK:
+        for key in list(_SECRET_CACHE.keys()):
+            if key[0] == base_url and key[1] == secret_name:
+                _SECRET_CACHE.pop(key)
+
+
+def _get_cached_secret_entry(client, secret_id):
+    # type: (azure.keyvault.KeyVaultClient, str) -> dict
+    """Get a secret cache entry, fetching the secret if it is not cached
+    or has expired. Secrets with an explicit version are immutable and
+    never expire.
+    :param azure.keyvault.KeyVaultClient client: keyvault client
+    :param str secret_id: secret id to retrieve
+    :rtype: dict
+    :return: secret cache entry
+    """
+    key = _get_secret_cache_key(secret_id)
+    now = time.time()
+    with _SECRET_CACHE_LOCK:
+        entry = _SECRET_CACHE.get(key)
+    if entry is not None and (
+            entry['expiry'] is None or entry['expiry'] > now):
+        return entry
+    value = client.get_secret(*_explode_secret_id(secret_id)).value
+    entry = {
+        'value': value,
+        'expiry': None if util.is_not_empty(key[2]) else (
+            now + _SECRET_CACHE_TTL),
+        'parsed': None,
+    }
+    with _SECRET_CACHE_LOCK:
+        _SECRET_CACHE[key] = entry
+    return entry
+
+
+def prefetch_secrets(client, secret_ids):
+    # type: (azure.keyvault.KeyVaultClient, List[str]) -> None
+    """Concurrently fetch secrets into the secret cache
+    :param azure.keyvault.KeyVaultClient client: keyvault client
+    :param list secret_ids: secret ids to fetch
+    """
+    secret_ids = sorted(set(x for x in secret_ids if util.is_not_empty(x)))
+    if client is None or len(secret_ids) == 0:
+        return
+    logger.debug('prefetching {} secrets from keyvault'.format(
+        len(secret_ids)))
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min((len(secret_ids), _MAX_PREFETCH_WORKERS))) as \
+            executor:
+        futures = [
+            executor.submit(_get_cached_secret_entry, client, secid)
+            for secid in secret_ids
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+
+
+def prefetch_job_secrets(client, config):
+    # type: (azure.keyvault.KeyVaultClient, dict) -> None
+    """Concurrently fetch all environment variable secrets referenced by
+    job specifications and their tasks into the secret cache
+    :param azure.keyvault.KeyVaultClient client: keyvault client
+    :param dict config: configuration dict
+    """
+    secids = []
+    for jobspec in settings.job_specifications(config):
+        secids.append(
+            settings.job_environment_variables_keyvault_secret_id(jobspec))
+        tasks = list(jobspec['tasks'])
+        if settings.job_has_merge_task(jobspec):
+            tasks.append(settings.job_merge_task(jobspec))
+        for _task in tasks:
+            secids.append(
+                settings.task_environment_variables_keyvault_secret_id(
+                    _task))
+    prefetch_secrets(client, secids)
+
+
 def fetch_credentials_conf(
         client, keyvault_uri, keyvault_credentials_secret_id):
     # type: (azure.keyvault.KeyVaultClient, str, str) -> dict
@@ -106,7 +211,7 @@ def fetch_credentials_conf(
                         cred.tags[_SECRET_ENCODED_FORMAT_KEY]))
         except KeyError:
             pass
-    return ruamel.yaml.load(cred.value, Loader=ruamel.yaml.RoundTripLoader)
+    return yaml.load(cred.value, Loader=yaml.RoundTripLoader)
 
 
 def store_credentials_conf(client, config, keyvault_uri, secret_name):
@@ -134,9 +239,10 @@ def store_credentials_conf(client, config, keyvault_uri, secret_name):
         keyvault_uri, secret_name, encoded,
         tags={_SECRET_ENCODED_FORMAT_KEY: _SECRET_ENCODED_FORMAT_VALUE}
     )
+    _invalidate_cached_secret(keyvault_uri, secret_name)
     logger.info('keyvault secret id for name {}: {}'.format(
         secret_name,
-        azure.keyvault.KeyVaultId.parse_secret_id(bundle.id).base_id))
+        azurekeyvault.KeyVaultId.parse_secret_id(bundle.id).base_id))
 
 
 def delete_secret(client, keyvault_uri, secret_name):
@@ -153,6 +259,7 @@ def delete_secret(client, keyvault_uri, secret_name):
     logger.info('deleting secret in keyvault {} with name {}'.format(
         keyvault_uri, secret_name))
     client.delete_secret(keyvault_uri, secret_name)
+    _invalidate_cached_secret(keyvault_uri, secret_name)
 
 
 def list_secrets(client, keyvault_uri):
@@ -175,7 +282,8 @@ def list_secrets(client, keyvault_uri):
 
 def get_secret(client, secret_id, value_is_json=False):
     # type: (azure.keyvault.KeyVaultClient, str, bool) -> str
-    """Get secret from KeyVault
+    """Get secret from KeyVault. Secrets are served from a process-wide
+    cache, and parsed values are parsed once per cache entry.
     :param azure.keyvault.KeyVaultClient client: keyvault client
     :param str secret_id: secret id to retrieve
     :param bool value_is_json: expected value is json or yaml
@@ -186,9 +294,12 @@ def get_secret(client, secret_id, value_is_json=False):
         raise RuntimeError(
             'cannot retrieve secret {} with invalid KeyVault client'.format(
                 secret_id))
-    value = client.get_secret(*_explode_secret_id(secret_id)).value
+    entry = _get_cached_secret_entry(client, secret_id)
+    value = entry['value']
     if value_is_json and util.is_not_empty(value):
-        return ruamel.yaml.load(value, Loader=ruamel.yaml.RoundTripLoader)
+        if entry['parsed'] is None:
+            entry['parsed'] = yaml.load(value, Loader=yaml.RoundTripLoader)
+        return copy.deepcopy(entry['parsed'])
     else:
         return value
 
@@ -200,6 +311,17 @@ def parse_secret_ids(client, config):
     :param azure.keyvault.KeyVaultClient client: keyvault client
     :param dict config: configuration dict
     """
+    # resolve all referenced secrets concurrently
+    secids = [settings.credentials_batch_account_key_secret_id(config)]
+    for ssel in settings.iterate_storage_credentials(config):
+        secids.append(settings.credentials_storage_account_key_secret_id(
+            config, ssel))
+    for is_docker in (True, False):
+        for reg in settings.credentials_iterate_registry_servers(
+                config, is_docker):
+            secids.append(settings.credentials_registry_password_secret_id(
+                config, reg, is_docker))
+    prefetch_secrets(client, secids)
     # batch account key
     secid = settings.credentials_batch_account_key_secret_id(config)
     if secid is not None:
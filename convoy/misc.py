@@ -41,6 +41,7 @@ import uuid
 # non-stdlib imports
 import azure.batch.models as batchmodels
 # local imports
+from . import batch
 from . import crypto
 from . import settings
 from . import util
@@ -178,8 +179,9 @@ def tunnel_tensorboard(batch_client, config, jobid, taskid, logdir, image):
             'using: {}'.format(tb[0]))
         image = tb[0]
     # get node remote login settings
-    rls = batch_client.compute_node.get_remote_login_settings(
-        pool.id, task.node_info.node_id)
+    rls = batch.get_cached_remote_login_settings(
+        batch_client, config, node_ids=[task.node_info.node_id],
+        pool_id=task.node_info.pool_id)[task.node_info.node_id]
     # set up tensorboard command
     if settings.is_gpu_pool(pool.vm_size):
         exe = 'nvidia-docker'
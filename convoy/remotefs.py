@@ -41,7 +41,6 @@ except ImportError:
 import socket
 import struct
 # non-stdlib imports
-import azure.mgmt.network.models as networkmodels
 import msrestazure.azure_exceptions
 # local imports
 from . import crypto
@@ -49,6 +48,8 @@ from . import resource
 from . import settings
 from . import storage
 from . import util
+# deferred non-stdlib imports
+networkmodels = util.LazyModule('azure.mgmt.network.models')
 
 # create logger
 logger = logging.getLogger(__name__)
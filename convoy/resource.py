@@ -32,15 +32,14 @@ from builtins import (  # noqa
 # stdlib imports
 import functools
 import logging
-import random
-import time
 # non-stdlib imports
-import azure.mgmt.network.models as networkmodels
-import azure.mgmt.resource.resources.models as rgmodels
 import msrest.exceptions
 import msrestazure.azure_exceptions
 # local imports
 from . import util
+# deferred non-stdlib imports
+networkmodels = util.LazyModule('azure.mgmt.network.models')
+rgmodels = util.LazyModule('azure.mgmt.resource.resources.models')
 
 # create logger
 logger = logging.getLogger(__name__)
@@ -87,6 +86,7 @@ class AsyncOperation(object):
         while True:
             last_status_code = None
             last_error_message = None
+            last_response = None
             if self._noop:
                 return self._op  # will return None
             self._invoke()
@@ -114,9 +114,10 @@ class AsyncOperation(object):
                     raise
                 last_status_code = e.status_code
                 last_error_message = e.message
+                last_response = getattr(e, 'response', None)
             self._op = None
-            # randomly backoff
-            time.sleep(random.randint(1, 3))
+            # backoff, honoring server retry after and throttling
+            util.backoff_for_retry(self._retry_count, response=last_response)
             logger.debug(
                 ('Attempting retry of operation: {}, status={} message="{}" '
                  'retry_count={} max_retries={}').format(
@@ -45,6 +45,7 @@ from . import util
 
 # global defines
 _METADATA_VERSION_NAME = 'batch_shipyard_version'
+_OUTPUT_MANIFEST_PREFIX = '.shipyard-manifests'
 _GLUSTER_DEFAULT_VOLNAME = 'gv0'
 _GLUSTER_ON_COMPUTE_VOLUME = 'gluster_on_compute/{}'.format(
     _GLUSTER_DEFAULT_VOLNAME)
@@ -208,7 +209,7 @@ AADSettings = collections.namedtuple(
     'AADSettings', [
         'directory_id', 'application_id', 'auth_key', 'rsa_private_key_pem',
         'x509_cert_sha1_thumbprint', 'user', 'password', 'endpoint',
-        'token_cache_file', 'authority_url',
+        'token_cache_file', 'authority_url', 'token_cache_enabled',
     ]
 )
 KeyVaultCredentialsSettings = collections.namedtuple(
@@ -236,7 +237,8 @@ BatchShipyardSettings = collections.namedtuple(
     'BatchShipyardSettings', [
         'storage_account_settings', 'storage_entity_prefix',
         'generated_sas_expiry_days', 'use_shipyard_docker_image',
-        'store_timing_metrics',
+        'store_timing_metrics', 'task_resource_file_layout',
+        'task_resource_file_retention_days',
     ]
 )
 DataReplicationSettings = collections.namedtuple(
@@ -265,7 +267,14 @@ DataTransferSettings = collections.namedtuple(
         'method', 'ssh_private_key', 'scp_ssh_extra_options',
         'rsync_extra_options', 'split_files_megabytes',
         'max_parallel_transfers_per_node', 'is_file_share',
-        'remote_path', 'blobxfer_extra_options',
+        'remote_path', 'blobxfer_extra_options', 'broadcast_seed_nodes',
+        'broadcast_fanout',
+    ]
+)
+FilesIngressSettings = collections.namedtuple(
+    'FilesIngressSettings', [
+        'max_concurrent_transfers', 'max_bandwidth_bytes_per_second',
+        'block_size_bytes',
     ]
 )
 JobScheduleSettings = collections.namedtuple(
@@ -292,7 +301,8 @@ UserIdentitySettings = collections.namedtuple(
 TaskFactoryStorageSettings = collections.namedtuple(
     'TaskFactoryStorageSettings', [
         'storage_settings', 'storage_link_name', 'container', 'remote_path',
-        'is_file_share', 'include', 'exclude', 'create_blob_container'
+        'is_file_share', 'include', 'exclude', 'create_blob_container',
+        'use_manifests', 'manifest_prefix',
     ]
 )
 TaskExitOptions = collections.namedtuple(
@@ -431,6 +441,15 @@ def get_metadata_version_name():
     return _METADATA_VERSION_NAME
 
 
+def get_output_manifest_prefix():
+    # type: (None) -> str
+    """Get output manifest virtual directory prefix within a container
+    :rtype: str
+    :return: output manifest prefix
+    """
+    return _OUTPUT_MANIFEST_PREFIX
+
+
 def get_tensorboard_docker_image():
     # type: (None) -> Tuple[str, str]
     """Get tensorboard docker image
@@ -1306,7 +1325,8 @@ def _aad_credentials(
         aad_endpoint = _kv_read_checked(
             service_aad, 'endpoint', default=default_endpoint)
         token_cache = _kv_read_checked(service_aad, 'token_cache', default={})
-        if _kv_read(token_cache, 'eanbled', default=True):
+        token_cache_enabled = _kv_read(token_cache, 'enabled', default=True)
+        if token_cache_enabled:
             token_cache_file = _kv_read_checked(
                 token_cache, 'filename', default=default_token_cache_file)
         else:
@@ -1322,6 +1342,7 @@ def _aad_credentials(
             endpoint=aad_endpoint,
             token_cache_file=token_cache_file,
             authority_url=aad_authority_url,
+            token_cache_enabled=token_cache_enabled,
         )
     else:
         return AADSettings(
@@ -1335,6 +1356,7 @@ def _aad_credentials(
             endpoint=default_endpoint,
             token_cache_file=None,
             authority_url=None,
+            token_cache_enabled=False,
         )
 
 
@@ -1680,12 +1702,30 @@ def batch_shipyard_settings(config):
         store_timing = conf['store_timing_metrics']
     except KeyError:
         store_timing = False
+    trf = _kv_read_checked(conf, 'task_resource_files', default={})
+    trf_layout = _kv_read_checked(trf, 'layout', default='flat').lower()
+    if trf_layout not in ('flat', 'date_bucketed'):
+        raise ValueError(
+            'batch_shipyard:task_resource_files:layout {} is invalid'.format(
+                trf_layout))
+    trf_retention = _kv_read(trf, 'retention_days')
+    if trf_retention is not None:
+        if trf_layout != 'date_bucketed':
+            raise ValueError(
+                'batch_shipyard:task_resource_files:retention_days requires '
+                'the date_bucketed layout')
+        if trf_retention < 1:
+            raise ValueError(
+                'batch_shipyard:task_resource_files:retention_days must be '
+                'at least 1')
     return BatchShipyardSettings(
         storage_account_settings=stlink,
         storage_entity_prefix=sep,
         generated_sas_expiry_days=sasexpiry,
         use_shipyard_docker_image=use_shipyard_image,
         store_timing_metrics=store_timing,
+        task_resource_file_layout=trf_layout,
+        task_resource_file_retention_days=trf_retention,
     )
 
 
@@ -2004,6 +2044,43 @@ def global_resources_files(config):
     return files
 
 
+def global_resources_files_ingress_settings(config):
+    # type: (dict) -> FilesIngressSettings
+    """Get global files ingress settings for transfers originating from
+    the local machine
+    :param dict config: configuration object
+    :rtype: FilesIngressSettings
+    :return: files ingress settings
+    """
+    try:
+        conf = config['global_resources']['files_ingress']
+        if conf is None:
+            raise KeyError()
+    except KeyError:
+        conf = {}
+    mct = _kv_read(conf, 'max_concurrent_transfers')
+    if mct is None or mct <= 0:
+        mct = 32
+    bw = _kv_read(conf, 'max_bandwidth_megabits_per_second')
+    if bw is not None:
+        if bw <= 0:
+            bw = None
+        else:
+            # convert to bytes per second
+            bw = int(bw * 1e6 / 8)
+    bs = _kv_read(conf, 'block_size_megabytes')
+    if bs is None or bs <= 0:
+        bs = 4
+    elif bs > 100:
+        raise ValueError(
+            'files_ingress:block_size_megabytes cannot exceed 100')
+    return FilesIngressSettings(
+        max_concurrent_transfers=mct,
+        max_bandwidth_bytes_per_second=bw,
+        block_size_bytes=int(bs * 1048576),
+    )
+
+
 def is_direct_transfer(filespair):
     # type: (dict) -> bool
     """Determine if src/dst pair for files ingress is a direct compute node
@@ -2091,6 +2168,17 @@ def files_destination_settings(fdict):
             split <<= 20
     except KeyError:
         split = None
+    seeds = _kv_read(data_transfer, 'broadcast_seed_nodes')
+    if seeds is None or seeds <= 0:
+        seeds = 1
+    fanout = _kv_read(data_transfer, 'broadcast_fanout')
+    if fanout is None or fanout <= 0:
+        fanout = 2
+    if method == 'broadcast+ssh' and shared is not None:
+        raise ValueError(
+            'broadcast+ssh transfer method cannot be used with a '
+            'shared_data_volume destination for source: {}'.format(
+                files_source_settings(fdict).path))
     ssh_private_key = _kv_read_checked(data_transfer, 'ssh_private_key')
     if util.is_not_empty(ssh_private_key):
         ssh_private_key = pathlib.Path(ssh_private_key)
@@ -2108,6 +2196,8 @@ def files_destination_settings(fdict):
             rsync_extra_options=rsync_eo,
             split_files_megabytes=split,
             max_parallel_transfers_per_node=mpt,
+            broadcast_seed_nodes=seeds,
+            broadcast_fanout=fanout,
         )
     )
 
@@ -2505,6 +2595,16 @@ def data_blobxfer_extra_options(conf):
     return _kv_read_checked(conf, 'blobxfer_extra_options', default='')
 
 
+def data_create_manifest(conf):
+    # type: (dict) -> bool
+    """Retrieve if an output manifest should be created on egress
+    :param dict conf: configuration object
+    :rtype: bool
+    :return: create output manifest
+    """
+    return _kv_read(conf, 'create_manifest', default=False)
+
+
 def data_include(conf):
     # type: (dict) -> str
     """Retrieve input data include filters
@@ -2622,6 +2722,10 @@ def job_tasks(config, conf):
             if 'file' in _task['task_factory']:
                 az = _task['task_factory']['file']['azure_storage']
                 drp = data_remote_path(az)
+                use_manifests = _kv_read(az, 'use_manifests', default=False)
+                if use_manifests and data_is_file_share(az):
+                    raise ValueError(
+                        'use_manifests is not supported for file shares')
                 tfstorage = TaskFactoryStorageSettings(
                     storage_settings=credentials_storage(
                         config, data_storage_account_settings(az)),
@@ -2631,7 +2735,9 @@ def job_tasks(config, conf):
                     is_file_share=data_is_file_share(az),
                     include=_kv_read_checked(az, 'include'),
                     exclude=_kv_read_checked(az, 'exclude'),
-                    create_blob_container=create_blob_container(az)
+                    create_blob_container=create_blob_container(az),
+                    use_manifests=use_manifests,
+                    manifest_prefix=_OUTPUT_MANIFEST_PREFIX,
                 )
             else:
                 tfstorage = None
@@ -2772,6 +2878,16 @@ def job_environment_variables_keyvault_secret_id(conf):
     return secid
 
 
+def task_environment_variables_keyvault_secret_id(conf):
+    # type: (dict) -> str
+    """Get keyvault env vars secret id of a raw task specification
+    :param dict conf: task configuration object
+    :rtype: str
+    :return: task env vars secret id
+    """
+    return _kv_read_checked(conf, 'environment_variables_keyvault_secret_id')
+
+
 def job_max_task_retries(conf):
     # type: (dict) -> int
     """Get number of times a task should be retried in a particular job
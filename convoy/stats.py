@@ -0,0 +1,298 @@
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# compat imports
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+from builtins import (  # noqa
+    bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
+    next, oct, open, pow, round, super, filter, map, zip)
+# stdlib imports
+import collections
+import datetime
+import math
+# non-stdlib imports
+# local imports
+
+# global defines
+_DEFAULT_RELATIVE_ACCURACY = 0.01
+_DEFAULT_HISTOGRAM_BINS = 10
+_REPORTED_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class QuantileSketch(object):
+    """Mergeable quantile sketch over non-negative values with logarithmic
+    buckets such that any quantile estimate is within a fixed relative
+    accuracy of the true value"""
+    def __init__(self, relative_accuracy=_DEFAULT_RELATIVE_ACCURACY):
+        # type: (QuantileSketch, float) -> None
+        """Ctor for QuantileSketch
+        :param QuantileSketch self: this
+        :param float relative_accuracy: relative accuracy of estimates
+        """
+        self._relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets = collections.defaultdict(int)
+        self._zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        # type: (QuantileSketch, float) -> None
+        """Add a value to the sketch
+        :param QuantileSketch self: this
+        :param float value: value to add
+        """
+        if value <= 0:
+            self._zero_count += 1
+        else:
+            self._buckets[
+                int(math.ceil(math.log(value) / self._log_gamma))] += 1
+        self.count += 1
+
+    def merge(self, other):
+        # type: (QuantileSketch, QuantileSketch) -> None
+        """Merge another sketch into this sketch
+        :param QuantileSketch self: this
+        :param QuantileSketch other: sketch to merge
+        """
+        if other._relative_accuracy != self._relative_accuracy:
+            raise ValueError(
+                'cannot merge sketches with different relative accuracies')
+        for key in other._buckets:
+            self._buckets[key] += other._buckets[key]
+        self._zero_count += other._zero_count
+        self.count += other.count
+
+    def _bucket_value(self, key):
+        # type: (QuantileSketch, int) -> float
+        """Representative value of a bucket
+        :param QuantileSketch self: this
+        :param int key: bucket key
+        :rtype: float
+        :return: value
+        """
+        return 2 * math.pow(self._gamma, key) / (self._gamma + 1)
+
+    def quantile(self, q):
+        # type: (QuantileSketch, float) -> float
+        """Estimate a quantile
+        :param QuantileSketch self: this
+        :param float q: quantile in [0, 1]
+        :rtype: float
+        :return: estimated value at quantile or None if empty
+        """
+        if self.count == 0:
+            return None
+        rank = math.floor(q * (self.count - 1) + 0.5)
+        seen = self._zero_count
+        if seen > rank:
+            return 0.0
+        keys = sorted(self._buckets)
+        for key in keys:
+            seen += self._buckets[key]
+            if seen > rank:
+                break
+        return self._bucket_value(key)
+
+    def histogram(self, lower, upper, bins):
+        # type: (QuantileSketch, float, float, int) -> List[int]
+        """Approximate counts of values in equal-width bins
+        :param QuantileSketch self: this
+        :param float lower: lower bound of first bin
+        :param float upper: upper bound of last bin
+        :param int bins: number of bins
+        :rtype: list
+        :return: count per bin
+        """
+        counts = [0] * bins
+        width = (upper - lower) / bins
+        if width <= 0:
+            counts[0] = self.count
+            return counts
+        counts[0] += self._zero_count
+        for key in self._buckets:
+            index = int((self._bucket_value(key) - lower) / width)
+            counts[min(max(index, 0), bins - 1)] += self._buckets[key]
+        return counts
+
+
+class StreamingStatistics(object):
+    """One-pass accumulator of count, sum, min, max and quantiles"""
+    def __init__(self):
+        # type: (StreamingStatistics) -> None
+        """Ctor for StreamingStatistics
+        :param StreamingStatistics self: this
+        """
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch()
+
+    def add(self, value):
+        # type: (StreamingStatistics, float) -> None
+        """Add a value
+        :param StreamingStatistics self: this
+        :param float value: value to add
+        """
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.sketch.add(value)
+
+    def merge(self, other):
+        # type: (StreamingStatistics, StreamingStatistics) -> None
+        """Merge another accumulator into this accumulator
+        :param StreamingStatistics self: this
+        :param StreamingStatistics other: accumulator to merge
+        """
+        if other.count == 0:
+            return
+        self.count += other.count
+        self.sum += other.sum
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+        self.sketch.merge(other.sketch)
+
+    @property
+    def mean(self):
+        # type: (StreamingStatistics) -> float
+        """Mean of values
+        :param StreamingStatistics self: this
+        :rtype: float
+        :return: mean or None if empty
+        """
+        if self.count == 0:
+            return None
+        return self.sum / self.count
+
+    def quantile(self, q):
+        # type: (StreamingStatistics, float) -> float
+        """Estimate a quantile, clamped to the observed range
+        :param StreamingStatistics self: this
+        :param float q: quantile in [0, 1]
+        :rtype: float
+        :return: estimated value at quantile or None if empty
+        """
+        value = self.sketch.quantile(q)
+        if value is None:
+            return None
+        return min(max(value, self.min), self.max)
+
+    def histogram(self, bins=_DEFAULT_HISTOGRAM_BINS):
+        # type: (StreamingStatistics, int) -> List[Tuple[float, float, int]]
+        """Approximate histogram of values between min and max
+        :param StreamingStatistics self: this
+        :param int bins: number of bins
+        :rtype: list
+        :return: list of (lower bound, upper bound, count)
+        """
+        if self.count == 0:
+            return []
+        counts = self.sketch.histogram(self.min, self.max, bins)
+        width = (self.max - self.min) / bins
+        return [
+            (self.min + i * width, self.min + (i + 1) * width, counts[i])
+            for i in range(bins)
+        ]
+
+    def to_dict(self, bins=_DEFAULT_HISTOGRAM_BINS):
+        # type: (StreamingStatistics, int) -> dict
+        """Convert statistics to a json-serializable dict
+        :param StreamingStatistics self: this
+        :param int bins: number of histogram bins
+        :rtype: dict
+        :return: statistics
+        """
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'percentiles': {
+                'p{}'.format(int(q * 100)): self.quantile(q)
+                for q in _REPORTED_QUANTILES
+            },
+            'histogram': [
+                {'lower': lower, 'upper': upper, 'count': count}
+                for lower, upper, count in self.histogram(bins)
+            ],
+        }
+
+
+def format_timings(title, timings, bins=_DEFAULT_HISTOGRAM_BINS):
+    # type: (str, StreamingStatistics, int) -> List[str]
+    """Format timing statistics in seconds for logging
+    :param str title: title of statistics
+    :param StreamingStatistics timings: timing statistics
+    :param int bins: number of histogram bins
+    :rtype: list
+    :return: formatted lines
+    """
+    log = [
+        '* {}:'.format(title),
+        '  * Mean: {}'.format(datetime.timedelta(seconds=timings.mean)),
+        '  * Min: {}'.format(datetime.timedelta(seconds=timings.min)),
+    ]
+    for q in _REPORTED_QUANTILES:
+        log.append('  * p{}: {}'.format(
+            int(q * 100), datetime.timedelta(seconds=timings.quantile(q))))
+    log.append('  * Max: {}'.format(datetime.timedelta(seconds=timings.max)))
+    if timings.count > 1 and timings.max > timings.min:
+        log.append('  * Histogram:')
+        for lower, upper, count in timings.histogram(bins):
+            log.append('    * {} to {}: {} ({:.2f}%)'.format(
+                datetime.timedelta(seconds=lower),
+                datetime.timedelta(seconds=upper),
+                count, 100 * count / timings.count))
+    return log
+
+
+def format_counts(title, counts):
+    # type: (str, StreamingStatistics) -> List[str]
+    """Format count statistics for logging
+    :param str title: title of statistics
+    :param StreamingStatistics counts: count statistics
+    :rtype: list
+    :return: formatted lines
+    """
+    log = [
+        '* {}:'.format(title),
+        '  * Sum: {}'.format(int(counts.sum)),
+        '  * Mean: {}'.format(counts.mean),
+        '  * Min: {}'.format(counts.min),
+    ]
+    for q in _REPORTED_QUANTILES:
+        log.append('  * p{}: {}'.format(
+            int(q * 100), int(round(counts.quantile(q)))))
+    log.append('  * Max: {}'.format(counts.max))
+    return log
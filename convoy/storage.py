@@ -30,10 +30,19 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import concurrent.futures
 import datetime
 import hashlib
+import json
 import logging
+import os
+try:
+    import pathlib2 as pathlib
+except ImportError:
+    import pathlib
 import re
+import threading
+import time
 # non-stdlib imports
 import azure.common
 import azure.cosmosdb.table as azuretable
@@ -48,6 +57,21 @@ logger = logging.getLogger(__name__)
 util.setup_logger(logger)
 # global defines
 _DEFAULT_SAS_EXPIRY_DAYS = 365 * 30
+# sas keys are reused while at least this much validity remains
+_SAS_CACHE_MIN_REMAINING = datetime.timedelta(days=1)
+_SAS_CACHE = {}
+_SAS_CACHE_LOCK = threading.Lock()
+_CREATED_CONTAINERS = set()
+_MAX_UPLOAD_WORKERS = 8
+_MAX_DELETE_WORKERS = 32
+_DELETE_PAGE_SIZE = 5000
+_DELETE_PROGRESS_INTERVAL = 10
+_MD5_CACHE_FILE = pathlib.Path(
+    os.path.expanduser('~'), '.batch-shipyard', 'md5-cache.json')
+_TASK_RF_BUCKET_FORMAT = '%Y%m%d'
+_TASK_RF_INDEX_DIR = 'index'
+_MD5_CACHE = None
+_MD5_CACHE_LOCK = threading.Lock()
 _STORAGEACCOUNT = None
 _STORAGEACCOUNTKEY = None
 _STORAGEACCOUNTEP = None
@@ -181,6 +205,34 @@ def populate_storage_account_keys_from_aad(storage_mgmt_client, config):
     return modified
 
 
+def _create_blob_client(storage_settings):
+    # type: (StorageCredentialsSettings) -> azureblob.BlockBlobService
+    """Create a blob client using the shared connection pool
+    :param StorageCredentialsSettings storage_settings: storage settings
+    :rtype: azureblob.BlockBlobService
+    :return: blob client
+    """
+    return util.configure_storage_client(azureblob.BlockBlobService(
+        account_name=storage_settings.account,
+        account_key=storage_settings.account_key,
+        endpoint_suffix=storage_settings.endpoint,
+        request_session=util.get_shared_http_session('storage')))
+
+
+def _create_file_client(storage_settings):
+    # type: (StorageCredentialsSettings) -> azurefile.FileService
+    """Create a file client using the shared connection pool
+    :param StorageCredentialsSettings storage_settings: storage settings
+    :rtype: azurefile.FileService
+    :return: file client
+    """
+    return util.configure_storage_client(azurefile.FileService(
+        account_name=storage_settings.account,
+        account_key=storage_settings.account_key,
+        endpoint_suffix=storage_settings.endpoint,
+        request_session=util.get_shared_http_session('storage')))
+
+
 def generate_blob_container_uri(storage_settings, container):
     # type: (StorageCredentialsSettings, str) -> str
     """Create a uri to a blob container
@@ -189,18 +241,64 @@ def generate_blob_container_uri(storage_settings, container):
     :rtype: str
     :return: blob container uri
     """
-    blob_client = azureblob.BlockBlobService(
-        account_name=storage_settings.account,
-        account_key=storage_settings.account_key,
-        endpoint_suffix=storage_settings.endpoint)
+    blob_client = _create_blob_client(storage_settings)
     return '{}://{}/{}'.format(
         blob_client.protocol, blob_client.primary_endpoint, container)
 
 
+def _get_cached_saskey(key):
+    # type: (tuple) -> str
+    """Get a cached saskey if it remains valid for a sufficient duration
+    :param tuple key: cache key
+    :rtype: str
+    :return: saskey or None
+    """
+    with _SAS_CACHE_LOCK:
+        try:
+            saskey, expiry = _SAS_CACHE[key]
+        except KeyError:
+            return None
+    if expiry - datetime.datetime.utcnow() < _SAS_CACHE_MIN_REMAINING:
+        return None
+    return saskey
+
+
+def _set_cached_saskey(key, saskey, expiry):
+    # type: (tuple, str, datetime.datetime) -> None
+    """Cache a saskey
+    :param tuple key: cache key
+    :param str saskey: saskey
+    :param datetime.datetime expiry: expiry of saskey
+    """
+    with _SAS_CACHE_LOCK:
+        _SAS_CACHE[key] = (saskey, expiry)
+
+
+def _container_created(key):
+    # type: (tuple) -> bool
+    """Check if a container or file share was created by this process
+    :param tuple key: container key
+    :rtype: bool
+    :return: if container or file share was created
+    """
+    with _SAS_CACHE_LOCK:
+        return key in _CREATED_CONTAINERS
+
+
+def _set_container_created(key):
+    # type: (tuple) -> None
+    """Mark a container or file share as created by this process
+    :param tuple key: container key
+    """
+    with _SAS_CACHE_LOCK:
+        _CREATED_CONTAINERS.add(key)
+
+
 def create_blob_container_saskey(
         storage_settings, container, kind, create_container=False):
     # type: (StorageCredentialsSettings, str, str, bool) -> str
-    """Create a saskey for a blob container
+    """Create a saskey for a blob container. Saskeys are cached per
+    (account, container, kind) and reused while they remain valid.
     :param StorageCredentialsSettings storage_settings: storage settings
     :param str container: container
     :param str kind: ingress or egress
@@ -208,12 +306,20 @@ def create_blob_container_saskey(
     :rtype: str
     :return: saskey
     """
-    blob_client = azureblob.BlockBlobService(
-        account_name=storage_settings.account,
-        account_key=storage_settings.account_key,
-        endpoint_suffix=storage_settings.endpoint)
+    key = (
+        storage_settings.account, storage_settings.endpoint, 'blob',
+        container, kind,
+    )
+    saskey = _get_cached_saskey(key)
+    create_container = create_container and not _container_created(key[:4])
+    if saskey is not None and not create_container:
+        return saskey
+    blob_client = _create_blob_client(storage_settings)
     if create_container:
         blob_client.create_container(container, fail_on_exist=False)
+        _set_container_created(key[:4])
+    if saskey is not None:
+        return saskey
     if kind == 'ingress':
         perm = azureblob.ContainerPermissions(read=True, list=True)
     elif kind == 'egress':
@@ -221,17 +327,19 @@ def create_blob_container_saskey(
             read=True, write=True, delete=True, list=True)
     else:
         raise ValueError('{} type of transfer not supported'.format(kind))
-    return blob_client.generate_container_shared_access_signature(
-        container, perm,
-        expiry=datetime.datetime.utcnow() +
-        datetime.timedelta(days=_DEFAULT_SAS_EXPIRY_DAYS)
-    )
+    expiry = datetime.datetime.utcnow() + datetime.timedelta(
+        days=_DEFAULT_SAS_EXPIRY_DAYS)
+    saskey = blob_client.generate_container_shared_access_signature(
+        container, perm, expiry=expiry)
+    _set_cached_saskey(key, saskey, expiry)
+    return saskey
 
 
 def create_file_share_saskey(
         storage_settings, file_share, kind, create_share=False):
     # type: (StorageCredentialSettings, str, str, bool) -> str
-    """Create a saskey for a file share
+    """Create a saskey for a file share. Saskeys are cached per
+    (account, file share, kind) and reused while they remain valid.
     :param StorageCredentialsSettings storage_settings: storage settings
     :param str file_share: file share
     :param str kind: ingress or egress
@@ -239,12 +347,20 @@ def create_file_share_saskey(
     :rtype: str
     :return: saskey
     """
-    file_client = azurefile.FileService(
-        account_name=storage_settings.account,
-        account_key=storage_settings.account_key,
-        endpoint_suffix=storage_settings.endpoint)
+    key = (
+        storage_settings.account, storage_settings.endpoint, 'file',
+        file_share, kind,
+    )
+    saskey = _get_cached_saskey(key)
+    create_share = create_share and not _container_created(key[:4])
+    if saskey is not None and not create_share:
+        return saskey
+    file_client = _create_file_client(storage_settings)
     if create_share:
         file_client.create_share(file_share, fail_on_exist=False)
+        _set_container_created(key[:4])
+    if saskey is not None:
+        return saskey
     if kind == 'ingress':
         perm = azurefile.SharePermissions(read=True, list=True)
     elif kind == 'egress':
@@ -252,11 +368,12 @@ def create_file_share_saskey(
             read=True, write=True, delete=True, list=True)
     else:
         raise ValueError('{} type of transfer not supported'.format(kind))
-    return file_client.generate_share_shared_access_signature(
-        file_share, perm,
-        expiry=datetime.datetime.utcnow() +
-        datetime.timedelta(days=_DEFAULT_SAS_EXPIRY_DAYS)
-    )
+    expiry = datetime.datetime.utcnow() + datetime.timedelta(
+        days=_DEFAULT_SAS_EXPIRY_DAYS)
+    saskey = file_client.generate_share_shared_access_signature(
+        file_share, perm, expiry=expiry)
+    _set_cached_saskey(key, saskey, expiry)
+    return saskey
 
 
 def create_saskey(storage_settings, path, file, create, read, write, delete):
@@ -275,10 +392,7 @@ def create_saskey(storage_settings, path, file, create, read, write, delete):
     :return: sas token
     """
     if file:
-        client = azurefile.FileService(
-            account_name=storage_settings.account,
-            account_key=storage_settings.account_key,
-            endpoint_suffix=storage_settings.endpoint)
+        client = _create_file_client(storage_settings)
         perm = azurefile.FilePermissions(
             read=read, create=create, write=write, delete=delete)
         tmp = path.split('/')
@@ -298,10 +412,7 @@ def create_saskey(storage_settings, path, file, create, read, write, delete):
             datetime.timedelta(days=_DEFAULT_SAS_EXPIRY_DAYS)
         )
     else:
-        client = azureblob.BlockBlobService(
-            account_name=storage_settings.account,
-            account_key=storage_settings.account_key,
-            endpoint_suffix=storage_settings.endpoint)
+        client = _create_blob_client(storage_settings)
         perm = azureblob.BlobPermissions(
             read=read, create=create, write=write, delete=delete)
         tmp = path.split('/')
@@ -393,59 +504,337 @@ def populate_global_resource_blobs(blob_client, table_client, config):
         blob_client, table_client, config, pk, dr, 'singularity_images')
 
 
-def _check_file_and_upload(blob_client, file, container):
-    # type: (azure.storage.blob.BlockBlobService, tuple, str) -> None
+def _compute_md5_for_file_cached(file):
+    # type: (pathlib.Path) -> str
+    """Compute the base64 MD5 of a local file, reusing a persistent cache
+    keyed by (path, size, mtime)
+    :param pathlib.Path file: file to compute md5 for
+    :rtype: str
+    :return: base64-encoded md5 for file
+    """
+    global _MD5_CACHE
+    path = os.path.abspath(str(file))
+    st = os.stat(path)
+    with _MD5_CACHE_LOCK:
+        if _MD5_CACHE is None:
+            _MD5_CACHE = util.load_json_file(_MD5_CACHE_FILE)
+        entry = _MD5_CACHE.get(path)
+        if (entry is not None and entry['size'] == st.st_size and
+                entry['mtime'] == st.st_mtime):
+            return entry['md5']
+    md5 = util.compute_md5_for_file(path, True)
+    with _MD5_CACHE_LOCK:
+        _MD5_CACHE[path] = {
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'md5': md5,
+        }
+    return md5
+
+
+def _save_md5_cache():
+    # type: (None) -> None
+    """Save the persistent local file MD5 cache, pruning entries of files
+    which no longer exist"""
+    with _MD5_CACHE_LOCK:
+        if _MD5_CACHE is None:
+            return
+        for path in list(_MD5_CACHE.keys()):
+            if not os.path.exists(path):
+                _MD5_CACHE.pop(path)
+        try:
+            util.save_json_file(_MD5_CACHE_FILE, _MD5_CACHE, mode=0o600)
+        except (IOError, OSError) as ex:
+            logger.debug('could not save md5 cache: {}'.format(ex))
+
+
+def _list_remote_md5s(blob_client, container, names):
+    # type: (azure.storage.blob.BlockBlobService, str, List[str]) -> dict
+    """Get the MD5 of existing blobs with a listing per virtual directory
+    rather than a request per blob
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param str container: container
+    :param list names: blob names
+    :rtype: dict
+    :return: dict of existing blob name -> md5
+    """
+    groups = {}
+    for name in names:
+        groups.setdefault(name[:name.rfind('/') + 1], []).append(name)
+    names = frozenset(names)
+    ret = {}
+    for group in groups.values():
+        try:
+            blobs = blob_client.list_blobs(
+                container, prefix=os.path.commonprefix(group), delimiter='/')
+            for blob in blobs:
+                if blob.name in names and hasattr(blob, 'properties'):
+                    ret[blob.name] = \
+                        blob.properties.content_settings.content_md5
+        except azure.common.AzureMissingResourceHttpError:
+            pass
+    return ret
+
+
+def _check_file_and_upload(blob_client, file, container, remote_md5):
+    # type: (azure.storage.blob.BlockBlobService, tuple, str, str) -> None
     """Upload file to blob storage if necessary
     :param azure.storage.blob.BlockBlobService blob_client: blob client
     :param tuple file: file to upload
     :param str container: blob container ref
+    :param str remote_md5: md5 of existing blob or None if not exists
     """
-    if file[0] is None:
+    md5 = _compute_md5_for_file_cached(file[1])
+    if remote_md5 == md5:
+        logger.debug(
+            'remote file is the same for {}, skipping'.format(file[0]))
         return
-    upload = True
-    # check if blob exists
-    try:
-        prop = blob_client.get_blob_properties(
-            _STORAGE_CONTAINERS[container], file[0])
-        if (prop.properties.content_settings.content_md5 ==
-                util.compute_md5_for_file(file[1], True)):
-            logger.debug(
-                'remote file is the same for {}, skipping'.format(
-                    file[0]))
-            upload = False
-    except azure.common.AzureMissingResourceHttpError:
-        pass
-    if upload:
-        logger.info('uploading file {} as {!r}'.format(file[1], file[0]))
-        blob_client.create_blob_from_path(
-            _STORAGE_CONTAINERS[container], file[0], str(file[1]))
+    logger.info('uploading file {} as {!r}'.format(file[1], file[0]))
+    blob_client.create_blob_from_path(
+        _STORAGE_CONTAINERS[container], file[0], str(file[1]),
+        content_settings=azureblob.ContentSettings(content_md5=md5))
 
 
-def upload_resource_files(blob_client, config, files):
-    # type: (azure.storage.blob.BlockBlobService, dict, List[tuple]) -> dict
+def _upload_files(blob_client, files, container):
+    # type: (azure.storage.blob.BlockBlobService, List[tuple], str) -> None
+    """Upload changed files to blob storage concurrently
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param list files: files to upload
+    :param str container: blob container ref
+    """
+    files = [file for file in files if file[0] is not None]
+    if len(files) == 0:
+        return
+    remote = _list_remote_md5s(
+        blob_client, _STORAGE_CONTAINERS[container],
+        [file[0] for file in files])
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min((len(files), _MAX_UPLOAD_WORKERS))) as executor:
+        futures = [
+            executor.submit(
+                _check_file_and_upload, blob_client, file, container,
+                remote.get(file[0]))
+            for file in files
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+    _save_md5_cache()
+
+
+def upload_resource_files(
+        blob_client, config, files, expiry_days=None, generated=False):
+    # type: (azure.storage.blob.BlockBlobService, dict, List[tuple],
+    #        int, bool) -> dict
     """Upload resource files to blob storage
     :param azure.storage.blob.BlockBlobService blob_client: blob client
     :param dict config: configuration dict
     :param list files: files to upload
+    :param int expiry_days: sas expiry in days
+    :param bool generated: files are generated for a single upload, thus
+        are uploaded directly without change detection or MD5 caching
     :rtype: dict
     :return: sas url dict
     """
+    if generated:
+        for file in files:
+            logger.debug('uploading generated file {} as {!r}'.format(
+                file[1], file[0]))
+            blob_client.create_blob_from_path(
+                _STORAGE_CONTAINERS['blob_resourcefiles'], file[0],
+                str(file[1]), content_settings=azureblob.ContentSettings(
+                    content_md5=util.compute_md5_for_file(file[1], True)))
+    else:
+        _upload_files(blob_client, files, 'blob_resourcefiles')
+    if expiry_days is None:
+        expiry_days = _DEFAULT_SAS_EXPIRY_DAYS
+    expiry = datetime.datetime.utcnow() + datetime.timedelta(
+        days=expiry_days)
     sas_urls = {}
     for file in files:
-        _check_file_and_upload(blob_client, file, 'blob_resourcefiles')
         sas_urls[file[0]] = 'https://{}.blob.{}/{}/{}?{}'.format(
             _STORAGEACCOUNT, _STORAGEACCOUNTEP,
             _STORAGE_CONTAINERS['blob_resourcefiles'], file[0],
             blob_client.generate_blob_shared_access_signature(
                 _STORAGE_CONTAINERS['blob_resourcefiles'], file[0],
                 permission=azureblob.BlobPermissions.READ,
-                expiry=datetime.datetime.utcnow() +
-                datetime.timedelta(days=_DEFAULT_SAS_EXPIRY_DAYS)
+                expiry=expiry
             )
         )
     return sas_urls
 
 
+def _get_task_resource_file_bucket_root(bs):
+    # type: (settings.BatchShipyardSettings) -> str
+    """Get the blob prefix under which date buckets of task resource files
+    are stored
+    :param settings.BatchShipyardSettings bs: batch shipyard settings
+    :rtype: str
+    :return: bucket root prefix
+    """
+    return '{}taskrfb/'.format(bs.storage_entity_prefix)
+
+
+def _get_task_resource_file_index_name(bs, job_id):
+    # type: (settings.BatchShipyardSettings, str) -> str
+    """Get the index blob name for a job's task resource files
+    :param settings.BatchShipyardSettings bs: batch shipyard settings
+    :param str job_id: job id
+    :rtype: str
+    :return: index blob name
+    """
+    return '{}{}/{}.json'.format(
+        _get_task_resource_file_bucket_root(bs), _TASK_RF_INDEX_DIR, job_id)
+
+
+def get_task_resource_file_prefix(bs, job_id, recurring=False):
+    # type: (settings.BatchShipyardSettings, str, bool) -> str
+    """Get the blob prefix for task resource files of a job. The flat
+    layout places all files of a job under a per-job prefix while the
+    date bucketed layout places them under the bucket of the current day.
+    Files of job schedules are referenced by their task map for the life
+    of the schedule and thus always use the flat layout.
+    :param settings.BatchShipyardSettings bs: batch shipyard settings
+    :param str job_id: job id
+    :param bool recurring: files belong to a job schedule
+    :rtype: str
+    :return: blob prefix
+    """
+    if not recurring and bs.task_resource_file_layout == 'date_bucketed':
+        return '{}{}/{}/'.format(
+            _get_task_resource_file_bucket_root(bs),
+            datetime.datetime.utcnow().strftime(_TASK_RF_BUCKET_FORMAT),
+            job_id)
+    return '{}taskrf-{}/'.format(bs.storage_entity_prefix, job_id)
+
+
+def get_task_resource_file_sas_expiry_days(bs, recurring=False):
+    # type: (settings.BatchShipyardSettings, bool) -> int
+    """Get the sas expiry for task resource files. SAS keys never need to
+    outlive the bucket their blob is stored in.
+    :param settings.BatchShipyardSettings bs: batch shipyard settings
+    :param bool recurring: files belong to a job schedule
+    :rtype: int
+    :return: sas expiry in days or None for the default
+    """
+    if recurring or bs.task_resource_file_retention_days is None:
+        return None
+    return bs.task_resource_file_retention_days + 1
+
+
+def _read_task_resource_file_index(blob_client, container, name):
+    # type: (azureblob.BlockBlobService, str, str) -> List[str]
+    """Read a task resource file index blob
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param str container: container
+    :param str name: index blob name
+    :rtype: list
+    :return: blob names in index
+    """
+    try:
+        return json.loads(blob_client.get_blob_to_text(
+            container, name).content)
+    except azure.common.AzureMissingResourceHttpError:
+        return []
+
+
+def update_task_resource_file_index(blob_client, config, job_id, names):
+    # type: (azureblob.BlockBlobService, dict, str, List[str]) -> None
+    """Merge blob names into the task resource file index of a job. This
+    is a no-op for the flat layout.
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param dict config: configuration dict
+    :param str job_id: job id
+    :param list names: blob names to add
+    """
+    bs = settings.batch_shipyard_settings(config)
+    if (bs.task_resource_file_layout != 'date_bucketed' or
+            util.is_none_or_empty(names)):
+        return
+    container = _STORAGE_CONTAINERS['blob_resourcefiles']
+    index = _get_task_resource_file_index_name(bs, job_id)
+    merged = set(_read_task_resource_file_index(
+        blob_client, container, index))
+    merged.update(names)
+    blob_client.create_blob_from_text(
+        container, index, json.dumps(sorted(merged)))
+    logger.debug('task resource file index for job {} has {} blobs'.format(
+        job_id, len(merged)))
+
+
+def delete_task_resource_files(blob_client, config, job_ids):
+    # type: (azureblob.BlockBlobService, dict, List[str]) -> None
+    """Delete task resource files of jobs by their index. This is a no-op
+    for the flat layout.
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param dict config: configuration dict
+    :param list job_ids: job ids
+    """
+    bs = settings.batch_shipyard_settings(config)
+    if (bs.task_resource_file_layout != 'date_bucketed' or
+            util.is_none_or_empty(job_ids)):
+        return
+    container = _STORAGE_CONTAINERS['blob_resourcefiles']
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_MAX_DELETE_WORKERS) as executor:
+        for job_id in job_ids:
+            index = _get_task_resource_file_index_name(bs, job_id)
+            names = _read_task_resource_file_index(
+                blob_client, container, index)
+            if util.is_none_or_empty(names):
+                continue
+            logger.debug(
+                'deleting {} task resource files for job {}'.format(
+                    len(names), job_id))
+            futures = [
+                executor.submit(_delete_blob, blob_client, container, name)
+                for name in names
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+            _delete_blob(blob_client, container, index)
+
+
+def expire_task_resource_files(blob_client, config):
+    # type: (azureblob.BlockBlobService, dict) -> None
+    """Drop date buckets of task resource files, along with indices of jobs
+    which only reference those buckets, which are older than the retention
+    period. This is a no-op if no retention period is set.
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param dict config: configuration dict
+    """
+    bs = settings.batch_shipyard_settings(config)
+    if bs.task_resource_file_retention_days is None:
+        return
+    container = _STORAGE_CONTAINERS['blob_resourcefiles']
+    root = _get_task_resource_file_bucket_root(bs)
+    cutoff = datetime.datetime.utcnow().date() - datetime.timedelta(
+        days=bs.task_resource_file_retention_days)
+    try:
+        # a delimited listing returns one entry per bucket
+        for entry in blob_client.list_blobs(
+                container, prefix=root, delimiter='/'):
+            if not entry.name.endswith('/'):
+                continue
+            try:
+                bucket = datetime.datetime.strptime(
+                    entry.name[len(root):-1], _TASK_RF_BUCKET_FORMAT).date()
+            except ValueError:
+                continue
+            if bucket < cutoff:
+                logger.info(
+                    'expiring task resource file bucket: {}'.format(
+                        entry.name))
+                _delete_blobs(blob_client, container, prefix=entry.name)
+        # an index last written before the cutoff only references
+        # expired buckets
+        for blob in blob_client.list_blobs(
+                container, prefix='{}{}/'.format(root, _TASK_RF_INDEX_DIR)):
+            if blob.properties.last_modified.date() < cutoff:
+                _delete_blob(blob_client, container, blob.name)
+    except azure.common.AzureMissingResourceHttpError:
+        logger.warning('container not found: {}'.format(container))
+
+
 def upload_for_remotefs(blob_client, files):
     # type: (azure.storage.blob.BlockBlobService, List[tuple]) -> List[str]
     """Upload files to blob storage for remote fs
@@ -455,9 +844,9 @@ def upload_for_remotefs(blob_client, files):
     :rtype: list
     :return: list of file urls
     """
+    _upload_files(blob_client, files, 'blob_remotefs')
     ret = []
     for file in files:
-        _check_file_and_upload(blob_client, file, 'blob_remotefs')
         ret.append('https://{}.blob.{}/{}/{}'.format(
             _STORAGEACCOUNT, _STORAGEACCOUNTEP,
             _STORAGE_CONTAINERS['blob_remotefs'], file[0]))
@@ -489,6 +878,75 @@ def delete_storage_containers(
             table_client.delete_table(_STORAGE_CONTAINERS[key])
 
 
+def _delete_blob(blob_client, container, name):
+    # type: (azureblob.BlockBlobService, str, str) -> None
+    """Delete a blob, ignoring blobs which no longer exist
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param str container: container
+    :param str name: blob name
+    """
+    try:
+        blob_client.delete_blob(container, name)
+    except azure.common.AzureMissingResourceHttpError:
+        pass
+
+
+def _log_deletion_progress(kind, source, count, start, done=False):
+    # type: (str, str, int, float, bool) -> None
+    """Log deletion progress and throughput
+    :param str kind: kind of entity deleted
+    :param str source: container or table
+    :param int count: number of entities deleted
+    :param float start: start time
+    :param bool done: deletion is complete
+    """
+    elapsed = time.time() - start
+    logger.info('{} {} {} from {} in {:.2f} sec ({:.1f} {}/sec)'.format(
+        'deleted' if done else 'deleting: progress', count, kind, source,
+        elapsed, count / elapsed if elapsed > 0 else 0, kind))
+
+
+def _delete_blobs(blob_client, container, prefix=None):
+    # type: (azureblob.BlockBlobService, str, str) -> None
+    """Delete blobs in a container page by page with a bounded worker pool.
+    The next page is listed while the deletes of the prior page are in
+    flight.
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param str container: container to delete blobs from
+    :param str prefix: only delete blobs with this prefix
+    """
+    start = time.time()
+    last = start
+    count = 0
+    marker = None
+    futures = []
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_MAX_DELETE_WORKERS) as executor:
+        while True:
+            blobs = blob_client.list_blobs(
+                container, prefix=prefix, num_results=_DELETE_PAGE_SIZE,
+                marker=marker)
+            pending = [
+                executor.submit(_delete_blob, blob_client, container, x.name)
+                for x in blobs
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+                count += 1
+            futures = pending
+            now = time.time()
+            if now - last > _DELETE_PROGRESS_INTERVAL:
+                _log_deletion_progress('blobs', container, count, start)
+                last = now
+            marker = blobs.next_marker
+            if util.is_none_or_empty(marker):
+                break
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+            count += 1
+    _log_deletion_progress('blobs', container, count, start, done=True)
+
+
 def _clear_blobs(blob_client, container):
     # type: (azureblob.BlockBlobService, str) -> None
     """Clear blobs in container
@@ -497,12 +955,9 @@ def _clear_blobs(blob_client, container):
     """
     logger.info('deleting blobs: {}'.format(container))
     try:
-        blobs = blob_client.list_blobs(container)
+        _delete_blobs(blob_client, container)
     except azure.common.AzureMissingResourceHttpError:
         logger.warning('container not found: {}'.format(container))
-    else:
-        for blob in blobs:
-            blob_client.delete_blob(container, blob.name)
 
 
 def _clear_blob_task_resourcefiles(blob_client, container, config):
@@ -513,20 +968,21 @@ def _clear_blob_task_resourcefiles(blob_client, container, config):
     :param dict config: configuration dict
     """
     bs = settings.batch_shipyard_settings(config)
-    envfileloc = '{}taskrf-'.format(bs.storage_entity_prefix)
-    logger.info('deleting blobs with prefix: {}'.format(envfileloc))
-    try:
-        blobs = blob_client.list_blobs(container, prefix=envfileloc)
-    except azure.common.AzureMissingResourceHttpError:
-        logger.warning('container not found: {}'.format(container))
-    else:
-        for blob in blobs:
-            blob_client.delete_blob(container, blob.name)
+    for envfileloc in (
+            '{}taskrf-'.format(bs.storage_entity_prefix),
+            _get_task_resource_file_bucket_root(bs)):
+        logger.info('deleting blobs with prefix: {}'.format(envfileloc))
+        try:
+            _delete_blobs(blob_client, container, prefix=envfileloc)
+        except azure.common.AzureMissingResourceHttpError:
+            logger.warning('container not found: {}'.format(container))
+            break
 
 
 def _clear_table(table_client, table_name, config, pool_id=None):
     # type: (azuretable.TableService, str, dict, str) -> None
-    """Clear table entities
+    """Clear table entities. Entities are grouped into batches of 100 per
+    partition and batches are committed concurrently.
     :param azure.cosmosdb.table.TableService table_client: table client
     :param str table_name: table name
     :param dict config: configuration dict
@@ -535,19 +991,52 @@ def _clear_table(table_client, table_name, config, pool_id=None):
     pk = _construct_partition_key_from_config(config, pool_id=pool_id)
     logger.debug('clearing table (pk={}): {}'.format(pk, table_name))
     ents = table_client.query_entities(
-        table_name, filter='PartitionKey eq \'{}\''.format(pk))
-    # batch delete entities
-    i = 0
+        table_name, filter='PartitionKey eq \'{}\''.format(pk),
+        select='PartitionKey,RowKey')
+    start = time.time()
+    last = start
+    count = 0
+    batches = {}
+    futures = {}
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_MAX_DELETE_WORKERS) as executor:
+        # batch delete entities
+        for ent in ents:
+            bet = batches.setdefault(ent['PartitionKey'], [])
+            bet.append(ent['RowKey'])
+            if len(bet) == 100:
+                batches.pop(ent['PartitionKey'])
+                futures[executor.submit(
+                    _commit_table_delete_batch, table_client, table_name,
+                    ent['PartitionKey'], bet)] = len(bet)
+        for pk in batches:
+            futures[executor.submit(
+                _commit_table_delete_batch, table_client, table_name, pk,
+                batches[pk])] = len(batches[pk])
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+            count += futures[future]
+            now = time.time()
+            if now - last > _DELETE_PROGRESS_INTERVAL:
+                _log_deletion_progress('entities', table_name, count, start)
+                last = now
+    if count > 0:
+        _log_deletion_progress(
+            'entities', table_name, count, start, done=True)
+
+
+def _commit_table_delete_batch(table_client, table_name, pk, rks):
+    # type: (azuretable.TableService, str, str, List[str]) -> None
+    """Commit a batch of entity deletes within a partition
+    :param azure.cosmosdb.table.TableService table_client: table client
+    :param str table_name: table name
+    :param str pk: partition key
+    :param list rks: row keys
+    """
     bet = azuretable.TableBatch()
-    for ent in ents:
-        bet.delete_entity(ent['PartitionKey'], ent['RowKey'])
-        i += 1
-        if i == 100:
-            table_client.commit_batch(table_name, bet)
-            bet = azuretable.TableBatch()
-            i = 0
-    if i > 0:
-        table_client.commit_batch(table_name, bet)
+    for rk in rks:
+        bet.delete_entity(pk, rk)
+    table_client.commit_batch(table_name, bet)
 
 
 def clear_storage_containers(
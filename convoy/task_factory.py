@@ -46,6 +46,7 @@ except ImportError:  # pramga: no cover
 import azure.storage.blob as azureblob
 import azure.storage.file as azurefile
 # local imports
+from . import util
 
 # global defines
 _DEFAULT_SAS_EXPIRY_DAYS = 365 * 30
@@ -187,6 +188,47 @@ def _list_all_files_in_fileshare(client, fileshare):
                 dirs.append(fspath)
 
 
+def _list_blobs_from_manifests(blob_client, storage_settings):
+    # type: (azure.storage.blob.BlockBlobService,
+    #        settings.TaskFactoryStorageSettings) -> str
+    """List blobs recorded in output manifests rather than listing the
+    entire container
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param settings.TaskFactoryStorageSettings storage_settings:
+        storage settings
+    :rtype: str
+    :return: blob name
+    """
+    manifests = blob_client.list_blobs(
+        container_name=storage_settings.container,
+        prefix='{}/'.format(storage_settings.manifest_prefix))
+    for manifest in manifests:
+        text = blob_client.get_blob_to_text(
+            storage_settings.container, manifest.name).content
+        for line in text.splitlines():
+            # md5, size, blob name
+            entry = line.split('\t', 2)
+            if len(entry) == 3:
+                yield entry[2]
+
+
+def _list_blobs(blob_client, storage_settings):
+    # type: (azure.storage.blob.BlockBlobService,
+    #        settings.TaskFactoryStorageSettings) -> str
+    """List blobs in container excluding output manifests
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param settings.TaskFactoryStorageSettings storage_settings:
+        storage settings
+    :rtype: str
+    :return: blob name
+    """
+    prefix = '{}/'.format(storage_settings.manifest_prefix)
+    for blob in blob_client.list_blobs(
+            container_name=storage_settings.container):
+        if not blob.name.startswith(prefix):
+            yield blob.name
+
+
 def _get_storage_entities(task_factory, storage_settings):
     # type: (dict, settings.TaskFactoryStorageSettings) -> TaskSettings
     """Generate a task given a config
@@ -198,24 +240,28 @@ def _get_storage_entities(task_factory, storage_settings):
     """
     if not storage_settings.is_file_share:
         # create blob client
-        blob_client = azureblob.BlockBlobService(
-            account_name=storage_settings.storage_settings.account,
-            account_key=storage_settings.storage_settings.account_key,
-            endpoint_suffix=storage_settings.storage_settings.endpoint)
-        # list blobs in container with include/exclude
-        blobs = blob_client.list_blobs(
-            container_name=storage_settings.container)
-        for blob in blobs:
+        blob_client = util.configure_storage_client(
+            azureblob.BlockBlobService(
+                account_name=storage_settings.storage_settings.account,
+                account_key=storage_settings.storage_settings.account_key,
+                endpoint_suffix=storage_settings.storage_settings.endpoint,
+                request_session=util.get_shared_http_session('storage')))
+        # list blobs in container (or from manifests) with include/exclude
+        if storage_settings.use_manifests:
+            blobs = _list_blobs_from_manifests(blob_client, storage_settings)
+        else:
+            blobs = _list_blobs(blob_client, storage_settings)
+        for blob_name in blobs:
             if not _inclusion_check(
-                    blob.name, storage_settings.include,
+                    blob_name, storage_settings.include,
                     storage_settings.exclude):
                 continue
             file_path_with_container = '{}/{}'.format(
-                storage_settings.container, blob.name)
-            file_name = blob.name.split('/')[-1]
+                storage_settings.container, blob_name)
+            file_name = blob_name.split('/')[-1]
             file_name_no_extension = file_name.split('.')[0]
             if task_factory['file']['task_filepath'] == 'file_path':
-                task_filepath = blob.name
+                task_filepath = blob_name
             elif (task_factory['file']['task_filepath'] ==
                   'file_path_with_container'):
                 task_filepath = file_path_with_container
@@ -233,10 +279,10 @@ def _get_storage_entities(task_factory, storage_settings):
                 storage_settings.storage_settings.account,
                 storage_settings.storage_settings.endpoint,
                 storage_settings.container,
-                urlquote(blob.name))
+                urlquote(blob_name))
             # create blob sas
             sas = blob_client.generate_blob_shared_access_signature(
-                storage_settings.container, blob.name,
+                storage_settings.container, blob_name,
                 permission=azureblob.BlobPermissions.READ,
                 expiry=datetime.datetime.utcnow() +
                 datetime.timedelta(days=_DEFAULT_SAS_EXPIRY_DAYS))
@@ -244,7 +290,7 @@ def _get_storage_entities(task_factory, storage_settings):
                 is_blob=True,
                 url=url,
                 sas=sas,
-                file_path=blob.name,
+                file_path=blob_name,
                 file_path_with_container=file_path_with_container,
                 file_name=file_name,
                 file_name_no_extension=file_name_no_extension,
@@ -252,10 +298,12 @@ def _get_storage_entities(task_factory, storage_settings):
             )
     else:
         # create file share client
-        file_client = azurefile.FileService(
-            account_name=storage_settings.storage_settings.account,
-            account_key=storage_settings.storage_settings.account_key,
-            endpoint_suffix=storage_settings.storage_settings.endpoint)
+        file_client = util.configure_storage_client(
+            azurefile.FileService(
+                account_name=storage_settings.storage_settings.account,
+                account_key=storage_settings.storage_settings.account_key,
+                endpoint_suffix=storage_settings.storage_settings.endpoint,
+                request_session=util.get_shared_http_session('storage')))
         # list files in share with include/exclude
         for file in _list_all_files_in_fileshare(
                 file_client, storage_settings.container):
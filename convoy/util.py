@@ -31,12 +31,20 @@ from builtins import (  # noqa
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
 import base64
+import contextlib
 import copy
 import datetime
+import email.utils
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    import msvcrt
 import hashlib
+import importlib
 import json
 import logging
 import logging.handlers
+import multiprocessing
 import os
 try:
     import pathlib2 as pathlib
@@ -48,8 +56,15 @@ try:
 except ImportError:
     from scandir import scandir as scandir
 import platform
+import random
 import sys
+import threading
 import time
+import weakref
+try:
+    from urllib.parse import urlparse
+except ImportError:  # pragma: no cover
+    from urlparse import urlparse
 # function remaps
 try:
     raw_input
@@ -61,6 +76,26 @@ except NameError:
 _PY2 = sys.version_info.major == 2
 _ON_WINDOWS = platform.system() == 'Windows'
 _REGISTERED_LOGGER_HANDLERS = []
+# shared http connection pools are sized to the widest executor
+_HTTP_POOL_CONNECTIONS = 16
+_HTTP_POOL_MAXSIZE = min((multiprocessing.cpu_count() * 4, 32))
+_HTTP_ADAPTERS = {}
+_HTTP_SESSIONS = {}
+_HTTP_LOCK = threading.Lock()
+# unified retry policy for all Azure clients
+_RETRY_MAX_ATTEMPTS = 20
+_RETRY_BACKOFF_FACTOR = 0.8
+_RETRY_MAX_BACKOFF = 8
+_STORAGE_RETRY_POLICY = None
+# adaptive (AIMD) rate limiting per service endpoint, in requests/second
+_THROTTLE_STATUS_CODES = frozenset((429, 503))
+_RATE_LIMIT_MAX = 2000.0
+_RATE_LIMIT_MIN = 1.0
+_RATE_LIMIT_INCREASE = 2.0
+_RATE_LIMIT_DECREASE = 0.5
+_RATE_LIMIT_DECREASE_INTERVAL = 1.0
+_RATE_LIMITERS = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
 
 
 def on_python2():
@@ -81,6 +116,387 @@ def on_windows():
     return _ON_WINDOWS
 
 
+class LazyModule(object):
+    """Module proxy which defers importing a module until an attribute of
+    the module is first accessed"""
+    def __init__(self, name, package=None):
+        # type: (LazyModule, str, str) -> None
+        """Ctor for LazyModule
+        :param LazyModule self: this
+        :param str name: module name, may be relative to package
+        :param str package: package to resolve a relative name against
+        """
+        self._lazy_name = name
+        self._lazy_package = package
+        self._lazy_module = None
+
+    def __getattr__(self, attr):
+        # type: (LazyModule, str) -> object
+        """Import the module, if required, and get an attribute of it
+        :param LazyModule self: this
+        :param str attr: attribute name
+        :rtype: object
+        :return: module attribute
+        """
+        if attr.startswith('_lazy_'):
+            raise AttributeError(attr)
+        if self._lazy_module is None:
+            self._lazy_module = importlib.import_module(
+                self._lazy_name, self._lazy_package)
+        return getattr(self._lazy_module, attr)
+
+
+# deferred non-stdlib imports
+requests = LazyModule('requests')
+azurestorageretry = LazyModule('azure.storage.common.retry')
+
+
+class _AdaptiveRateLimiter(object):
+    """Additive increase, multiplicative decrease rate limiter for a
+    service endpoint"""
+    def __init__(self):
+        # type: (_AdaptiveRateLimiter) -> None
+        """Ctor for _AdaptiveRateLimiter
+        :param _AdaptiveRateLimiter self: this
+        """
+        self._lock = threading.Lock()
+        self._rate = _RATE_LIMIT_MAX
+        self._next = 0
+        self._blocked_until = 0
+        self._last_decrease = 0
+        self._window_start = 0
+        self._window_count = 0
+        self._observed_rate = None
+
+    @property
+    def rate(self):
+        # type: (_AdaptiveRateLimiter) -> float
+        """Current allowed rate
+        :param _AdaptiveRateLimiter self: this
+        :rtype: float
+        :return: requests per second
+        """
+        return self._rate
+
+    def acquire(self):
+        # type: (_AdaptiveRateLimiter) -> None
+        """Wait until a request may be issued to the endpoint
+        :param _AdaptiveRateLimiter self: this
+        """
+        with self._lock:
+            now = time.time()
+            start = max((now, self._next, self._blocked_until))
+            self._next = start + 1.0 / self._rate
+            # track the rate requests are actually issued at
+            elapsed = start - self._window_start
+            if elapsed >= 1.0:
+                if self._window_start > 0:
+                    self._observed_rate = self._window_count / elapsed
+                self._window_start = start
+                self._window_count = 0
+            self._window_count += 1
+        if start > now:
+            time.sleep(start - now)
+
+    def on_success(self):
+        # type: (_AdaptiveRateLimiter) -> None
+        """Additively increase the rate after a request was not throttled
+        :param _AdaptiveRateLimiter self: this
+        """
+        with self._lock:
+            if self._rate < _RATE_LIMIT_MAX:
+                self._rate = min((
+                    _RATE_LIMIT_MAX,
+                    self._rate + _RATE_LIMIT_INCREASE / self._rate))
+
+    def on_throttle(self, retry_after=None):
+        # type: (_AdaptiveRateLimiter, float) -> None
+        """Multiplicatively decrease the rate after a request was throttled
+        and hold all requests until the server's retry after time
+        :param _AdaptiveRateLimiter self: this
+        :param float retry_after: seconds to hold requests for
+        """
+        with self._lock:
+            now = time.time()
+            # a burst of throttled requests only decreases the rate once
+            if now - self._last_decrease >= _RATE_LIMIT_DECREASE_INTERVAL:
+                rate = self._rate
+                if self._observed_rate is not None:
+                    rate = min((rate, self._observed_rate))
+                self._rate = max((
+                    _RATE_LIMIT_MIN, rate * _RATE_LIMIT_DECREASE))
+                self._last_decrease = now
+            if retry_after is not None:
+                self._blocked_until = max((
+                    self._blocked_until, now + retry_after))
+
+
+def get_rate_limiter(endpoint):
+    # type: (str) -> _AdaptiveRateLimiter
+    """Get the process-wide rate limiter for a service endpoint
+    :param str endpoint: endpoint or request url
+    :rtype: _AdaptiveRateLimiter
+    :return: rate limiter
+    """
+    key = urlparse(endpoint).netloc.lower() or endpoint.lower()
+    with _RATE_LIMITERS_LOCK:
+        if key not in _RATE_LIMITERS:
+            _RATE_LIMITERS[key] = _AdaptiveRateLimiter()
+        return _RATE_LIMITERS[key]
+
+
+def _get_retry_after(response):
+    # type: (requests.Response) -> float
+    """Get the Retry-After time of a response
+    :param requests.Response response: response
+    :rtype: float
+    :return: seconds to wait or None if not specified
+    """
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    if is_none_or_empty(value):
+        return None
+    try:
+        return max((0.0, float(value)))
+    except ValueError:
+        pass
+    date = email.utils.parsedate_tz(value)
+    if date is None:
+        return None
+    return max((0.0, email.utils.mktime_tz(date) - time.time()))
+
+
+def is_throttled_response(response):
+    # type: (requests.Response) -> bool
+    """Check if a response indicates the service is throttling requests
+    :param requests.Response response: response
+    :rtype: bool
+    :return: if throttled
+    """
+    return (response is not None and
+            response.status_code in _THROTTLE_STATUS_CODES)
+
+
+def backoff_for_retry(attempt, response=None, endpoint=None):
+    # type: (int, requests.Response, str) -> None
+    """Wait before retrying an operation with capped exponential backoff
+    and jitter, or longer if the server requested it. Throttled responses,
+    or an explicit overloaded endpoint, reduce the rate of the endpoint.
+    :param int attempt: retry attempt, starting at 1
+    :param requests.Response response: failed response, if any
+    :param str endpoint: endpoint to reduce the rate of
+    """
+    backoff = min((
+        _RETRY_MAX_BACKOFF,
+        _RETRY_BACKOFF_FACTOR * (2 ** (max((attempt, 1)) - 1))))
+    backoff = random.uniform(backoff / 2, backoff)
+    retry_after = _get_retry_after(response)
+    if endpoint is None and is_throttled_response(response):
+        endpoint = response.url
+    if endpoint is not None:
+        get_rate_limiter(endpoint).on_throttle(retry_after)
+    if retry_after is not None:
+        backoff = max((backoff, retry_after))
+    time.sleep(backoff)
+
+
+class _RateLimitedHTTPAdapter(object):
+    """HTTP adapter which paces requests with the rate limiter of each
+    endpoint and optionally retries throttled requests"""
+    def __init__(self, adapter, retry_throttled):
+        # type: (_RateLimitedHTTPAdapter,
+        #        requests.adapters.HTTPAdapter, bool) -> None
+        """Ctor for _RateLimitedHTTPAdapter
+        :param _RateLimitedHTTPAdapter self: this
+        :param requests.adapters.HTTPAdapter adapter: adapter to wrap
+        :param bool retry_throttled: retry throttled requests, otherwise
+            throttled responses are only reported to the rate limiter and
+            returned to the client retry policy
+        """
+        self._adapter = adapter
+        self._retry_throttled = retry_throttled
+
+    @property
+    def max_retries(self):
+        # type: (_RateLimitedHTTPAdapter) -> urllib3.util.retry.Retry
+        """Retry policy of the wrapped adapter
+        :param _RateLimitedHTTPAdapter self: this
+        :rtype: urllib3.util.retry.Retry
+        :return: retry policy
+        """
+        return self._adapter.max_retries
+
+    @max_retries.setter
+    def max_retries(self, value):
+        # type: (_RateLimitedHTTPAdapter, urllib3.util.retry.Retry) -> None
+        """Set retry policy of the wrapped adapter
+        :param _RateLimitedHTTPAdapter self: this
+        :param urllib3.util.retry.Retry value: retry policy
+        """
+        self._adapter.max_retries = value
+
+    def send(self, request, **kwargs):
+        # type: (_RateLimitedHTTPAdapter, requests.PreparedRequest,
+        #        dict) -> requests.Response
+        """Send a request
+        :param _RateLimitedHTTPAdapter self: this
+        :param requests.PreparedRequest request: request
+        :param dict kwargs: send options
+        :rtype: requests.Response
+        :return: response
+        """
+        limiter = get_rate_limiter(request.url)
+        # streamed bodies cannot be replayed
+        replayable = request.body is None or isinstance(
+            request.body, (bytes, bytearray, str))
+        attempt = 0
+        while True:
+            limiter.acquire()
+            response = self._adapter.send(request, **kwargs)
+            if not is_throttled_response(response):
+                limiter.on_success()
+                return response
+            attempt += 1
+            if (not self._retry_throttled or not replayable or
+                    attempt > _RETRY_MAX_ATTEMPTS):
+                limiter.on_throttle(_get_retry_after(response))
+                return response
+            # drain the response to return the connection to the pool
+            response.content
+            response.close()
+            backoff_for_retry(attempt, response=response)
+
+    def grow(self, maxsize):
+        # type: (_RateLimitedHTTPAdapter, int) -> None
+        """Grow the connection pool of the wrapped adapter. Connections of
+        in-flight requests are returned to the pools they were taken from.
+        :param _RateLimitedHTTPAdapter self: this
+        :param int maxsize: minimum number of connections per host
+        """
+        if maxsize > self._adapter._pool_maxsize:
+            self._adapter.init_poolmanager(
+                self._adapter._pool_connections, maxsize,
+                block=self._adapter._pool_block)
+
+    def close(self):
+        # type: (_RateLimitedHTTPAdapter) -> None
+        """Close the wrapped adapter
+        :param _RateLimitedHTTPAdapter self: this
+        """
+        self._adapter.close()
+
+
+def _get_http_adapter(pool, maxsize=None):
+    # type: (str, int) -> _RateLimitedHTTPAdapter
+    """Get the process-wide HTTP adapter for a connection pool
+    :param str pool: connection pool name
+    :param int maxsize: minimum number of connections per host
+    :rtype: _RateLimitedHTTPAdapter
+    :return: http adapter
+    """
+    with _HTTP_LOCK:
+        if pool not in _HTTP_ADAPTERS:
+            # the storage retry policy already retries throttled requests
+            _HTTP_ADAPTERS[pool] = _RateLimitedHTTPAdapter(
+                requests.adapters.HTTPAdapter(
+                    pool_connections=_HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=_HTTP_POOL_MAXSIZE),
+                pool != 'storage')
+        if maxsize is not None:
+            _HTTP_ADAPTERS[pool].grow(maxsize)
+        return _HTTP_ADAPTERS[pool]
+
+
+def create_http_session(pool, maxsize=None):
+    # type: (str, int) -> requests.Session
+    """Create a requests session which shares the keep-alive connections of
+    a process-wide connection pool. Clients which sign or retry through
+    session state (msrest) must each use their own session. The session
+    must not be closed as this closes the shared connection pool.
+    :param str pool: connection pool name
+    :param int maxsize: minimum number of connections per host
+    :rtype: requests.Session
+    :return: requests session
+    """
+    adapter = _get_http_adapter(pool, maxsize=maxsize)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_shared_http_session(pool):
+    # type: (str) -> requests.Session
+    """Get a process-wide requests session for clients which sign each
+    request without modifying the session (Azure Storage)
+    :param str pool: connection pool name
+    :rtype: requests.Session
+    :return: requests session
+    """
+    session = _HTTP_SESSIONS.get(pool)
+    if session is None:
+        session = create_http_session(pool)
+        with _HTTP_LOCK:
+            session = _HTTP_SESSIONS.setdefault(pool, session)
+    return session
+
+
+def storage_retry(context):
+    # type: (azure.storage.common.models.RetryContext) -> float
+    """Unified retry policy for Azure Storage clients: exponential backoff
+    capped at the same maximum as msrest-based clients
+    :param azure.storage.common.models.RetryContext context: retry context
+    :rtype: float
+    :return: seconds to wait before retrying or None to not retry
+    """
+    global _STORAGE_RETRY_POLICY
+    if _STORAGE_RETRY_POLICY is None:
+        _STORAGE_RETRY_POLICY = azurestorageretry.ExponentialRetry(
+            initial_backoff=_RETRY_BACKOFF_FACTOR, increment_base=2,
+            max_attempts=_RETRY_MAX_ATTEMPTS, random_jitter_range=1)
+    backoff = _STORAGE_RETRY_POLICY.retry(context)
+    if backoff is None:
+        return None
+    return min((backoff, _RETRY_MAX_BACKOFF))
+
+
+def configure_storage_client(client):
+    # type: (azure.storage.common.storageclient.StorageClient) ->
+    #        azure.storage.common.storageclient.StorageClient
+    """Apply the unified retry policy to an Azure Storage client. The
+    client should be created with the shared storage request session.
+    :param azure.storage.common.storageclient.StorageClient client: client
+    :rtype: azure.storage.common.storageclient.StorageClient
+    :return: client
+    """
+    client.retry = storage_retry
+    return client
+
+
+def configure_msrest_client(client):
+    # type: (Any) -> None
+    """Apply the unified retry policy to an msrest-based client and keep
+    its connections alive in the shared connection pool
+    :param Any client: msrest-based client
+    """
+    client.config.retry_policy.retries = _RETRY_MAX_ATTEMPTS
+    client.config.retry_policy.backoff_factor = _RETRY_BACKOFF_FACTOR
+    client.config.retry_policy.max_backoff = _RETRY_MAX_BACKOFF
+    # throttled requests are retried by the rate limited adapter
+    policy = client.config.retry_policy.policy
+    policy.status_forcelist = [
+        x for x in policy.status_forcelist
+        if x not in _THROTTLE_STATUS_CODES
+    ]
+    policy.respect_retry_after_header = False
+    client.config.keep_alive = True
+    # msrest signs its session per client, so only the pool is shared
+    service_client = getattr(client, '_client', None)
+    if service_client is not None and hasattr(service_client, '_session'):
+        service_client._session = create_http_session('msrest')
+
+
 def setup_logger(logger, logfile=None):
     # type: (logger, str) -> None
     """Set up logger"""
@@ -273,6 +689,49 @@ def print_raw_json(raw):
     print(json.dumps(raw, ensure_ascii=False, indent=2, sort_keys=True))
 
 
+def load_json_file(path):
+    # type: (pathlib.Path) -> dict
+    """Load a local json file, treating a missing or corrupt file as empty
+    :param pathlib.Path path: path to json file
+    :rtype: dict
+    :return: loaded json
+    """
+    try:
+        with open(str(path), 'r') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def save_json_file(path, obj, mode=None):
+    # type: (pathlib.Path, dict, int) -> None
+    """Atomically save a local json file
+    :param pathlib.Path path: path to json file
+    :param dict obj: object to serialize
+    :param int mode: file mode of a private file, the parent directory is
+        then only accessible by the owner
+    """
+    path = pathlib.Path(path)
+    if mode is None:
+        path.parent.mkdir(mode=0o750, parents=True, exist_ok=True)
+        tmp = str(path) + '.tmp'
+        f = open(tmp, 'w')
+    else:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        f = os.fdopen(
+            os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), 'w')
+    with f:
+        f.write(json.dumps(obj, ensure_ascii=False, sort_keys=True))
+    try:
+        os.replace(tmp, str(path))
+    except AttributeError:
+        # python 2 does not have an atomic replace
+        if path.exists():
+            path.unlink()
+        os.rename(tmp, str(path))
+
+
 def scantree(path):
     # type: (str) -> os.DirEntry
     """Recursively scan a directory tree
@@ -410,6 +869,36 @@ def convert_string_to_timedelta(string):
     return datetime.timedelta(days, totsec)
 
 
+@contextlib.contextmanager
+def file_lock(path):
+    # type: (pathlib.Path) -> None
+    """Hold an exclusive lock on a lock file, blocking until acquired,
+    to serialize access to a shared resource across processes
+    :param pathlib.Path path: lock file path
+    """
+    fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if _ON_WINDOWS:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except (IOError, OSError):
+                    # LK_LOCK gives up after 10 seconds
+                    pass
+            try:
+                yield
+            finally:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+    finally:
+        # closing the descriptor releases the lock
+        os.close(fd)
+
+
 def compute_sha256_for_file(file, as_base64, blocksize=65536):
     # type: (pathlib.Path, bool, int) -> str
     """Compute SHA256 hash for file
@@ -458,13 +947,15 @@ def compute_md5_for_file(file, as_base64, blocksize=65536):
             return hasher.hexdigest()
 
 
-def subprocess_with_output(cmd, shell=False, cwd=None, suppress_output=False):
-    # type: (str, bool, str, bool) -> int
+def subprocess_with_output(
+        cmd, shell=False, cwd=None, suppress_output=False, env=None):
+    # type: (str, bool, str, bool, dict) -> int
     """Subprocess command and print output
     :param str cmd: command line to execute
     :param bool shell: use shell in Popen
     :param str cwd: current working directory
     :param bool suppress_output: suppress output
+    :param dict env: env vars to use
     :rtype: int
     :return: return code of process
     """
@@ -474,9 +965,9 @@ def subprocess_with_output(cmd, shell=False, cwd=None, suppress_output=False):
             _devnull = open(os.devnull, 'w')
             proc = subprocess.Popen(
                 cmd, shell=shell, cwd=cwd, stdout=_devnull,
-                stderr=subprocess.STDOUT)
+                stderr=subprocess.STDOUT, env=env)
         else:
-            proc = subprocess.Popen(cmd, shell=shell, cwd=cwd)
+            proc = subprocess.Popen(cmd, shell=shell, cwd=cwd, env=env)
         proc.wait()
     finally:
         if _devnull is not None:
@@ -530,11 +1021,85 @@ def subprocess_attach_stdin(cmd, shell=False):
     return subprocess.Popen(cmd, shell=shell, stdin=subprocess.PIPE)
 
 
+class _ProcessExitWaiter(object):
+    """Event-driven process exit waiter. Each watched process is reaped by
+    a daemon thread blocked in wait() (waitpid on POSIX, WaitForSingleObject
+    on Windows) which signals a shared condition upon exit, thus waiters
+    wake exactly when a child exits rather than polling."""
+    def __init__(self):
+        # type: (_ProcessExitWaiter) -> None
+        """Ctor for _ProcessExitWaiter"""
+        self._cond = threading.Condition()
+        self._watched = weakref.WeakSet()
+        self._exited = weakref.WeakSet()
+
+    def _reap(self, proc):
+        # type: (_ProcessExitWaiter, subprocess.Popen) -> None
+        """Block on process exit and notify waiters
+        :param subprocess.Popen proc: process to reap
+        """
+        try:
+            proc.wait()
+        finally:
+            with self._cond:
+                self._watched.discard(proc)
+                self._exited.add(proc)
+                self._cond.notify_all()
+
+    def has_exited(self, proc):
+        # type: (_ProcessExitWaiter, subprocess.Popen) -> bool
+        """Check if a process has exited as recorded by its reaper. The
+        process is not polled as a concurrent waitpid may fail with ECHILD
+        and set a return code of 0 on Python 2.
+        :param subprocess.Popen proc: process
+        :rtype: bool
+        :return: if process has exited
+        """
+        if proc in self._exited:
+            return True
+        return proc not in self._watched and proc.returncode is not None
+
+    def watch(self, procs):
+        # type: (_ProcessExitWaiter, list) -> None
+        """Watch processes for exit
+        :param list procs: list of processes to watch
+        """
+        with self._cond:
+            for proc in procs:
+                if (proc is None or proc.returncode is not None or
+                        proc in self._watched or proc in self._exited):
+                    continue
+                self._watched.add(proc)
+                thr = threading.Thread(target=self._reap, args=(proc,))
+                thr.daemon = True
+                thr.start()
+
+    def wait(self, procs, predicate):
+        # type: (_ProcessExitWaiter, list, Callable) -> object
+        """Wait until predicate returns a result other than None
+        :param list procs: list of processes to watch
+        :param Callable predicate: predicate to evaluate on process exit
+        :rtype: object
+        :return: predicate result
+        """
+        self.watch(procs)
+        with self._cond:
+            while True:
+                result = predicate()
+                if result is not None:
+                    return result
+                self._cond.wait()
+
+
+_PROCESS_EXIT_WAITER = _ProcessExitWaiter()
+
+
 def subprocess_wait_all(procs, poll=True):
     # type: (list, bool) -> list
     """Wait for all processes in given list
     :param list procs: list of processes to wait on
-    :param bool poll: use poll(), otherwise communicate() if using PIPEs
+    :param bool poll: wait for exit only, otherwise communicate() if using
+        PIPEs
     :rtype: list
     :return: (list of return codes, list of stdout, list of stderr)
     """
@@ -543,21 +1108,35 @@ def subprocess_wait_all(procs, poll=True):
     rcodes = [None] * len(procs)
     stdout = [None] * len(procs)
     stderr = [None] * len(procs)
-    while True:
+    if poll:
+        _PROCESS_EXIT_WAITER.wait(
+            procs,
+            lambda: True if all(
+                _PROCESS_EXIT_WAITER.has_exited(x) for x in procs) else None)
         for i in range(0, len(procs)):
-            if rcodes[i] is None:
-                if poll:
-                    if procs[i].poll() is not None:
-                        rcodes[i] = procs[i].returncode
-                else:
-                    stdout[i], stderr[i] = procs[i].communicate()
-                    rcodes[i] = procs[i].returncode
-        if all(x is not None for x in rcodes):
-            break
-        time.sleep(0.1)
+            rcodes[i] = procs[i].returncode
+    else:
+        for i in range(0, len(procs)):
+            stdout[i], stderr[i] = procs[i].communicate()
+            rcodes[i] = procs[i].returncode
     return rcodes, stdout, stderr
 
 
+def _find_exited_process(procs):
+    # type: (list) -> int
+    """Find the first exited process in list as recorded by the process
+    exit waiter
+    :param list procs: list of processes
+    :rtype: int
+    :return: integral position in procs list or None
+    """
+    if procs is not None:
+        for i in range(0, len(procs)):
+            if _PROCESS_EXIT_WAITER.has_exited(procs[i]):
+                return i
+    return None
+
+
 def subprocess_wait_any(procs):
     # type: (list) -> list
     """Wait for any process in given list
@@ -567,11 +1146,9 @@ def subprocess_wait_any(procs):
     """
     if procs is None or len(procs) == 0:
         raise ValueError('procs is invalid')
-    while True:
-        for i in range(0, len(procs)):
-            if procs[i].poll() is not None:
-                return i, procs[i].returncode
-        time.sleep(0.1)
+    i = _PROCESS_EXIT_WAITER.wait(
+        procs, lambda: _find_exited_process(procs))
+    return i, procs[i].returncode
 
 
 def subprocess_wait_multi(procs1, procs2):
@@ -584,13 +1161,14 @@ def subprocess_wait_multi(procs1, procs2):
     if ((procs1 is None or len(procs1) == 0) and
             (procs2 is None or len(procs2) == 0)):
         raise ValueError('both procs1 and procs2 are invalid')
-    while True:
-        if procs1 is not None and len(procs1) > 0:
-            for i in range(0, len(procs1)):
-                if procs1[i].poll() is not None:
-                    return procs1, i, procs1[i].returncode
-        if procs2 is not None and len(procs2) > 0:
-            for i in range(0, len(procs2)):
-                if procs2[i].poll() is not None:
-                    return procs2, i, procs2[i].returncode
-        time.sleep(0.1)
+
+    def _predicate():
+        for plist in (procs1, procs2):
+            i = _find_exited_process(plist)
+            if i is not None:
+                return plist, i
+        return None
+
+    plist, i = _PROCESS_EXIT_WAITER.wait(
+        (procs1 or []) + (procs2 or []), _predicate)
+    return plist, i, plist[i].returncode
@@ -31,19 +31,23 @@ from builtins import (  # noqa
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
 import enum
+import hashlib
 import logging
+import os
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 import sys
 try:
     import pathlib2 as pathlib
 except ImportError:
     import pathlib
 import warnings
-# non-stdlib imports
-import pykwalify.core
-import pykwalify.errors
-import ruamel.yaml
 # local imports
 import convoy.util
+# deferred non-stdlib imports
+yaml = convoy.util.LazyModule('ruamel.yaml')
 
 
 # create logger
@@ -84,22 +88,43 @@ _SCHEMAS = {
     },
 }
 
+# validated configuration files are cached by content and schema digest
+_CONFIG_CACHE_DIR = pathlib.Path(
+    os.path.expanduser('~'), '.batch-shipyard', 'config-cache')
+_CONFIG_CACHE_MAX_ENTRIES = 64
+# configuration types which may hold secrets (keys, passwords and
+# passphrases) are never stored in the cache
+_CONFIG_CACHE_DIGEST_ONLY = frozenset((
+    ConfigType.Credentials,
+    ConfigType.Global,
+    ConfigType.Pool,
+    ConfigType.RemoteFS,
+))
+_SCHEMA_DIGESTS = {}
+
 # configure loggers
 _PYKWALIFY_LOGGER = logging.getLogger('pykwalify')
 convoy.util.setup_logger(_PYKWALIFY_LOGGER)
 _PYKWALIFY_LOGGER.setLevel(logging.CRITICAL)
 convoy.util.setup_logger(logger)
 
-# ignore ruamel.yaml warning
-warnings.simplefilter('ignore', ruamel.yaml.error.UnsafeLoaderWarning)
-
 
-def validate_config(config_type, config_file):
-    if config_file is None or not config_file.exists():
-        return
+def _validate(config_type, source_file=None, source_data=None):
+    # type: (ConfigType, pathlib.Path, dict) -> None
+    """Validate a configuration against its schema, exiting on failure
+    :param ConfigType config_type: configuration type
+    :param pathlib.Path source_file: configuration file to validate
+    :param dict source_data: parsed configuration to validate
+    """
+    # pykwalify is only needed if a configuration must be validated
+    import pykwalify.core
+    import pykwalify.errors
     schema = _SCHEMAS[config_type]
+    if source_file is not None:
+        source_file = str(source_file)
     validator = pykwalify.core.Core(
-        source_file=str(config_file),
+        source_file=source_file,
+        source_data=source_data,
         schema_files=[str(schema['schema'])]
     )
     validator.strict_rule_validation = True
@@ -108,3 +133,139 @@ def validate_config(config_type, config_file):
     except pykwalify.errors.SchemaError as e:
         logger.error('{} Configuration {}'.format(schema['name'], e.msg))
         sys.exit(1)
+
+
+def validate_config(config_type, config_file):
+    # type: (ConfigType, pathlib.Path) -> None
+    """Validate a configuration file
+    :param ConfigType config_type: configuration type
+    :param pathlib.Path config_file: configuration file
+    """
+    if config_file is None or not config_file.exists():
+        return
+    _validate(config_type, source_file=config_file)
+
+
+def _get_schema_digest(config_type):
+    # type: (ConfigType) -> str
+    """Get the digest of a schema file
+    :param ConfigType config_type: configuration type
+    :rtype: str
+    :return: hex digest of schema
+    """
+    try:
+        return _SCHEMA_DIGESTS[config_type]
+    except KeyError:
+        with _SCHEMAS[config_type]['schema'].open('rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        _SCHEMA_DIGESTS[config_type] = digest
+        return digest
+
+
+def _to_builtin(obj):
+    # type: (object) -> object
+    """Convert round-trip yaml containers to builtin containers
+    :param object obj: object to convert
+    :rtype: object
+    :return: converted object
+    """
+    if isinstance(obj, dict):
+        return {k: _to_builtin(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_to_builtin(x) for x in obj]
+    return obj
+
+
+def _prune_config_cache():
+    # type: (None) -> None
+    """Remove the least recently written cache entries beyond the limit"""
+    try:
+        entries = sorted(
+            list(_CONFIG_CACHE_DIR.glob('*.pickle')) +
+            list(_CONFIG_CACHE_DIR.glob('*.valid')),
+            key=lambda x: x.stat().st_mtime, reverse=True)
+        for entry in entries[_CONFIG_CACHE_MAX_ENTRIES:]:
+            entry.unlink()
+    except OSError:
+        pass
+
+
+def _save_cached_config(path, conf):
+    # type: (pathlib.Path, dict) -> None
+    """Atomically save a validated configuration to the cache
+    :param pathlib.Path path: cache entry path
+    :param dict conf: validated configuration or None to only mark the
+        configuration as validated
+    """
+    try:
+        _CONFIG_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            if conf is not None:
+                pickle.dump(conf, f, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            os.replace(tmp, str(path))
+        except AttributeError:
+            # python 2 does not have an atomic replace
+            if path.exists():
+                path.unlink()
+            os.rename(tmp, str(path))
+    except (IOError, OSError) as e:
+        logger.debug('could not cache configuration {}: {}'.format(path, e))
+        return
+    _prune_config_cache()
+
+
+def load_config(config_type, config_file):
+    # type: (ConfigType, pathlib.Path) -> dict
+    """Load and validate a configuration file. A validated configuration is
+    cached keyed by the digest of the file contents and its schema such
+    that unchanged files are neither parsed nor validated again. For
+    configuration types holding secrets only a marker of successful
+    validation is cached and the file is parsed again.
+    :param ConfigType config_type: configuration type
+    :param pathlib.Path config_file: configuration file
+    :rtype: dict
+    :return: configuration or None if file does not exist
+    """
+    if config_file is None or not config_file.exists():
+        return None
+    with config_file.open('rb') as f:
+        data = f.read()
+    key = hashlib.sha256()
+    key.update(_SCHEMAS[config_type]['name'].encode('utf8'))
+    key.update(_get_schema_digest(config_type).encode('utf8'))
+    key.update(data)
+    digest_only = config_type in _CONFIG_CACHE_DIGEST_ONLY
+    path = pathlib.Path(
+        _CONFIG_CACHE_DIR,
+        key.hexdigest() + ('.valid' if digest_only else '.pickle'))
+    if digest_only:
+        validated = path.exists()
+        # remove any full entry written by a previous version
+        try:
+            path.with_suffix('.pickle').unlink()
+        except OSError:
+            pass
+    else:
+        validated = False
+        try:
+            with path.open('rb') as f:
+                return pickle.load(f)
+        except Exception:
+            pass
+    # ignore ruamel.yaml warning
+    warnings.simplefilter('ignore', yaml.error.UnsafeLoaderWarning)
+    conf = yaml.load(data.decode('utf8'), Loader=yaml.RoundTripLoader)
+    if validated:
+        return _to_builtin(conf)
+    if conf is None:
+        _validate(config_type, source_file=config_file)
+    else:
+        _validate(config_type, source_data=conf)
+    conf = _to_builtin(conf)
+    _save_cached_config(path, None if digest_only else conf)
+    logger.debug('validated {} configuration: {}'.format(
+        _SCHEMAS[config_type]['name'], config_file))
+    return conf
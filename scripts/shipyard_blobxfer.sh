@@ -4,9 +4,60 @@ set -e
 set -o pipefail
 set -f
 
+# write a manifest of uploaded files (md5, size, blob name) as tsv
+# to the output manifest prefix of the container
+write_manifest() {
+    local includes=$1
+    local excludes=$2
+    local container vdir relpath name md5 size pat match
+    local manifest
+    container=${remote_path%%/*}
+    vdir=${remote_path#"$container"}
+    vdir=${vdir#/}
+    if [ -n "$vdir" ]; then
+        vdir="${vdir%/}/"
+    fi
+    IFS=';' read -ra incl <<< "$includes"
+    IFS=';' read -ra excl <<< "$excludes"
+    manifest=$(mktemp)
+    while IFS= read -r -d '' file; do
+        if [ -d "$local_path" ]; then
+            relpath=${file#"${local_path%/}"/}
+        else
+            relpath=$(basename "$file")
+        fi
+        if [ ${#incl[@]} -gt 0 ]; then
+            match=0
+            for pat in "${incl[@]}"; do
+                # shellcheck disable=SC2053
+                if [[ $relpath == $pat ]]; then match=1; break; fi
+            done
+            if [ $match -eq 0 ]; then continue; fi
+        fi
+        match=0
+        for pat in "${excl[@]}"; do
+            # shellcheck disable=SC2053
+            if [[ $relpath == $pat ]]; then match=1; break; fi
+        done
+        if [ $match -eq 1 ]; then continue; fi
+        name="${vdir}${relpath}"
+        md5=$(openssl dgst -md5 -binary "$file" | base64)
+        size=$(stat -c %s "$file")
+        printf '%s\t%s\t%s\n' "$md5" "$size" "$name" >> "$manifest"
+    done < <(find "$local_path" -type f -print0)
+    docker run --rm -t -v "$manifest":/manifest.tsv:ro \
+        alfpark/blobxfer:"$bxver" upload --storage-account "$sa" \
+        --sas "$saskey" --endpoint "$ep" --remote-path \
+        "$container/.shipyard-manifests/$AZ_BATCH_JOB_ID/$AZ_BATCH_TASK_ID.tsv" \
+        --local-path /manifest.tsv --rename --no-progress-bar
+    rm -f "$manifest"
+}
+
 for spec in "$@"; do
     # unencrypted = bxver:kind:encrypted:sa:ep:saskey:remote_path:local_path:eo
     # encrypted   = bxver:kind:encrypted:<encrypted context>:local_path:eo
+    # egress specs may be suffixed with :m:includes:excludes to create
+    # an output manifest
     IFS=',' read -ra parts <<< "$spec"
     bxver=${parts[0]}
     kind=${parts[1]}
@@ -16,6 +67,7 @@ for spec in "$@"; do
         cipher=${parts[3]}
         local_path=${parts[4]}
         eo=${parts[5]}
+        manifest=("${parts[@]:6}")
         # decrypt ciphertext
         privatekey=$AZ_BATCH_NODE_STARTUP_DIR/certs/key.pem
         cipher=$(echo "$cipher" | base64 -d | openssl rsautl -decrypt -inkey "$privatekey")
@@ -33,9 +85,11 @@ for spec in "$@"; do
         remote_path=${parts[6]}
         local_path=${parts[7]}
         eo=${parts[8]}
+        manifest=("${parts[@]:9}")
     fi
 
     wd=$(dirname "$local_path")
+    xferopts=()
     if [ "$kind" == "i" ]; then
         # create destination working directory
         mkdir -p "$wd"
@@ -44,6 +98,10 @@ for spec in "$@"; do
     elif [ "$kind" == "e" ]; then
         # egress from compute node to storage
         action=upload
+        # upload with multiple transfer threads unless specified
+        if [[ "$eo" != *"--transfer-threads"* ]]; then
+            xferopts=(--transfer-threads $(( $(nproc) * 4 )))
+        fi
     else
         echo "ERROR: unknown $kind transfer"
         exit 1
@@ -53,5 +111,10 @@ for spec in "$@"; do
     docker run --rm -t -v "$wd":"$wd" -w "$wd" alfpark/blobxfer:"$bxver" \
         "$action" --storage-account "$sa" --sas "$saskey" --endpoint "$ep" \
         --remote-path "$remote_path" --local-path "$local_path" \
-        --no-progress-bar "$eo"
+        --no-progress-bar "${xferopts[@]}" "$eo"
+
+    # write output manifest on egress if specified
+    if [ "$kind" == "e" ] && [ "${manifest[0]}" == "m" ]; then
+        write_manifest "${manifest[1]}" "${manifest[2]}"
+    fi
 done
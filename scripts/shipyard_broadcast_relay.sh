@@ -0,0 +1,50 @@
+#!/usr/bin/env bash
+
+# Relay a tar stream to this node and its subtree in a pipelined broadcast
+# tree. This script is invoked as:
+#   bash -c "$(echo <this script as base64> | base64 -d)" relay \
+#       <this script as base64> <destination> <fanout> <username>
+# stdin consists of a single line of space-separated addresses of the
+# nodes in the subtree rooted at this node (excluding this node) followed
+# by the tar stream. The subtree is split into fanout contiguous chunks:
+# the first node of each chunk is a child of this node and the remainder
+# of the chunk is the subtree of that child.
+
+set -e
+set -o pipefail
+
+self=$1
+dst=$2
+fanout=$3
+username=$4
+
+read -r -a nodes || true
+mkdir -p "$dst"
+n=${#nodes[@]}
+if [ "$n" -eq 0 ]; then
+    exec tar -x -C "$dst"
+fi
+
+tmpdir=$(mktemp -d)
+trap 'rm -rf "$tmpdir"' EXIT
+chunk=$(( (n + fanout - 1) / fanout ))
+fifos=()
+pids=()
+for ((i=0; i<n; i+=chunk)); do
+    child=${nodes[$i]}
+    rest="${nodes[*]:$((i+1)):$((chunk-1))}"
+    fifo="$tmpdir/$i"
+    mkfifo "$fifo"
+    fifos+=("$fifo")
+    # shellcheck disable=SC2016
+    printf -v rcmd 'bash -c "$(echo %s | base64 -d)" relay %s %q %s %q' \
+        "$self" "$self" "$dst" "$fanout" "$username"
+    { echo "$rest"; cat "$fifo"; } | ssh -A -T -x \
+        -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null \
+        "${username}@${child}" "$rcmd" &
+    pids+=($!)
+done
+tee "${fifos[@]}" | tar -x -C "$dst"
+for pid in "${pids[@]}"; do
+    wait "$pid"
+done
@@ -38,13 +38,14 @@ except ImportError:
     import pathlib
 # non-stdlib imports
 import click
-import ruamel.yaml
 # local imports
-import convoy.clients
-import convoy.fleet
 import convoy.settings
 import convoy.util
 import convoy.validator
+# deferred local imports: modules required only to execute a command are
+# imported on first use
+clients = convoy.util.LazyModule('convoy.clients')
+fleet = convoy.util.LazyModule('convoy.fleet')
 
 # create logger
 logger = logging.getLogger('shipyard')
@@ -108,7 +109,7 @@ class CliContext(object):
         self._read_credentials_config()
         self._set_global_cli_options()
         try:
-            self.keyvault_client = convoy.clients.create_keyvault_client(self)
+            self.keyvault_client = clients.create_keyvault_client(self)
         except KeyError:
             logger.error(
                 'Are you missing your configuration files or pointing to '
@@ -118,11 +119,11 @@ class CliContext(object):
             skip_global_config=False, skip_pool_config=True, fs_storage=True)
         self.resource_client, self.compute_client, self.network_client, \
             self.storage_mgmt_client, _, _ = \
-            convoy.clients.create_all_clients(self)
+            clients.create_all_clients(self)
         # inject storage account keys if via aad
-        convoy.fleet.fetch_storage_account_keys_from_aad(
+        fleet.fetch_storage_account_keys_from_aad(
             self.storage_mgmt_client, self.config, fs_storage=True)
-        self.blob_client, _ = convoy.clients.create_storage_clients()
+        self.blob_client, _ = clients.create_storage_clients()
         self._cleanup_after_initialize(
             skip_global_config=False, skip_pool_config=True)
 
@@ -134,7 +135,7 @@ class CliContext(object):
         self._read_credentials_config()
         self._set_global_cli_options()
         try:
-            self.keyvault_client = convoy.clients.create_keyvault_client(self)
+            self.keyvault_client = clients.create_keyvault_client(self)
         except KeyError:
             logger.error(
                 'Are you missing your configuration files or pointing to '
@@ -153,7 +154,7 @@ class CliContext(object):
         self._read_credentials_config()
         self._set_global_cli_options()
         try:
-            self.keyvault_client = convoy.clients.create_keyvault_client(self)
+            self.keyvault_client = clients.create_keyvault_client(self)
         except KeyError:
             logger.error(
                 'Are you missing your configuration files or pointing to '
@@ -164,12 +165,12 @@ class CliContext(object):
         self.resource_client, self.compute_client, self.network_client, \
             self.storage_mgmt_client, self.batch_mgmt_client, \
             self.batch_client = \
-            convoy.clients.create_all_clients(self, batch_clients=True)
+            clients.create_all_clients(self, batch_clients=True)
         # inject storage account keys if via aad
-        convoy.fleet.fetch_storage_account_keys_from_aad(
+        fleet.fetch_storage_account_keys_from_aad(
             self.storage_mgmt_client, self.config, fs_storage=False)
         self.blob_client, self.table_client = \
-            convoy.clients.create_storage_clients()
+            clients.create_storage_clients()
         self._cleanup_after_initialize(
             skip_global_config=False, skip_pool_config=False)
 
@@ -180,16 +181,16 @@ class CliContext(object):
         """
         self._read_credentials_config()
         self._set_global_cli_options()
-        self.keyvault_client = convoy.clients.create_keyvault_client(self)
+        self.keyvault_client = clients.create_keyvault_client(self)
         self._init_config(
             skip_global_config=False, skip_pool_config=False, fs_storage=False)
         # inject storage account keys if via aad
         _, _, _, self.storage_mgmt_client, _, _ = \
-            convoy.clients.create_all_clients(self)
-        convoy.fleet.fetch_storage_account_keys_from_aad(
+            clients.create_all_clients(self)
+        fleet.fetch_storage_account_keys_from_aad(
             self.storage_mgmt_client, self.config, fs_storage=False)
         self.blob_client, self.table_client = \
-            convoy.clients.create_storage_clients()
+            clients.create_storage_clients()
         self._cleanup_after_initialize(
             skip_global_config=False, skip_pool_config=False)
 
@@ -242,20 +243,22 @@ class CliContext(object):
         # free clients that won't be used
         del self.storage_mgmt_client
 
-    def _read_config_file(self, config_file):
-        # type: (CliContext, pathlib.Path) -> None
-        """Read a yaml/json file into self.config
+    def _read_config_file(self, config_file, config_type):
+        # type: (CliContext, pathlib.Path,
+        #        convoy.validator.ConfigType) -> None
+        """Read and validate a yaml/json file into self.config
         :param CliContext self: this
         :param pathlib.Path config_file: config file to load
+        :param convoy.validator.ConfigType config_type: config type
         """
-        with config_file.open('r') as f:
-            if self.config is None:
-                self.config = ruamel.yaml.load(
-                    f, Loader=ruamel.yaml.RoundTripLoader)
-            else:
-                self.config = convoy.util.merge_dict(
-                    self.config,
-                    ruamel.yaml.load(f, Loader=ruamel.yaml.RoundTripLoader))
+        conf = convoy.validator.load_config(config_type, config_file)
+        if conf is None:
+            raise ValueError('config file {} does not exist'.format(
+                config_file))
+        if self.config is None:
+            self.config = conf
+        else:
+            self.config = convoy.util.merge_dict(self.config, conf)
 
     def _form_conf_path(self, conf_var, prefix):
         """Form configuration file path with configdir if applicable
@@ -292,7 +295,9 @@ class CliContext(object):
             self.conf_credentials = CliContext.ensure_pathlib_conf(
                 self.conf_credentials)
             if self.conf_credentials.exists():
-                self._read_config_file(self.conf_credentials)
+                self._read_config_file(
+                    self.conf_credentials,
+                    convoy.validator.ConfigType.Credentials)
 
     def _init_config(
             self, skip_global_config=False, skip_pool_config=False,
@@ -307,50 +312,38 @@ class CliContext(object):
         # reset config
         self.config = None
         self._set_global_cli_options()
-        # set/validate credentials config
+        # set config file paths: each file is validated as it is read and
+        # validation is skipped for files unchanged since last validated
         self.conf_credentials = self._form_conf_path(
             self.conf_credentials, 'credentials')
         self.conf_credentials = CliContext.ensure_pathlib_conf(
             self.conf_credentials)
-        convoy.validator.validate_config(
-            convoy.validator.ConfigType.Credentials, self.conf_credentials)
-        # set/validate global config
         if not skip_global_config:
             self.conf_config = self._form_conf_path(self.conf_config, 'config')
             if self.conf_config is None:
                 raise ValueError('config conf file was not specified')
             self.conf_config = CliContext.ensure_pathlib_conf(self.conf_config)
-            convoy.validator.validate_config(
-                convoy.validator.ConfigType.Global, self.conf_config)
-        # set/validate batch config
         if not skip_pool_config:
-            # set/validate pool config
             self.conf_pool = self._form_conf_path(self.conf_pool, 'pool')
             if self.conf_pool is None:
                 raise ValueError('pool conf file was not specified')
             self.conf_pool = CliContext.ensure_pathlib_conf(self.conf_pool)
-            convoy.validator.validate_config(
-                convoy.validator.ConfigType.Pool, self.conf_pool)
-            # set/validate jobs config
             self.conf_jobs = self._form_conf_path(self.conf_jobs, 'jobs')
             self.conf_jobs = CliContext.ensure_pathlib_conf(self.conf_jobs)
-            convoy.validator.validate_config(
-                convoy.validator.ConfigType.Jobs, self.conf_jobs)
-        # set/validate fs config
         self.conf_fs = self._form_conf_path(self.conf_fs, 'fs')
         self.conf_fs = CliContext.ensure_pathlib_conf(self.conf_fs)
-        convoy.validator.validate_config(
-            convoy.validator.ConfigType.RemoteFS, self.conf_fs)
         # fetch credentials from keyvault, if conf file is missing
         kvcreds = None
         if self.conf_credentials is None or not self.conf_credentials.exists():
-            kvcreds = convoy.fleet.fetch_credentials_conf_from_keyvault(
+            kvcreds = fleet.fetch_credentials_conf_from_keyvault(
                 self.keyvault_client, self.keyvault_uri,
                 self.keyvault_credentials_secret_id)
         # read credentials conf, perform special keyvault processing if
         # required sections are missing
         if kvcreds is None:
-            self._read_config_file(self.conf_credentials)
+            self._read_config_file(
+                self.conf_credentials,
+                convoy.validator.ConfigType.Credentials)
             kv = convoy.settings.credentials_keyvault(self.config)
             self.keyvault_uri = self.keyvault_uri or kv.keyvault_uri
             self.keyvault_credentials_secret_id = (
@@ -366,7 +359,7 @@ class CliContext(object):
                 except KeyError:
                     # fetch credentials from keyvault
                     self.config = \
-                        convoy.fleet.fetch_credentials_conf_from_keyvault(
+                        fleet.fetch_credentials_conf_from_keyvault(
                             self.keyvault_client, self.keyvault_uri,
                             self.keyvault_credentials_secret_id)
         else:
@@ -375,24 +368,26 @@ class CliContext(object):
         # re-populate global cli options again
         self._set_global_cli_options()
         # parse any keyvault secret ids from credentials
-        convoy.fleet.fetch_secrets_from_keyvault(
+        fleet.fetch_secrets_from_keyvault(
             self.keyvault_client, self.config)
         # read rest of config files
         if not skip_global_config:
-            self._read_config_file(self.conf_config)
+            self._read_config_file(
+                self.conf_config, convoy.validator.ConfigType.Global)
         # read fs config regardless of skip setting
         if self.conf_fs is not None and self.conf_fs.exists():
-            self._read_config_file(self.conf_fs)
+            self._read_config_file(
+                self.conf_fs, convoy.validator.ConfigType.RemoteFS)
         if not skip_pool_config:
-            self._read_config_file(self.conf_pool)
-            if self.conf_jobs is not None:
-                self.conf_jobs = CliContext.ensure_pathlib_conf(self.conf_jobs)
-                if self.conf_jobs.exists():
-                    self._read_config_file(self.conf_jobs)
+            self._read_config_file(
+                self.conf_pool, convoy.validator.ConfigType.Pool)
+            if self.conf_jobs is not None and self.conf_jobs.exists():
+                self._read_config_file(
+                    self.conf_jobs, convoy.validator.ConfigType.Jobs)
         # adjust settings
-        convoy.fleet.initialize_globals(convoy.settings.verbose(self.config))
+        fleet.initialize_globals(convoy.settings.verbose(self.config))
         if not skip_global_config:
-            convoy.fleet.populate_global_settings(self.config, fs_storage)
+            fleet.populate_global_settings(self.config, fs_storage)
         # show config if specified
         if self.show_config:
             logger.debug('config:\n' + json.dumps(self.config, indent=4))
@@ -797,7 +792,7 @@ def account(ctx):
 def account_info(ctx, name, resource_group):
     """Retrieve Batch account information and quotas"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_account_info(
+    fleet.action_account_info(
         ctx.batch_mgmt_client, ctx.config, name, resource_group)
 
 
@@ -812,7 +807,7 @@ def account_list(ctx, resource_group):
     """Retrieve a list of Batch accounts and associated quotas in
     subscription"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_account_list(
+    fleet.action_account_list(
         ctx.batch_mgmt_client, ctx.config, resource_group)
 
 
@@ -827,7 +822,7 @@ def account_quota(ctx, location):
     """Retrieve Batch account quota at the subscription level for the
     specified location"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_account_quota(
+    fleet.action_account_quota(
         ctx.batch_mgmt_client, ctx.config, location)
 
 
@@ -853,7 +848,7 @@ def cluster(ctx):
 def fs_cluster_add(ctx, storage_cluster_id):
     """Create a filesystem storage cluster in Azure"""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_cluster_add(
+    fleet.action_fs_cluster_add(
         ctx.resource_client, ctx.compute_client, ctx.network_client,
         ctx.blob_client, ctx.config, storage_cluster_id)
 
@@ -867,7 +862,7 @@ def fs_cluster_resize(ctx, storage_cluster_id):
     """Resize a filesystem storage cluster in Azure. Only increasing the
     storage cluster size is supported."""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_cluster_resize(
+    fleet.action_fs_cluster_resize(
         ctx.compute_client, ctx.network_client, ctx.blob_client, ctx.config,
         storage_cluster_id)
 
@@ -883,7 +878,7 @@ def fs_cluster_resize(ctx, storage_cluster_id):
 def fs_cluster_expand(ctx, storage_cluster_id, no_rebalance):
     """Expand a filesystem storage cluster in Azure"""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_cluster_expand(
+    fleet.action_fs_cluster_expand(
         ctx.compute_client, ctx.network_client, ctx.config,
         storage_cluster_id, not no_rebalance)
 
@@ -911,7 +906,7 @@ def fs_cluster_del(
         delete_virtual_network, generate_from_prefix, no_wait):
     """Delete a filesystem storage cluster in Azure"""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_cluster_del(
+    fleet.action_fs_cluster_del(
         ctx.resource_client, ctx.compute_client, ctx.network_client,
         ctx.blob_client, ctx.config, storage_cluster_id,
         delete_resource_group, delete_data_disks, delete_virtual_network,
@@ -928,7 +923,7 @@ def fs_cluster_del(
 def fs_cluster_suspend(ctx, storage_cluster_id, no_wait):
     """Suspend a filesystem storage cluster in Azure"""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_cluster_suspend(
+    fleet.action_fs_cluster_suspend(
         ctx.compute_client, ctx.config, storage_cluster_id, not no_wait)
 
 
@@ -942,7 +937,7 @@ def fs_cluster_suspend(ctx, storage_cluster_id, no_wait):
 def fs_cluster_start(ctx, storage_cluster_id, no_wait):
     """Starts a previously suspended filesystem storage cluster in Azure"""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_cluster_start(
+    fleet.action_fs_cluster_start(
         ctx.compute_client, ctx.network_client, ctx.config,
         storage_cluster_id, not no_wait)
 
@@ -960,7 +955,7 @@ def fs_cluster_start(ctx, storage_cluster_id, no_wait):
 def fs_cluster_status(ctx, storage_cluster_id, detail, hosts):
     """Query status of a filesystem storage cluster in Azure"""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_cluster_status(
+    fleet.action_fs_cluster_status(
         ctx.compute_client, ctx.network_client, ctx.config,
         storage_cluster_id, detail, hosts)
 
@@ -983,7 +978,7 @@ def fs_cluster_ssh(ctx, storage_cluster_id, cardinal, hostname, tty, command):
     """Interactively login via SSH to a filesystem storage cluster virtual
     machine in Azure"""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_cluster_ssh(
+    fleet.action_fs_cluster_ssh(
         ctx.compute_client, ctx.network_client, ctx.config,
         storage_cluster_id, cardinal, hostname, tty, command)
 
@@ -1003,7 +998,7 @@ def disks(ctx):
 def fs_disks_add(ctx):
     """Create managed disks in Azure"""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_disks_add(
+    fleet.action_fs_disks_add(
         ctx.resource_client, ctx.compute_client, ctx.config)
 
 
@@ -1029,7 +1024,7 @@ def fs_disks_del(
         ctx, all, delete_resource_group, name, resource_group, no_wait):
     """Delete managed disks in Azure"""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_disks_del(
+    fleet.action_fs_disks_del(
         ctx.resource_client, ctx.compute_client, ctx.config, name,
         resource_group, all, delete_resource_group, not no_wait)
 
@@ -1048,7 +1043,7 @@ def fs_disks_del(
 def fs_disks_list(ctx, resource_group, restrict_scope):
     """List managed disks in resource group"""
     ctx.initialize_for_fs()
-    convoy.fleet.action_fs_disks_list(
+    fleet.action_fs_disks_list(
         ctx.compute_client, ctx.config, resource_group, restrict_scope)
 
 
@@ -1071,7 +1066,7 @@ def storage(ctx):
 def storage_del(ctx, clear_tables, poolid):
     """Delete Azure Storage containers used by Batch Shipyard"""
     ctx.initialize_for_storage()
-    convoy.fleet.action_storage_del(
+    fleet.action_storage_del(
         ctx.blob_client, ctx.table_client, ctx.config, clear_tables, poolid)
 
 
@@ -1085,7 +1080,7 @@ def storage_del(ctx, clear_tables, poolid):
 def storage_clear(ctx, poolid):
     """Clear Azure Storage containers used by Batch Shipyard"""
     ctx.initialize_for_storage()
-    convoy.fleet.action_storage_clear(
+    fleet.action_storage_clear(
         ctx.blob_client, ctx.table_client, ctx.config, poolid)
 
 
@@ -1116,7 +1111,7 @@ def sas(ctx):
 def sas_create(ctx, create, delete, file, read, write, storage_account, path):
     """Create an object-level SAS key"""
     ctx.initialize_for_storage()
-    convoy.fleet.action_storage_sas_create(
+    fleet.action_storage_sas_create(
         ctx.config, storage_account, path, file, create, read, write, delete)
 
 
@@ -1136,7 +1131,7 @@ def keyvault(ctx):
 def keyvault_add(ctx, name):
     """Add a credentials config file as a secret to Azure KeyVault"""
     ctx.initialize_for_keyvault()
-    convoy.fleet.action_keyvault_add(
+    fleet.action_keyvault_add(
         ctx.keyvault_client, ctx.config, ctx.keyvault_uri, name)
 
 
@@ -1149,7 +1144,7 @@ def keyvault_add(ctx, name):
 def keyvault_del(ctx, name):
     """Delete a secret from Azure KeyVault"""
     ctx.initialize_for_keyvault()
-    convoy.fleet.action_keyvault_del(
+    fleet.action_keyvault_del(
         ctx.keyvault_client, ctx.keyvault_uri, name)
 
 
@@ -1161,7 +1156,7 @@ def keyvault_del(ctx, name):
 def keyvault_list(ctx):
     """List secret ids and metadata in an Azure KeyVault"""
     ctx.initialize_for_keyvault()
-    convoy.fleet.action_keyvault_list(ctx.keyvault_client, ctx.keyvault_uri)
+    fleet.action_keyvault_list(ctx.keyvault_client, ctx.keyvault_uri)
 
 
 @cli.group()
@@ -1182,7 +1177,7 @@ def cert(ctx):
 def cert_create(ctx, file_prefix, pfx_password):
     """Create a certificate to use with a Batch account"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_cert_create(ctx.config, file_prefix, pfx_password)
+    fleet.action_cert_create(ctx.config, file_prefix, pfx_password)
 
 
 @cert.command('add')
@@ -1200,7 +1195,7 @@ def cert_create(ctx, file_prefix, pfx_password):
 def cert_add(ctx, file, pem_no_certs, pem_public_key, pfx_password):
     """Add a certificate to a Batch account"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_cert_add(
+    fleet.action_cert_add(
         ctx.batch_client, ctx.config, file, pem_no_certs, pem_public_key,
         pfx_password)
 
@@ -1214,7 +1209,7 @@ def cert_add(ctx, file, pem_no_certs, pem_public_key, pfx_password):
 def cert_list(ctx):
     """List all certificates in a Batch account"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_cert_list(ctx.batch_client, ctx.config)
+    fleet.action_cert_list(ctx.batch_client, ctx.config)
 
 
 @cert.command('del')
@@ -1228,7 +1223,7 @@ def cert_list(ctx):
 def cert_del(ctx, sha1):
     """Delete certificates from a Batch account"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_cert_del(ctx.batch_client, ctx.config, sha1)
+    fleet.action_cert_del(ctx.batch_client, ctx.config, sha1)
 
 
 @cli.group()
@@ -1247,7 +1242,7 @@ def pool(ctx):
 def pool_listskus(ctx):
     """List available VM configurations available to the Batch account"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_listskus(ctx.batch_client, ctx.config)
+    fleet.action_pool_listskus(ctx.batch_client, ctx.config)
 
 
 @pool.command('add')
@@ -1260,7 +1255,7 @@ def pool_listskus(ctx):
 def pool_add(ctx):
     """Add a pool to the Batch account"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_add(
+    fleet.action_pool_add(
         ctx.resource_client, ctx.compute_client, ctx.network_client,
         ctx.batch_mgmt_client, ctx.batch_client, ctx.blob_client,
         ctx.table_client, ctx.config)
@@ -1275,7 +1270,7 @@ def pool_add(ctx):
 def pool_list(ctx):
     """List all pools in the Batch account"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_list(ctx.batch_client, ctx.config)
+    fleet.action_pool_list(ctx.batch_client, ctx.config)
 
 
 @pool.command('del')
@@ -1291,7 +1286,7 @@ def pool_list(ctx):
 def pool_del(ctx, poolid, wait):
     """Delete a pool from the Batch account"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_delete(
+    fleet.action_pool_delete(
         ctx.batch_client, ctx.blob_client, ctx.table_client, ctx.config,
         pool_id=poolid, wait=wait)
 
@@ -1307,7 +1302,7 @@ def pool_del(ctx, poolid, wait):
 def pool_resize(ctx, wait):
     """Resize a pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_resize(
+    fleet.action_pool_resize(
         ctx.batch_client, ctx.blob_client, ctx.config, wait=wait)
 
 
@@ -1329,7 +1324,7 @@ def pool_resize(ctx, wait):
 def pool_ssh(ctx, cardinal, nodeid, tty, command):
     """Interactively login via SSH to a node in a pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_ssh(
+    fleet.action_pool_ssh(
         ctx.batch_client, ctx.config, cardinal, nodeid, tty, command)
 
 
@@ -1351,7 +1346,7 @@ def pool_ssh(ctx, cardinal, nodeid, tty, command):
 def pool_rdp(ctx, cardinal, no_auto, nodeid):
     """Interactively login via RDP to a node in a pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_rdp(
+    fleet.action_pool_rdp(
         ctx.batch_client, ctx.config, cardinal, nodeid, no_auto=no_auto)
 
 
@@ -1365,7 +1360,7 @@ def pool_rdp(ctx, cardinal, no_auto, nodeid):
 def pool_stats(ctx, poolid):
     """Get statistics about a pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_stats(
+    fleet.action_pool_stats(
         ctx.batch_client, ctx.config, pool_id=poolid)
 
 
@@ -1385,7 +1380,7 @@ def autoscale(ctx):
 def autoscale_disable(ctx):
     """Disable autoscale on a pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_autoscale_disable(ctx.batch_client, ctx.config)
+    fleet.action_pool_autoscale_disable(ctx.batch_client, ctx.config)
 
 
 @autoscale.command('enable')
@@ -1397,7 +1392,7 @@ def autoscale_disable(ctx):
 def autoscale_enable(ctx):
     """Enable autoscale on a pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_autoscale_enable(ctx.batch_client, ctx.config)
+    fleet.action_pool_autoscale_enable(ctx.batch_client, ctx.config)
 
 
 @autoscale.command('evaluate')
@@ -1409,7 +1404,7 @@ def autoscale_enable(ctx):
 def autoscale_evaluate(ctx):
     """Evaluate autoscale formula"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_autoscale_evaluate(ctx.batch_client, ctx.config)
+    fleet.action_pool_autoscale_evaluate(ctx.batch_client, ctx.config)
 
 
 @autoscale.command('lastexec')
@@ -1421,7 +1416,7 @@ def autoscale_evaluate(ctx):
 def autoscale_lastexec(ctx):
     """Get the result of the last execution of the autoscale formula"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_autoscale_lastexec(ctx.batch_client, ctx.config)
+    fleet.action_pool_autoscale_lastexec(ctx.batch_client, ctx.config)
 
 
 @pool.group()
@@ -1449,21 +1444,25 @@ def images_update(
         ctx, docker_image, docker_image_digest, singularity_image, ssh):
     """Update container images in a pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_images_update(
+    fleet.action_pool_images_update(
         ctx.batch_client, ctx.config, docker_image, docker_image_digest,
         singularity_image, ssh)
 
 
 @images.command('list')
+@click.option(
+    '--refresh', is_flag=True,
+    help='Query all nodes instead of using cached image inventories')
 @common_options
 @batch_options
 @keyvault_options
 @aad_options
 @pass_cli_context
-def images_list(ctx):
+def images_list(ctx, refresh):
     """List container images in a pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_images_list(ctx.batch_client, ctx.config)
+    fleet.action_pool_images_list(
+        ctx.batch_client, ctx.config, refresh)
 
 
 @pool.group()
@@ -1482,7 +1481,7 @@ def user(ctx):
 def user_add(ctx):
     """Add a remote user to all nodes in pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_user_add(ctx.batch_client, ctx.config)
+    fleet.action_pool_user_add(ctx.batch_client, ctx.config)
 
 
 @user.command('del')
@@ -1494,7 +1493,7 @@ def user_add(ctx):
 def user_del(ctx):
     """Delete a remote user from all nodes in pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_user_del(ctx.batch_client, ctx.config)
+    fleet.action_pool_user_del(ctx.batch_client, ctx.config)
 
 
 @pool.group()
@@ -1516,7 +1515,7 @@ def nodes(ctx):
 def nodes_grls(ctx, no_generate_tunnel_script):
     """Get remote login settings for all nodes in pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_nodes_grls(
+    fleet.action_pool_nodes_grls(
         ctx.batch_client, ctx.config, no_generate_tunnel_script)
 
 
@@ -1529,7 +1528,7 @@ def nodes_grls(ctx, no_generate_tunnel_script):
 def nodes_list(ctx):
     """List nodes in pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_nodes_list(ctx.batch_client, ctx.config)
+    fleet.action_pool_nodes_list(ctx.batch_client, ctx.config)
 
 
 @nodes.command('zap')
@@ -1545,7 +1544,7 @@ def nodes_list(ctx):
 def nodes_zap(ctx, no_remove, stop):
     """Zap all container processes on nodes in pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_nodes_zap(
+    fleet.action_pool_nodes_zap(
         ctx.batch_client, ctx.config, not no_remove, stop)
 
 
@@ -1560,7 +1559,7 @@ def nodes_zap(ctx, no_remove, stop):
 def nodes_prune(ctx, volumes):
     """Prune container/image data on nodes in pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_nodes_prune(ctx.batch_client, ctx.config, volumes)
+    fleet.action_pool_nodes_prune(ctx.batch_client, ctx.config, volumes)
 
 
 @nodes.command('ps')
@@ -1572,7 +1571,7 @@ def nodes_prune(ctx, volumes):
 def nodes_ps(ctx):
     """List running containers on nodes in pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_nodes_ps(ctx.batch_client, ctx.config)
+    fleet.action_pool_nodes_ps(ctx.batch_client, ctx.config)
 
 
 @nodes.command('del')
@@ -1600,7 +1599,7 @@ def nodes_del(
         ctx, all_start_task_failed, all_starting, all_unusable, nodeid):
     """Delete a node or nodes from a pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_nodes_del(
+    fleet.action_pool_nodes_del(
         ctx.batch_client, ctx.config, all_start_task_failed, all_starting,
         all_unusable, nodeid)
 
@@ -1621,7 +1620,7 @@ def nodes_del(
 def nodes_reboot(ctx, all_start_task_failed, nodeid):
     """Reboot a node or nodes in a pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_pool_nodes_reboot(
+    fleet.action_pool_nodes_reboot(
         ctx.batch_client, ctx.config, all_start_task_failed, nodeid)
 
 
@@ -1647,7 +1646,7 @@ def jobs(ctx):
 def jobs_add(ctx, recreate, tail):
     """Add jobs"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_add(
+    fleet.action_jobs_add(
         ctx.resource_client, ctx.compute_client, ctx.network_client,
         ctx.batch_mgmt_client, ctx.batch_client, ctx.blob_client,
         ctx.table_client, ctx.keyvault_client, ctx.config, recreate, tail)
@@ -1666,7 +1665,7 @@ def jobs_add(ctx, recreate, tail):
 def jobs_list(ctx, jobid, jobscheduleid):
     """List jobs"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_list(
+    fleet.action_jobs_list(
         ctx.batch_client, ctx.config, jobid, jobscheduleid)
 
 
@@ -1694,7 +1693,7 @@ def jobs_term(
         wait):
     """Terminate jobs and job schedules"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_del_or_term(
+    fleet.action_jobs_del_or_term(
         ctx.batch_client, ctx.blob_client, ctx.table_client, ctx.config,
         False, all_jobs, all_jobschedules, jobid, jobscheduleid, termtasks,
         wait)
@@ -1724,7 +1723,7 @@ def jobs_del(
         wait):
     """Delete jobs and job schedules"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_del_or_term(
+    fleet.action_jobs_del_or_term(
         ctx.batch_client, ctx.blob_client, ctx.table_client, ctx.config,
         True, all_jobs, all_jobschedules, jobid, jobscheduleid, termtasks,
         wait)
@@ -1742,7 +1741,7 @@ def jobs_del(
 def jobs_cmi(ctx, delete):
     """Cleanup non-native multi-instance jobs"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_cmi(ctx.batch_client, ctx.config, delete)
+    fleet.action_jobs_cmi(ctx.batch_client, ctx.config, delete)
 
 
 @jobs.command('migrate')
@@ -1766,7 +1765,7 @@ def jobs_cmi(ctx, delete):
 def jobs_migrate(ctx, jobid, jobscheduleid, poolid, requeue, terminate, wait):
     """Migrate jobs or job schedules to another pool"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_migrate(
+    fleet.action_jobs_migrate(
         ctx.batch_client, ctx.config, jobid, jobscheduleid, poolid, requeue,
         terminate, wait)
 
@@ -1790,7 +1789,7 @@ def jobs_migrate(ctx, jobid, jobscheduleid, poolid, requeue, terminate, wait):
 def jobs_disable(ctx, jobid, jobscheduleid, requeue, terminate, wait):
     """Disable jobs and job schedules"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_disable(
+    fleet.action_jobs_disable(
         ctx.batch_client, ctx.config, jobid, jobscheduleid, requeue,
         terminate, wait)
 
@@ -1808,7 +1807,7 @@ def jobs_disable(ctx, jobid, jobscheduleid, requeue, terminate, wait):
 def jobs_enable(ctx, jobid, jobscheduleid):
     """Enable jobs and job schedules"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_enable(
+    fleet.action_jobs_enable(
         ctx.batch_client, ctx.config, jobid, jobscheduleid)
 
 
@@ -1822,7 +1821,7 @@ def jobs_enable(ctx, jobid, jobscheduleid):
 def jobs_stats(ctx, jobid):
     """Get statistics about jobs"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_stats(ctx.batch_client, ctx.config, job_id=jobid)
+    fleet.action_jobs_stats(ctx.batch_client, ctx.config, job_id=jobid)
 
 
 @jobs.group()
@@ -1850,7 +1849,7 @@ def tasks(ctx):
 def tasks_list(ctx, all, jobid, poll_until_tasks_complete, taskid):
     """List tasks within jobs"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_tasks_list(
+    fleet.action_jobs_tasks_list(
         ctx.batch_client, ctx.config, all, jobid,
         poll_until_tasks_complete, taskid)
 
@@ -1873,7 +1872,7 @@ def tasks_list(ctx, all, jobid, poll_until_tasks_complete, taskid):
 def tasks_term(ctx, force, jobid, taskid, wait):
     """Terminate specified tasks in jobs"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_tasks_term(
+    fleet.action_jobs_tasks_term(
         ctx.batch_client, ctx.config, jobid, taskid, wait, force)
 
 
@@ -1892,7 +1891,7 @@ def tasks_term(ctx, force, jobid, taskid, wait):
 def tasks_del(ctx, jobid, taskid, wait):
     """Delete specified tasks in jobs"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_jobs_tasks_del(
+    fleet.action_jobs_tasks_del(
         ctx.batch_client, ctx.config, jobid, taskid, wait)
 
 
@@ -1914,7 +1913,7 @@ def data(ctx):
 def data_ingress(ctx, to_fs):
     """Ingress data into Azure"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_data_ingress(
+    fleet.action_data_ingress(
         ctx.batch_client, ctx.compute_client, ctx.network_client, ctx.config,
         to_fs)
 
@@ -1939,7 +1938,7 @@ def files(ctx):
 def files_list(ctx, jobid, taskid):
     """List files for tasks in jobs"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_data_files_list(
+    fleet.action_data_files_list(
         ctx.batch_client, ctx.config, jobid, taskid)
 
 
@@ -1948,7 +1947,9 @@ def files_list(ctx, jobid, taskid):
     '--disk', is_flag=True,
     help='Write streamed data to disk and suppress console output')
 @click.option(
-    '--filespec', help='File specification as jobid,taskid,filename')
+    '--filespec', help='File specification as jobid,taskid,filename '
+    'where taskid may be @FIRSTRUNNING, @ALL or a colon-separated list of '
+    'task ids or glob patterns')
 @common_options
 @batch_options
 @keyvault_options
@@ -1957,7 +1958,7 @@ def files_list(ctx, jobid, taskid):
 def files_stream(ctx, disk, filespec):
     """Stream a file as text to the local console or as binary to disk"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_data_files_stream(
+    fleet.action_data_files_stream(
         ctx.batch_client, ctx.config, filespec, disk)
 
 
@@ -1976,7 +1977,7 @@ def files_stream(ctx, disk, filespec):
 def files_task(ctx, all, filespec):
     """Retrieve file(s) from a job/task"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_data_files_task(
+    fleet.action_data_files_task(
         ctx.batch_client, ctx.config, all, filespec)
 
 
@@ -1994,7 +1995,7 @@ def files_task(ctx, all, filespec):
 def files_node(ctx, all, filespec):
     """Retrieve file(s) from a compute node"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_data_files_node(
+    fleet.action_data_files_node(
         ctx.batch_client, ctx.config, all, filespec)
 
 
@@ -2030,7 +2031,7 @@ def logs(ctx):
 def diag_logs_upload(ctx, cardinal, nodeid, wait):
     """Upload Batch Service Logs from compute node"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_diag_logs_upload(
+    fleet.action_diag_logs_upload(
         ctx.batch_client, ctx.blob_client, ctx.config, cardinal, nodeid, wait)
 
 
@@ -2060,7 +2061,7 @@ def misc(ctx):
 def misc_tensorboard(ctx, jobid, taskid, logdir, image):
     """Create a tunnel to a Tensorboard instance for a specific task"""
     ctx.initialize_for_batch()
-    convoy.fleet.action_misc_tensorboard(
+    fleet.action_misc_tensorboard(
         ctx.batch_client, ctx.config, jobid, taskid, logdir, image)
 
 